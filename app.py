@@ -1,7 +1,11 @@
 # app.py
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 import csv
+import os
+import hashlib
+import math
+import time
 from pathlib import Path
 
 # === On branche sur TON fichier réel ===
@@ -11,17 +15,136 @@ from scripts.loto_gen.generateur_ultra_plus import (
     generer_combinaisons_depuis_web,
     verifier_criteres,
     get_historique_path,
-    charger_historique,
+    get_proposes_path,
+    charger_proposes_avec_types,
 )
+from scripts.loto_gen.cache import CacheLRU, contexte_loterie
+from scripts.loto_gen.roue import generer_roue
+from scripts.loto_gen.analytique import analyser_propositions
+from scripts.loto_gen.historique_dates import historique_dates
+from scripts.loto_gen.cooccurrences import cooccurrences
+from scripts.loto_gen.similarite import plus_proches
+from scripts.loto_gen.verification_blocs import verifier_blocs
+from scripts.loto_gen.profilage import Profileur, configurer_journal, journal_requete_lente
+from scripts.loto_gen.admission import Admission, blocs_max
+from scripts.loto_gen.memoire import rapport_memoire
+from scripts.loto_gen.formats import (
+    negocier_format,
+    encoder,
+    compresser,
+    generation_en_colonnes,
+    generation_en_binaire,
+    generation_en_json,
+    verification_en_colonnes,
+)
+from scripts.loto_gen.resultats import BlocsGeneres
+from scripts.loto_gen.probabilites import valider_config
 
 app = Flask(__name__)
 CORS(app)
 
+# Temps max (s) d'une génération par blocs: reste sous le timeout gunicorn (-t 180)
+GENERATION_DELAI_MAX = float(os.environ.get("GENERATION_DELAI_MAX", "150"))
+
+# Temps max (s) de recherche locale accordé à une roue dans une requête
+ROUE_DELAI_MAX = float(os.environ.get("ROUE_DELAI_MAX", "10"))
+
+# Nombre max de tickets par requête /api/similaires
+SIMILAIRES_LOT_MAX = int(os.environ.get("SIMILAIRES_LOT_MAX", "1000"))
+
+# Nombre max de blocs par requête /api/verifier-blocs
+VERIF_BLOCS_MAX = int(os.environ.get("VERIF_BLOCS_MAX", "1000"))
+
+# Budget de coût d'une génération (unité: combinaison à produire, x2 par option score_paires/ponderation)
+GENERATION_COUT_MAX = int(os.environ.get("GENERATION_COUT_MAX", "5000"))
+
+# Admission par worker: places simultanées par route lourde, puis 429 (file d'attente optionnelle).
+# Places + files doivent rester sous le nb de threads gunicorn (--threads): le reste sert
+# /api/verifier*, /health, stats. Vérifié au démarrage.
+ADMISSION_THREADS = int(os.environ.get("ADMISSION_THREADS", "4"))
+ADMISSION = Admission(
+    {
+        "api_generer": int(os.environ.get("ADMISSION_GENERER", "1")),
+        "api_analyse_propositions": int(os.environ.get("ADMISSION_ANALYSE", "1")),
+        "api_similaires": int(os.environ.get("ADMISSION_SIMILAIRES", "1")),
+    },
+    attente=float(os.environ.get("ADMISSION_ATTENTE", "2")),
+    file_max=int(os.environ.get("ADMISSION_FILE", "0")),
+    # Diagnostic rare: pas de place à lui, il prend celle de l'analyse
+    partages={"api_memoire": "api_analyse_propositions"},
+)
+if ADMISSION.capacite() >= ADMISSION_THREADS:
+    raise ValueError(
+        f"Admission: places + files ({ADMISSION.capacite()}) >= ADMISSION_THREADS ({ADMISSION_THREADS}), "
+        "plus de thread libre pour /api/verifier* et /health"
+    )
+
+# Config des loteries: une config qui n'admet (presque) aucune combinaison fait échouer le démarrage
+# (calcul exact, quelques secondes par worker; VALIDER_CONFIG=0 pour le sauter)
+if os.environ.get("VALIDER_CONFIG", "1") != "0":
+    for _cfg in LOTERIES.values():
+        valider_config(_cfg, contexte_loterie(_cfg)["mediane"])
+
+# Requêtes plus longues que ce seuil (s) -> une ligne JSON dans le journal "loto.lent" (0 = désactivé)
+REQUETE_LENTE_SEUIL = float(os.environ.get("REQUETE_LENTE_SEUIL", "10"))
+configurer_journal(os.environ.get("JOURNAL_LENT"))
+
+# Profilage à la demande: requête avec l'en-tête "X-Profil: <PROFILAGE_JETON>" -> fichier .prof
+# (PROFILAGE_TOUT=1 profile toutes les requêtes, pour le debug local)
+PROFILAGE_JETON = os.environ.get("PROFILAGE_JETON", "")
+PROFILAGE_TOUT = os.environ.get("PROFILAGE_TOUT", "0") == "1"
+PROFILEUR = Profileur(
+    os.environ.get("PROFILAGE_DOSSIER", str(Path(__file__).resolve().parent / "profils")),
+    int(os.environ.get("PROFILAGE_MAX_FICHIERS", "50")),
+)
+
+# Cache des vérifications: clé = (loterie, combinaison triée, version historique, version proposés)
+CACHE_VERIF = CacheLRU(int(os.environ.get("CACHE_VERIF_TAILLE", "4096")))
+
 # ---------- Petites utilités "neutres" (pas de logique métier doublée) ----------
 
 def _comb_sorted(nums):
     return tuple(sorted(int(x) for x in nums))
 
+def _delai(body, defaut, maxi):
+    """Délai demandé (secondes), plafonné à maxi; ValueError si absent du domaine ]0, inf[."""
+    delai = body.get("delai")
+    try:
+        delai = defaut if delai is None else float(delai)
+    except (TypeError, ValueError):
+        raise ValueError("delai doit être un nombre de secondes")
+    if not (math.isfinite(delai) and delai > 0):
+        raise ValueError("delai doit être un nombre de secondes > 0")
+    return min(delai, maxi)
+
+def _etag(cle):
+    return hashlib.sha1(repr(cle).encode("utf-8")).hexdigest()
+
+def _format_demande(disponibles):
+    """Format négocié (?format= ou Accept), None si non disponible."""
+    return negocier_format(request.args.get("format"), request.accept_mimetypes, disponibles)
+
+def _reponse_negociee(payload, fmt):
+    """Sérialise selon le format négocié (+ gzip si accepté)."""
+    if fmt == "json" and isinstance(payload.get("data"), BlocsGeneres):
+        # Génération: JSON écrit depuis le conteneur compact, sans liste de dicts intermédiaire
+        resp = app.response_class(generation_en_json(payload), mimetype="application/json")
+    elif fmt == "json":
+        resp = jsonify(payload)
+    else:
+        corps, mime = encoder(payload, fmt)
+        resp = app.response_class(corps, mimetype=mime)
+    corps, encodage = compresser(resp.get_data(), request.headers.get("Accept-Encoding", ""))
+    if encodage:
+        resp.set_data(corps)
+        resp.headers["Content-Encoding"] = encodage
+    resp.vary.add("Accept")
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+def _format_non_disponible(disponibles):
+    return jsonify({"ok": False, "error": f"Format non disponible (choix: {', '.join(disponibles)})"}), 406
+
 def _compute_mediane_from_history(cfg):
     """Calcule la médiane (pour Petit/Grand) en réutilisant tes CSV d'historique."""
     histo_path = Path(get_historique_path(cfg))
@@ -54,21 +177,137 @@ def _compute_mediane_from_history(cfg):
 
     return (sorted(tous)[len(tous)//2] if tous else 25)
 
+# ---------- Profilage / requêtes lentes ----------
+
+@app.before_request
+def _debut_requete():
+    g.t0 = time.perf_counter()
+    g.details = {}
+    if PROFILAGE_TOUT or (PROFILAGE_JETON and request.headers.get("X-Profil") == PROFILAGE_JETON):
+        g.profil = PROFILEUR.demarrer()
+
+@app.after_request
+def _fin_requete(resp):
+    prof = g.pop("profil", None)
+    if prof is not None:
+        g.details["profil"] = PROFILEUR.arreter(prof, request.endpoint or "inconnu")
+        resp.headers["X-Profil-Fichier"] = g.details["profil"]
+    duree = time.perf_counter() - g.t0
+    if 0 < REQUETE_LENTE_SEUIL <= duree:
+        journal_requete_lente({
+            "route": request.path,
+            "methode": request.method,
+            "statut": resp.status_code,
+            "duree": round(duree, 3),
+            **g.details,
+        })
+    return resp
+
+@app.teardown_request
+def _profil_orphelin(exc):
+    # Exception sortie avant after_request: on libère quand même le profileur
+    prof = g.pop("profil", None)
+    if prof is not None:
+        PROFILEUR.arreter(prof, request.endpoint or "inconnu")
+
+# ---------- Admission (routes lourdes) ----------
+
+@app.before_request
+def _admission():
+    if not ADMISSION.limitee(request.endpoint):
+        return None
+    if not ADMISSION.entrer(request.endpoint):
+        resp = jsonify({"ok": False, "error": "Serveur occupé, réessayez plus tard"})
+        resp.status_code = 429
+        resp.headers["Retry-After"] = str(ADMISSION.reessayer_dans(request.endpoint))
+        return resp
+    g.admis = (request.endpoint, time.perf_counter())
+
+@app.teardown_request
+def _admission_fin(exc):
+    admis = g.pop("admis", None)
+    if admis is not None:
+        ADMISSION.sortir(admis[0], time.perf_counter() - admis[1])
+
 # ---------- Routes ----------
 
 @app.route("/api/generer", methods=["POST"])
 def api_generer():
     """
     Corps attendu:
-    { "loterie": "1|2|3", "mode": "Gb", "blocs": 1 }
+    { "loterie": "1|2|3", "mode": "Gb", "blocs": 1, "delai": 150,
+      "score_paires": {"mode": "eviter|favoriser", "quantile": 0.5},      # optionnel
+      "ponderation": {"schema": "chaud|froid|retard", "derniers": 100, "force": 1.0} }  # optionnel, force 0-5
+    -> "partiel": true si le délai (plafonné par GENERATION_DELAI_MAX) a coupé la génération.
+    ou, pour une roue couvrante (mode "Roue"):
+    { "loterie": "2", "mode": "Roue", "tickets": 20, "garantie": 3, "numeros": [...], "delai": 3 }
+    -> la réponse contient en plus "couverture" (t-uplets couverts / total).
+    Format de réponse (?format= ou Accept): json (défaut), colonnes, binaire, msgpack.
     """
+    disponibles = ["json", "colonnes", "binaire", "msgpack"]
+    fmt = _format_demande(disponibles)
+    if fmt is None:
+        return _format_non_disponible(disponibles)
+
     body = request.get_json(force=True, silent=True) or {}
     loterie = str(body.get("loterie", "2"))
-    blocs = int(body.get("blocs", 1))
+    mode = str(body.get("mode", "Gb")).lower()
 
     try:
-        data = generer_combinaisons_depuis_web(loterie, blocs)
-        return jsonify({"ok": True, "data": data, "source": "API Flask (Render)"}), 200
+        blocs = int(body.get("blocs", 1))
+        g.details.update({"loterie": loterie, "mode": mode, "blocs": blocs})
+        extra = {}
+        if mode == "roue":
+            cfg = LOTERIES.get(loterie)
+            if not cfg:
+                return jsonify({"ok": False, "error": "Loterie invalide"}), 400
+            delai = _delai(body, 3, ROUE_DELAI_MAX)
+            nb_tickets = int(body.get("tickets", 10))
+            if not 1 <= nb_tickets <= GENERATION_COUT_MAX:
+                return jsonify({"ok": False, "error": f"tickets doit être entre 1 et {GENERATION_COUT_MAX}"}), 400
+            tickets, rapport = generer_roue(
+                cfg,
+                nb_tickets,
+                garantie=int(body.get("garantie", 3)),
+                numeros=body.get("numeros"),
+                delai=delai,
+            )
+            data = [{"bloc": 1, "combinaison": t, "etoile": False} for t in tickets]
+            extra["partiel"] = rapport["partiel"]
+            extra["couverture"] = rapport
+        else:
+            delai = _delai(body, GENERATION_DELAI_MAX, GENERATION_DELAI_MAX)
+            stats = {}
+            score_paires = body.get("score_paires")
+            ponderation = body.get("ponderation")
+            for nom, val in (("score_paires", score_paires), ("ponderation", ponderation)):
+                if val is not None and not isinstance(val, dict):
+                    return jsonify({"ok": False, "error": f"{nom} doit être un objet"}), 400
+            cfg = LOTERIES.get(loterie)
+            if cfg:
+                options = [nom for nom in ("score_paires", "ponderation") if body.get(nom)]
+                maxi = blocs_max(cfg, GENERATION_COUT_MAX, options)
+                if not 1 <= blocs <= maxi:
+                    return jsonify({"ok": False, "error": f"blocs doit être entre 1 et {maxi}"}), 400
+            data = generer_combinaisons_depuis_web(
+                loterie, blocs, delai=delai, stats=stats, score_paires=score_paires, ponderation=ponderation
+            )
+            extra["partiel"] = stats.get("partiel", False)
+            g.details["durees"] = stats.pop("durees", {})
+            g.details["essais"] = stats
+
+        t_serialisation = time.perf_counter()
+        if fmt == "binaire":
+            payload = generation_en_binaire(data, LOTERIES[loterie]["nombre_numeros"])
+        elif fmt in ("colonnes", "msgpack"):
+            payload = {"ok": True, "data": generation_en_colonnes(data), **extra, "source": "API Flask (Render)"}
+        else:
+            payload = {"ok": True, "data": data, **extra, "source": "API Flask (Render)"}
+        resp = _reponse_negociee(payload, fmt)
+        g.details.setdefault("durees", {})["serialisation"] = round(time.perf_counter() - t_serialisation, 4)
+        return resp, 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
 
@@ -78,8 +317,8 @@ def api_verifier():
     Vérifie si une combinaison est présente dans l'historique.
     Corps attendu:
     { "loterie": "1|2|3", "combinaison": [..] }
-    Réponse:
-    { "ok": true, "data": { "existe": bool, "criteres": {...} } }
+    Réponse (avec ETag; If-None-Match -> 304):
+    { "ok": true, "data": { "existe": bool, "propose": bool, "criteres": {...} } }
     """
     body = request.get_json(force=True, silent=True) or {}
     loterie = str(body.get("loterie", "2"))
@@ -92,19 +331,63 @@ def api_verifier():
         return jsonify({"ok": False, "error": "combinaison manquante"}), 400
 
     try:
-        taille = cfg["nombre_numeros"]
-        histo_path = get_historique_path(cfg)
-        histo_set = charger_historique(histo_path, taille)
+        target = cfg.combinaison(combinaison)
+        ctx = contexte_loterie(cfg)
+        cle = (loterie, target, ctx["version_historique"], ctx["version_proposes"])
+        etag = _etag(cle)
 
-        target = _comb_sorted(combinaison)
-        existe = (target in histo_set)
+        # Le client (ou un proxy) a déjà cette réponse -> pas de corps
+        if etag in request.if_none_match:
+            resp = app.response_class(status=304)
+            resp.set_etag(etag)
+            return resp
 
-        # On renvoie aussi le détail de tes critères réels (via verifier_criteres)
-        mediane = _compute_mediane_from_history(cfg)
-        audits = verifier_criteres(list(target), cfg, mediane)  # ta fonction
-        detail = audits[0] if audits else {}
+        data = CACHE_VERIF.get(cle)
+        if data is None:
+            existe = (target in ctx["historique"])
+            propose = (target in ctx["proposes"])
 
-        return jsonify({"ok": True, "data": {"existe": bool(existe), "criteres": detail}}), 200
+            # On renvoie aussi le détail de tes critères réels (via verifier_criteres)
+            audits = verifier_criteres(list(target), cfg, ctx["mediane"])  # ta fonction
+            detail = audits[0] if audits else {}
+            data = {"existe": bool(existe), "propose": bool(propose), "criteres": detail}
+            CACHE_VERIF.put(cle, data)
+
+        resp = jsonify({"ok": True, "data": data})
+        resp.set_etag(etag)
+        return resp, 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
+
+@app.route("/api/cache", methods=["GET"])
+def api_cache():
+    """Compteurs du cache de vérification (hits/misses/taille)."""
+    return jsonify({"ok": True, "data": CACHE_VERIF.stats()}), 200
+
+@app.route("/api/admission", methods=["GET"])
+def api_admission():
+    """Places, file d'attente et refus par route limitée (worker courant)."""
+    return jsonify({"ok": True, "data": ADMISSION.stats()}), 200
+
+@app.route("/api/memoire", methods=["GET"])
+def api_memoire():
+    """
+    Taille mémoire des structures (tracemalloc) et RSS du worker.
+    ?loterie=1|2|3&blocs=100 (blocs: taille de la génération mesurée)
+    """
+    try:
+        cfg = LOTERIES.get(request.args.get("loterie", "2"))
+        if not cfg:
+            raise ValueError("Loterie invalide")
+        blocs = request.args.get("blocs", 100, type=int)
+        maxi = blocs_max(cfg, GENERATION_COUT_MAX)
+        if not 1 <= blocs <= maxi:
+            raise ValueError(f"blocs doit être entre 1 et {maxi}")
+        return jsonify({"ok": True, "data": rapport_memoire(cfg, blocs)}), 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
 
@@ -121,7 +404,13 @@ def api_verifier_bloc():
     }
     Réponse:
     { "ok": true, "data": { "valide": bool, "erreurs": [...], "details": {...} } }
+    Format (?format= ou Accept): json (défaut), colonnes, msgpack (details en colonnes).
     """
+    disponibles = ["json", "colonnes", "msgpack"]
+    fmt = _format_demande(disponibles)
+    if fmt is None:
+        return _format_non_disponible(disponibles)
+
     body = request.get_json(force=True, silent=True) or {}
     loterie = str(body.get("loterie", "2"))
     bloc = body.get("bloc", [])
@@ -165,7 +454,237 @@ def api_verifier_bloc():
 
         # 3) Détail utile: on renvoie aussi l’audit détaillé
         ok = (len(erreurs) == 0)
-        return jsonify({"ok": True, "data": {"valide": ok, "erreurs": erreurs, "details": audits}}), 200
+        data = {"valide": ok, "erreurs": erreurs, "details": audits}
+        if fmt != "json":
+            data = verification_en_colonnes(data)
+        return _reponse_negociee({"ok": True, "data": data}, fmt), 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
+
+@app.route("/api/verifier-blocs", methods=["POST"])
+def api_verifier_blocs():
+    """
+    Vérifie PLUSIEURS blocs en une passe (remplace les appels répétés à /api/verifier-bloc).
+    Corps attendu:
+    {
+      "loterie": "1|2|3",
+      "blocs": [[[...], ...], ...],   # chaque bloc = par_bloc_base + 1 combinaisons
+      "etoileIndex": <int | [int, ...]>  # optionnel, défaut: dernière de chaque bloc
+    }
+    Réponse:
+    { "ok": true, "data": { "blocs", "valides", "echecs_par_critere", "rapport": [
+        { "bloc", "valide", "criteres_ko", "doublons_base", "reutilises_etoile", "etoile_ok",
+          "repetees", "historique", "proposees" }, ...] } }
+    Les listes contiennent les index (0-based, étoile = dernière) des combinaisons concernées,
+    sauf doublons_base (numéros). historique / proposees sont informatifs (n'invalident pas le bloc).
+    Format (?format= ou Accept): json (défaut), msgpack.
+    """
+    disponibles = ["json", "msgpack"]
+    fmt = _format_demande(disponibles)
+    if fmt is None:
+        return _format_non_disponible(disponibles)
+
+    body = request.get_json(force=True, silent=True) or {}
+    cfg = LOTERIES.get(str(body.get("loterie", "2")))
+    if not cfg:
+        return jsonify({"ok": False, "error": "Loterie invalide"}), 400
+    blocs = body.get("blocs")
+    if not isinstance(blocs, list) or not blocs or len(blocs) > VERIF_BLOCS_MAX:
+        return jsonify({"ok": False, "error": f"1 à {VERIF_BLOCS_MAX} blocs attendus"}), 400
+
+    try:
+        data = verifier_blocs(cfg, blocs, body.get("etoileIndex"))
+        return _reponse_negociee({"ok": True, "data": data}, fmt), 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
+
+@app.route("/api/analyse-propositions", methods=["POST"])
+def api_analyse_propositions():
+    """
+    Backtest: combien de tirages passés auraient eu 3, 4, 5+ numéros avec au moins un ticket.
+    Corps attendu:
+    { "loterie": "1|2|3", "propositions": [[...], ...] }   # sans "propositions": fichier proposes_lot_*
+    Réponse:
+    { "ok": true, "data": { "tirages", "propositions", "meilleur_par_tirage", "au_moins", "paires" } }
+    """
+    body = request.get_json(force=True, silent=True) or {}
+    loterie = str(body.get("loterie", "2"))
+    propositions = body.get("propositions")
+
+    cfg = LOTERIES.get(loterie)
+    if not cfg:
+        return jsonify({"ok": False, "error": "Loterie invalide"}), 400
+    if propositions is not None and not isinstance(propositions, list):
+        return jsonify({"ok": False, "error": "propositions doit être une liste"}), 400
+
+    try:
+        if propositions is None:
+            base, etoiles = charger_proposes_avec_types(get_proposes_path(cfg), cfg["nombre_numeros"])
+            propositions = sorted(base | etoiles)
+        data = analyser_propositions(cfg, propositions)
+        return jsonify({"ok": True, "data": data}), 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
+
+def _historique_stats():
+    """(cfg, historique daté, derniers, depuis) depuis la query string; ValueError si invalide."""
+    cfg = LOTERIES.get(request.args.get("loterie", "2"))
+    if not cfg:
+        raise ValueError("Loterie invalide")
+    derniers = request.args.get("derniers", type=int)
+    depuis = request.args.get("depuis") or None
+    bonis = request.args.get("bonis", "0").lower() in ("1", "true", "oui")
+    return cfg, historique_dates(cfg, bonis=bonis), derniers, depuis
+
+def _numeros_query():
+    brut = request.args.get("numeros", "")
+    try:
+        return [int(x) for x in brut.replace(",", " ").split()]
+    except ValueError:
+        raise ValueError("numeros doit être une liste d'entiers (ex: numeros=5,12)")
+
+@app.route("/api/stats/frequences", methods=["GET"])
+def api_stats_frequences():
+    """
+    Fréquence de chaque numéro sur une fenêtre de tirages.
+    ?loterie=1|2|3&derniers=100&depuis=2020-01-01&bonis=0 (fenêtre par défaut: tout l'historique)
+    """
+    try:
+        _, histo, derniers, depuis = _historique_stats()
+        return jsonify({"ok": True, "data": histo.frequences(derniers, depuis)}), 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
+
+@app.route("/api/stats/retards", methods=["GET"])
+def api_stats_retards():
+    """Retard de chaque numéro (tirages depuis sa dernière sortie). ?loterie=1|2|3&bonis=0"""
+    try:
+        _, histo, _, _ = _historique_stats()
+        return jsonify({"ok": True, "data": {"tirages": len(histo), "retards": histo.retards()}}), 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
+
+@app.route("/api/stats/cooccurrences", methods=["GET"])
+def api_stats_cooccurrences():
+    """
+    Tirages qui contiennent tous les numéros donnés.
+    ?loterie=1|2|3&numeros=5,12&derniers=&depuis=&bonis=0
+    """
+    try:
+        _, histo, derniers, depuis = _historique_stats()
+        data = histo.cooccurrences(_numeros_query(), derniers, depuis)
+        return jsonify({"ok": True, "data": data}), 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
+
+@app.route("/api/stats/combinaison", methods=["GET"])
+def api_stats_combinaison():
+    """
+    Sorties d'une combinaison exacte (ex: "est-elle sortie depuis 2020 ?").
+    ?loterie=1|2|3&numeros=...&depuis=2020-01-01&bonis=1
+    """
+    try:
+        cfg, histo, derniers, depuis = _historique_stats()
+        numeros = _numeros_query()
+        if len(numeros) != cfg["nombre_numeros"]:
+            raise ValueError(f"La combinaison doit contenir {cfg['nombre_numeros']} numéros")
+        return jsonify({"ok": True, "data": histo.apparitions(numeros, derniers, depuis)}), 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
+
+@app.route("/api/stats/paires", methods=["GET"])
+def api_stats_paires():
+    """
+    Paires les plus fréquentes de l'historique (lots bonis compris).
+    ?loterie=1|2|3&top=20&numero=7 (numero: partenaires les plus fréquents de ce numéro)
+    """
+    try:
+        cfg = LOTERIES.get(request.args.get("loterie", "2"))
+        if not cfg:
+            raise ValueError("Loterie invalide")
+        co = cooccurrences(cfg)
+        numero = request.args.get("numero", type=int)
+        if numero is not None and not 1 <= numero <= cfg["plage_numeros"][1]:
+            raise ValueError("Numéro hors plage")
+        top = request.args.get("top", 20, type=int)
+        return jsonify({"ok": True, "data": {"tirages": co.tirages, "paires": co.top_paires(top, numero)}}), 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
+
+@app.route("/api/stats/triplets", methods=["GET"])
+def api_stats_triplets():
+    """
+    Triplets les plus fréquents, éventuellement contenant 1 ou 2 numéros imposés;
+    avec 3 numéros: compte de ce triplet. ?loterie=1|2|3&top=20&numeros=5,12
+    """
+    try:
+        cfg = LOTERIES.get(request.args.get("loterie", "2"))
+        if not cfg:
+            raise ValueError("Loterie invalide")
+        numeros = _numeros_query()
+        if len(set(numeros)) > 3 or any(not 1 <= n <= cfg["plage_numeros"][1] for n in numeros):
+            raise ValueError("Au plus 3 numéros, dans la plage de la loterie")
+        co = cooccurrences(cfg)
+        top = request.args.get("top", 20, type=int)
+        return jsonify({"ok": True, "data": {"tirages": co.tirages, "triplets": co.top_triplets(top, numeros)}}), 200
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
+
+@app.route("/api/similaires", methods=["POST"])
+def api_similaires():
+    """
+    Tirages passés les plus proches d'un ticket (nb de numéros communs).
+    Corps attendu:
+    { "loterie": "1|2|3", "combinaison": [..], "top": 10 }          # top-N
+    { "loterie": "1|2|3", "combinaison": [..], "minimum": 5 }       # tous ceux avec >= 5 communs
+    { "loterie": "1|2|3", "combinaisons": [[..], ...], "top": 3 }   # plusieurs tickets
+    Réponse (par ticket):
+    { "meilleur": k, "distribution": {k: nb de tirages}, "tirages": [{position, date, combinaison, communs}] }
+    """
+    body = request.get_json(force=True, silent=True) or {}
+    cfg = LOTERIES.get(str(body.get("loterie", "2")))
+    if not cfg:
+        return jsonify({"ok": False, "error": "Loterie invalide"}), 400
+
+    lot = "combinaisons" in body
+    tickets = body.get("combinaisons") if lot else [body.get("combinaison")]
+    taille = cfg["nombre_numeros"]
+    debut, fin = cfg["plage_numeros"]
+    if not isinstance(tickets, list) or not tickets or len(tickets) > SIMILAIRES_LOT_MAX:
+        return jsonify({"ok": False, "error": f"1 à {SIMILAIRES_LOT_MAX} combinaisons attendues"}), 400
+    try:
+        tickets = [_comb_sorted(t) for t in tickets]
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "combinaison invalide"}), 400
+    if any(len(set(t)) != taille or t[0] < debut or t[-1] > fin for t in tickets):
+        return jsonify({"ok": False, "error": f"Chaque combinaison doit avoir {taille} numéros distincts entre {debut} et {fin}"}), 400
+
+    try:
+        top = max(0, min(int(body.get("top", 10)), 100))
+        minimum = body.get("minimum")
+        minimum = None if minimum is None else int(minimum)
+        data = plus_proches(cfg, tickets, top, minimum)
+        return jsonify({"ok": True, "data": data if lot else data[0]}), 200
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
 
@@ -1,47 +1,134 @@
 import csv
-import re
 import os
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from scripts.loto_gen.generateur_ultra_plus import LOTERIES as CONFIGS, PROJECT_ROOT, DATA_DIR_ROOT
 
 # On écrit dans historiques_*.csv (écrasement systématique, pas de fusion)
-LOTERIES = {
-    "1": {
-        "nom": "6/49",
-        "txt_in": "tirages_649.txt",
-        "hist_csv": "data/historiques_649.csv",
-        "doublons_csv": "data/doublons_649.csv",
-        "draw_size": 6
-    },
-    "2": {
-        "nom": "Lotto Max",
-        "txt_in": "tirages_lotto_max.txt",
-        "hist_csv": "data/historiques_lotto_max.csv",
-        "doublons_csv": "data/doublons_lotto_max.csv",
-        "draw_size": 7
-    },
-    "3": {
-        "nom": "Grande Vie",
-        "txt_in": "tirages_grande_vie.txt",
-        "hist_csv": "data/historiques_grande_vie.csv",
-        "doublons_csv": "data/doublons_grande_vie.csv",
-        "draw_size": 5
+# + chronologie_*.csv : tous les tirages datés, dans l'ordre chronologique
+# Mêmes ids / noms / fichiers que le générateur (source unique: generateur_ultra_plus.LOTERIES)
+def _config_ingestion(cfg):
+    histo = cfg["historique"]
+    return {
+        "nom": cfg["nom"],
+        "txt_in": str(PROJECT_ROOT / cfg["tirages"]),
+        "hist_csv": str(DATA_DIR_ROOT / histo),
+        "doublons_csv": str(DATA_DIR_ROOT / histo.replace("historiques_", "doublons_", 1)),
+        "chrono_csv": str(DATA_DIR_ROOT / histo.replace("historiques_", "chronologie_", 1)),
+        "draw_size": cfg["nombre_numeros"],
     }
-}
 
-def _parse_line_to_nums(line: str, draw_size: int):
+LOTERIES = {lid: _config_ingestion(cfg) for lid, cfg in CONFIGS.items()}
+
+DATE_INCONNUE = 'DATE_INCONNUE'
+
+# --- Parseur rapide (tokeniseur, sans regex par ligne) ---
+def _est_date(tok):
+    return len(tok) == 10 and tok[4] == '-' and tok[7] == '-' and tok[:4].isdigit() and tok[5:7].isdigit() and tok[8:].isdigit()
+
+def _analyser_ligne(raw, draw_size):
     """
-    Nettoie une ligne: retire un éventuel bonus '(xx)', extrait les nombres (1-2 chiffres).
-    Retourne une liste de chaînes SANS zéro devant si exactement draw_size nombres trouvés, sinon None.
+    Une ligne brute -> ('date', date) | ('tirage', date|None, nums, bonus|None) | None.
+    Formats reconnus: "2016-12-29", "06 16 40 43 46 (6)", "2016-12-29 06 16 40 43 46 (6)",
+    "03 10 13 38 46" (lot boni / tirage sans bonus), séparateurs espaces/tirets/virgules/tabulations.
     """
-    line = line.strip()
-    # Retire un bonus éventuel en fin de ligne : " ... (nn)"
-    line = re.sub(r'\s*\(\d{1,2}\)\s*', '', line)
-    # Extrait tous les nombres 1-2 chiffres
-    nums = re.findall(r'\b\d{1,2}\b', line)
+    tokens = raw.replace(',', ' ').split()
+    if not tokens:
+        return None
+    date = None
+    if _est_date(tokens[0]):
+        date = tokens[0]
+        tokens = tokens[1:]
+        if not tokens:
+            return ('date', date)
+    if any('-' in tok for tok in tokens):
+        # Variante "16-18-19-26-34-35-44"
+        tokens = ' '.join(tokens).replace('-', ' ').split()
+    nums = []
+    bonus = None
+    for tok in tokens:
+        if tok.isdigit():
+            if len(tok) > 2:
+                return None
+            nums.append(int(tok))
+        elif tok[0] == '(' and tok[-1] == ')' and tok[1:-1].isdigit():
+            bonus = int(tok[1:-1])
+        else:
+            return None  # "Lots bonis", en-têtes...
     if len(nums) != draw_size:
         return None
-    # On normalise SANS zéro devant (ex: "02" -> "2")
-    return [str(int(n)) for n in nums]
+    return ('tirage', date, nums, bonus)
+
+def _analyser_morceau(args):
+    lignes, draw_size = args
+    return [r for r in (_analyser_ligne(l, draw_size) for l in lignes) if r is not None]
+
+def _morceaux(path, lignes_par_morceau):
+    with open(path, encoding='utf-8') as f:
+        while True:
+            morceau = list(islice(f, lignes_par_morceau))
+            if not morceau:
+                return
+            yield morceau
+
+# Au-delà de cette taille, le parsing en parallèle compense le coût des processus
+SEUIL_PARALLELE = 8 * 1024 * 1024
+
+def lire_tirages(path, draw_size, parallele=None, lignes_par_morceau=50000):
+    """
+    Lit un fichier tirages_*.txt par morceaux et retourne les tirages dans l'ordre du fichier:
+    [(date, type, nums_tries, bonus), ...] où type = 'principal' (avec bonus) ou 'boni'
+    (lots bonis / tirages sans bonus). Une ligne de date s'applique aux tirages qui la suivent.
+    parallele: None = automatique selon la taille du fichier.
+    """
+    if parallele is None:
+        parallele = os.path.getsize(path) >= SEUIL_PARALLELE
+    morceaux = ((m, draw_size) for m in _morceaux(path, lignes_par_morceau))
+    if parallele:
+        with ProcessPoolExecutor() as ex:
+            resultats = list(ex.map(_analyser_morceau, morceaux))
+    else:
+        resultats = [_analyser_morceau(m) for m in morceaux]
+
+    tirages = []
+    date_courante = None
+    for res in resultats:
+        for r in res:
+            if r[0] == 'date':
+                date_courante = r[1]
+                continue
+            _, date, nums, bonus = r
+            if date:
+                date_courante = date
+            tirages.append((date or date_courante, 'principal' if bonus is not None else 'boni', tuple(sorted(nums)), bonus))
+    return tirages
+
+def chronologique(tirages):
+    """
+    Ordre chronologique (plus ancien d'abord). Un tirage principal et ses lots bonis
+    restent groupés. Avec des dates: tri stable par date. Sans date: les exports
+    sont du plus récent au plus ancien, on inverse l'ordre des groupes.
+    """
+    groupes = []
+    for t in tirages:
+        if t[1] == 'principal' or not groupes:
+            groupes.append([t])
+        else:
+            groupes[-1].append(t)
+    if any(g[0][0] for g in groupes):
+        groupes.sort(key=lambda g: g[0][0] or '')
+    else:
+        groupes.reverse()
+    return [t for g in groupes for t in g]
+
+def ecrire_chronologie(path, tirages, draw_size):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'type'] + [f'n{i+1}' for i in range(draw_size)] + ['bonus'])
+        for date, type_, nums, bonus in tirages:
+            writer.writerow([date or '', type_] + list(nums) + ['' if bonus is None else bonus])
 
 def populate_loterie(config, ordre='C'):
     seen_in_input = {}
@@ -49,24 +136,16 @@ def populate_loterie(config, ordre='C'):
     doublons_list = []
 
     # 1) Parse uniquement le fichier source (AUCUNE LECTURE d'historique existant)
-    with open(config["txt_in"], encoding='utf-8') as f:
-        for raw in f:
-            # Date éventuelle au début (facultatif, utile pour log des doublons)
-            date_match = re.match(r'^(\d{4}-\d{2}-\d{2})', raw.strip())
-            date = date_match.group(1) if date_match else 'DATE_INCONNUE'
-
-            nums = _parse_line_to_nums(raw, config["draw_size"])
-            if not nums:
-                continue
-
-            # Clé de dédup interne = combinaison triée (pour éviter "1 2 3" vs "3 2 1")
-            key_sorted = tuple(sorted(nums, key=lambda x: int(x)))
-            if key_sorted in seen_in_input:
-                doublons_list.append([date] + list(key_sorted))
-            else:
-                seen_in_input[key_sorted] = date
-                # On stocke trié par combinaison pour une sortie propre/constante
-                combos_final.append(list(key_sorted))
+    tirages = lire_tirages(config["txt_in"], config["draw_size"])
+    for date, _type, nums, _bonus in tirages:
+        # Clé de dédup interne = combinaison triée (pour éviter "1 2 3" vs "3 2 1")
+        key_sorted = tuple(str(n) for n in nums)
+        if key_sorted in seen_in_input:
+            doublons_list.append([date or DATE_INCONNUE] + list(key_sorted))
+        else:
+            seen_in_input[key_sorted] = date
+            # On stocke trié par combinaison pour une sortie propre/constante
+            combos_final.append(list(key_sorted))
 
     # 2) Tri global si demandé
     if ordre == 'C':
@@ -86,6 +165,10 @@ def populate_loterie(config, ordre='C'):
             writer.writerow(['Date'] + [f'Num{i+1}' for i in range(config["draw_size"])])
             writer.writerows(doublons_list)
 
+    # 4 bis) Chronologie complète (dates, bonus, lots bonis) pour les index/statistiques
+    chrono = chronologique(tirages)
+    ecrire_chronologie(config["chrono_csv"], chrono, config["draw_size"])
+
     # 5) Logs de synthèse
     print(f"\n🎯 Loterie : {config['nom']}")
     print(f"🧩 Mode : {'Croissant (ordre lignes trié)' if ordre == 'C' else 'Mélangé (ordre brut)'}")
@@ -93,6 +176,7 @@ def populate_loterie(config, ordre='C'):
     print(f"✅ {len(combos_final)} combinaisons sauvegardées (écrasement) → {config['hist_csv']}")
     if doublons_list:
         print(f"📝 Doublons internes enregistrés → {config['doublons_csv']}")
+    print(f"📅 {len(chrono)} tirages datés/ordonnés → {config['chrono_csv']}")
 
     # 6) Affichage complet dans le terminal (format simple avec espaces, sans index)
     print("\n=== Historique complet ===")
@@ -101,9 +185,8 @@ def populate_loterie(config, ordre='C'):
 
 if __name__ == "__main__":
     print("🎰 Choisissez une loterie à traiter :")
-    print("1. 6/49")
-    print("2. Lotto Max")
-    print("3. Grande Vie")
+    for lid, cfg in LOTERIES.items():
+        print(f"{lid}. {cfg['nom']}")
     choix = input("> ").strip()
 
     if choix in LOTERIES:
@@ -114,7 +197,4 @@ if __name__ == "__main__":
             ordre = 'C'
         populate_loterie(LOTERIES[choix], ordre)
     else:
-        print("❌ Choix invalide. Entrez 1, 2 ou 3.")
-
-
-
+        print(f"❌ Choix invalide. Entrez {', '.join(LOTERIES)}.")
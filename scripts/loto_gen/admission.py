@@ -0,0 +1,114 @@
+"""
+Contrôle d'admission par route, à l'échelle d'un worker.
+
+Chaque route lourde a un nombre de places (sémaphore). Une requête sans place
+est refusée tout de suite (429 + Retry-After estimé d'après la durée moyenne
+récente de la route), ou, si la route a une file (file_max > 0), attend au plus
+'attente' secondes avant d'être refusée. Une requête en file occupe un thread:
+les routes sans limite (vérifications, /health) ne passent jamais par ici et
+gardent de la capacité tant que capacite() (places + files) reste sous le
+nombre de threads du worker.
+
+Le coût d'une génération est borné à part (blocs_max): unité = une combinaison
+à produire, doublée par option qui fait baisser le taux d'acceptation des
+candidats (score de paires, pondération).
+"""
+import math
+import threading
+
+FACTEURS_COUT = {"score_paires": 2, "ponderation": 2}
+
+def cout_bloc(cfg, options=()):
+    cout = cfg["par_bloc_base"] + 1
+    for opt in options:
+        cout *= FACTEURS_COUT.get(opt, 1)
+    return cout
+
+def blocs_max(cfg, budget, options=()):
+    """Nb de blocs max pour ce budget (au moins 1)."""
+    return max(1, budget // cout_bloc(cfg, options))
+
+class _Route:
+    __slots__ = ("places", "sem", "file", "file_max", "duree_moyenne", "admises", "refusees")
+
+    def __init__(self, places, file_max):
+        self.places = places
+        self.sem = threading.BoundedSemaphore(places)
+        self.file = 0
+        self.file_max = file_max
+        self.duree_moyenne = None
+        self.admises = 0
+        self.refusees = 0
+
+class Admission:
+    def __init__(self, places, attente=2.0, file_max=0, partages=None):
+        """
+        places: {endpoint: nb de requêtes simultanées}; file_max: requêtes en attente par route.
+        partages: {endpoint: endpoint de places} pour une route qui prend les places d'une autre.
+        """
+        self.attente = attente
+        self._routes = {nom: _Route(n, file_max) for nom, n in places.items() if n > 0}
+        for nom, cible in (partages or {}).items():
+            if cible in self._routes:
+                self._routes[nom] = self._routes[cible]
+        self._lock = threading.Lock()
+
+    def capacite(self):
+        """Threads que les routes limitées peuvent occuper au plus (places + files)."""
+        routes = {id(r): r for r in self._routes.values()}.values()
+        return sum(r.places + r.file_max for r in routes)
+
+    def limitee(self, nom):
+        return nom in self._routes
+
+    def entrer(self, nom):
+        """True si la requête est admise (appeler sortir ensuite), False si refusée."""
+        r = self._routes[nom]
+        if r.sem.acquire(blocking=False):
+            with self._lock:
+                r.admises += 1
+            return True
+        with self._lock:
+            if r.file >= r.file_max:
+                r.refusees += 1
+                return False
+            r.file += 1
+        ok = False
+        try:
+            ok = r.sem.acquire(timeout=self.attente)
+        finally:
+            with self._lock:
+                r.file -= 1
+                if ok:
+                    r.admises += 1
+                else:
+                    r.refusees += 1
+        return ok
+
+    def sortir(self, nom, duree):
+        r = self._routes[nom]
+        with self._lock:
+            # Moyenne mobile exponentielle des durées (estimation du Retry-After)
+            r.duree_moyenne = duree if r.duree_moyenne is None else 0.8 * r.duree_moyenne + 0.2 * duree
+        r.sem.release()
+
+    def reessayer_dans(self, nom):
+        """Secondes conseillées avant de réessayer (en-tête Retry-After)."""
+        r = self._routes[nom]
+        if r.duree_moyenne is None:
+            return 5
+        return max(1, math.ceil(r.duree_moyenne * (r.file + 1) / r.places))
+
+    def stats(self):
+        with self._lock:
+            return {
+                nom: {
+                    "places": r.places,
+                    "file_max": r.file_max,
+                    "en_file": r.file,
+                    "admises": r.admises,
+                    "refusees": r.refusees,
+                    "duree_moyenne": None if r.duree_moyenne is None else round(r.duree_moyenne, 3),
+                }
+                for nom, r in self._routes.items()
+            }
@@ -1,159 +1,87 @@
-import os
-from collections import Counter
-import numpy as np
-
-LOTERIES = {
-    "1": {
-        "nom": "Grande Vie",
-        "csv": "../data/historiques_grande_vie.csv",
-        "nombre_numeros": 5,
-        "pair_impair_valides": [(3,2), (2,3), (4,1), (1,4)],
-        "petit_grand_valides": [(3,2), (2,3), (4,1), (1,4)],
-        "groupes_dizaines": 3,
-        "fin_identique_max": 2,
-        "min_finales": 3,
-        "max_par_multi": 4
-    },
-    "2": {
-        "nom": "Lotto Max",
-        "csv": "../data/historiques_lotto_max.csv",
-        "nombre_numeros": 7,
-        "pair_impair_valides": [(4,3), (3,4), (5,2), (2,5)],
-        "petit_grand_valides": [(4,3), (3,4), (5,2), (2,5)],
-        "groupes_dizaines": 4,
-        "fin_identique_max": 3,
-        "min_finales": 4,
-        "max_par_multi": 5
-    },
-    "3": {
-        "nom": "649",
-        "csv": "../data/historiques_649.csv",
-        "nombre_numeros": 6,
-        "pair_impair_valides": [(3,3), (4,2), (2,4), (5,1), (1,5)],
-        "petit_grand_valides": [(3,3), (4,2), (2,4), (5,1), (1,5)],
-        "groupes_dizaines": 4,
-        "fin_identique_max": 3,
-        "min_finales": 4,
-        "max_par_multi": 5
-    }
-}
-
-def test_pair_impair(comb, cfg):
-    p = sum(1 for x in comb if x % 2 == 0)
-    i = len(comb) - p
-    return (p, i) in cfg['pair_impair_valides']
-
-def test_petit_grand(comb, cfg, mediane):
-    petit = sum(1 for x in comb if x <= mediane)
-    grand = len(comb) - petit
-    return (petit, grand) in cfg['petit_grand_valides']
+"""
+Analyse des critères du générateur sur les tirages réels.
+
+Pour chaque loterie de LOTERIES (generateur_ultra_plus), l'historique est chargé
+une seule fois en tableau, tous les critères sont évalués en une passe vectorisée,
+et on rapporte les taux de passage marginaux, par paires de critères et joint
+(fraction des vrais tirages qui respectent TOUT le jeu de règles).
+
+Usage (depuis la racine du projet):
+    python -m scripts.loto_gen.analyse_criteres            # les 3 loteries, JSON sur stdout
+    python -m scripts.loto_gen.analyse_criteres 2 --sortie analyse.json
+"""
+import argparse
+import json
+import sys
 
-def test_series_max2_sans_quatuor(comb):
-    count = 0
-    i = 0
-    n = len(comb)
-    while i < n - 1:
-        if comb[i+1] == comb[i] + 1:
-            length = 2
-            j = i + 1
-            while j < n - 1 and comb[j+1] == comb[j] + 1:
-                length += 1
-                j += 1
-            if length > 3:
-                return False
-            count += 1
-            i = j
-        else:
-            i += 1
-    return count <= 2
-
-def test_repartition_dizaines(comb, cfg):
-    groupes = [0] * ((max(comb) + 9) // 10)
-    for x in comb:
-        groupes[(x - 1) // 10] += 1
-    return all(c <= cfg['groupes_dizaines'] for c in groupes)
-
-def test_somme(comb, min_s, max_s):
-    s = sum(comb)
-    return min_s <= s <= max_s
-
-def test_same_ending(comb, cfg):
-    endings = Counter(n % 10 for n in comb)
-    return all(count <= cfg['fin_identique_max'] for count in endings.values())
+import numpy as np
 
-def test_diversite_finales(comb, min_finales):
-    return len(set(n % 10 for n in comb)) >= min_finales
+from .generateur_ultra_plus import (
+    LOTERIES,
+    get_historique_path,
+    charger_historique,
+    calculer_mediane,
+)
+from .criteres_vectorises import NOMS_CRITERES, tableau, evaluer_criteres
 
-def test_symboliques(comb, multiplicateurs=range(2, 10), max_par_multi=4):
-    for m in multiplicateurs:
-        count = sum(1 for n in comb if n % m == 0)
-        if count > max_par_multi:
-            return False
-    return True
+def charger_tableau(cfg):
+    """Historique de la loterie -> tableau (n, taille) trié."""
+    taille = cfg["nombre_numeros"]
+    return tableau(sorted(charger_historique(get_historique_path(cfg), taille)), taille)
 
 def analyse_loterie(cfg):
-    path = cfg["csv"]
-    nb_numeros = cfg["nombre_numeros"]
-    all_combs = []
-    sommes = []
-
-    if not os.path.exists(path):
-        print(f"Fichier introuvable : {path}")
-        return
-
-    with open(path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            parts = line.split()
-            try:
-                comb = sorted(int(x) for x in parts if x.isdigit())
-            except:
-                continue
-            if len(comb) == nb_numeros:
-                all_combs.append(comb)
-                sommes.append(sum(comb))
-
-    if not all_combs:
-        print(f"Aucune combinaison valide trouvée dans {cfg['nom']}")
-        return
-
-    # Calcul de la fourchette interquartile pour somme réaliste
-    q1 = np.percentile(sommes, 25)
-    q3 = np.percentile(sommes, 75)
-    iqr = q3 - q1
-    min_s = max(min(sommes), q1 - 1.5 * iqr)
-    max_s = min(max(sommes), q3 + 1.5 * iqr)
-
-    mediane = sorted([n for comb in all_combs for n in comb])[len(all_combs)*nb_numeros // 2]
-
-    criteres = [
-        ("Pair/Impair", lambda c: test_pair_impair(c, cfg)),
-        ("Petit/Grand", lambda c: test_petit_grand(c, cfg, mediane)),
-        ("Séries consécutives (max 2, max trio)", test_series_max2_sans_quatuor),
-        ("Répartition par dizaines", lambda c: test_repartition_dizaines(c, cfg)),
-        ("Somme totale réaliste", lambda c: test_somme(c, min_s, max_s)),
-        ("Fins identiques limitées", lambda c: test_same_ending(c, cfg)),
-        ("Diversité des finales (unités)", lambda c: test_diversite_finales(c, cfg["min_finales"])),
-        ("Multiples (symboliques)", lambda c: test_symboliques(c, max_par_multi=cfg["max_par_multi"])),
-    ]
-
-    print(f"\n🔍 Analyse sur {len(all_combs)} tirages de {cfg['nom']} :")
-    print(f"🔎 Fourchette somme utilisée : {min_s:.1f} - {max_s:.1f}")
-    for nom, func in criteres:
-        ok = sum(1 for c in all_combs if func(c))
-        pourc = 100 * ok / len(all_combs)
-        print(f"- {nom} : {ok} / {len(all_combs)} ({pourc:.2f} %) respectent ce critère")
+    arr = charger_tableau(cfg)
+    n = len(arr)
+    if not n:
+        return {"nom": cfg["nom"], "tirages": 0, "erreur": f"Aucun tirage dans {get_historique_path(cfg)}"}
+
+    mediane = calculer_mediane(get_historique_path(cfg), cfg["nombre_numeros"])
+    res = evaluer_criteres(arr, cfg, mediane)
+    matrice = np.column_stack([res[nom] for nom in NOMS_CRITERES])
+
+    # Paires: M^T M compte les tirages qui passent les deux critères à la fois
+    m = matrice.astype(np.int64)
+    conjointes = (m.T @ m) / n
+    jointe = matrice.all(axis=1)
+
+    sommes = arr.sum(axis=1)
+    q = np.percentile(sommes, [0, 25, 50, 75, 100])
+
+    return {
+        "nom": cfg["nom"],
+        "tirages": int(n),
+        "mediane": int(mediane),
+        "somme_config": [cfg["somme_min"], cfg["somme_max"]],
+        "somme_observee": dict(zip(["min", "q1", "mediane", "q3", "max"], (float(x) for x in q))),
+        "marginales": {nom: float(matrice[:, i].mean()) for i, nom in enumerate(NOMS_CRITERES)},
+        "paires": {
+            a: {b: float(conjointes[i, j]) for j, b in enumerate(NOMS_CRITERES) if j != i}
+            for i, a in enumerate(NOMS_CRITERES)
+        },
+        "jointe": float(jointe.mean()),
+        "tirages_valides": int(jointe.sum()),
+    }
 
-if __name__ == "__main__":
-    print("1️⃣ Grande Vie")
-    print("2️⃣ Lotto Max")
-    print("3️⃣ 6/49")
-    choix = input("Choisissez la loterie à analyser (1, 2 ou 3) : ").strip()
-    if choix not in LOTERIES:
-        print("Choix invalide.")
+def analyse_toutes(ids=None):
+    ids = ids or list(LOTERIES)
+    return {lid: analyse_loterie(LOTERIES[lid]) for lid in ids}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Taux de passage des critères sur l'historique.")
+    parser.add_argument("loteries", nargs="*", help=f"ids parmi {', '.join(sorted(LOTERIES))} (défaut: toutes)")
+    parser.add_argument("--sortie", help="fichier JSON (défaut: stdout)")
+    args = parser.parse_args(argv)
+    inconnues = [lid for lid in args.loteries if lid not in LOTERIES]
+    if inconnues:
+        parser.error(f"loterie(s) inconnue(s): {', '.join(inconnues)}")
+
+    rapport = analyse_toutes(args.loteries)
+    texte = json.dumps(rapport, ensure_ascii=False, indent=2)
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            f.write(texte + "\n")
     else:
-        analyse_loterie(LOTERIES[choix])
-
+        sys.stdout.write(texte + "\n")
 
+if __name__ == "__main__":
+    main()
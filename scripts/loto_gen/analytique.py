@@ -0,0 +1,86 @@
+import threading
+
+import numpy as np
+
+from .generateur_ultra_plus import get_historique_path, charger_historique
+from .cache import version_fichier
+from .config import compiler
+
+# --- Combinaisons sous forme de masques de bits (bit n = numéro n, n <= 63) ---
+def masques(combinaisons):
+    """Liste de combinaisons -> tableau uint64 de masques."""
+    out = np.zeros(len(combinaisons), dtype=np.uint64)
+    for i, comb in enumerate(combinaisons):
+        m = 0
+        for n in comb:
+            m |= 1 << int(n)
+        out[i] = m
+    return out
+
+# Table de popcount par octet pour les versions de numpy sans bitwise_count
+_POPCOUNT_OCTET = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def popcount(arr):
+    """Nombre de bits à 1 de chaque élément uint64 (résultat uint8)."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(arr).astype(np.uint8, copy=False)
+    octets = np.ascontiguousarray(arr).view(np.uint8).reshape(arr.shape + (8,))
+    return _POPCOUNT_OCTET[octets].sum(axis=-1, dtype=np.uint8)
+
+# --- Historique en masques, rechargé seulement si le fichier change ---
+_masques_histo = {}
+_masques_lock = threading.Lock()
+
+def masques_historique(cfg):
+    histo_path = get_historique_path(cfg)
+    version = version_fichier(histo_path)
+    ent = _masques_histo.get(cfg["nom"])
+    if ent is not None and ent[0] == version:
+        return ent[1]
+    with _masques_lock:
+        hist = masques(sorted(charger_historique(histo_path, cfg["nombre_numeros"])))
+        _masques_histo[cfg["nom"]] = (version, hist)
+        return hist
+
+# --- Backtest d'un ensemble de propositions contre tout l'historique ---
+# Taille max (en éléments) de la matrice tirages x propositions traitée d'un coup
+ELEMENTS_PAR_MORCEAU = 1 << 22
+
+def distribution_correspondances(hist, props, taille, elements_par_morceau=ELEMENTS_PAR_MORCEAU):
+    """
+    hist, props: tableaux uint64 de masques.
+    Retourne un dict:
+      meilleur_par_tirage[k] = nb de tirages dont le meilleur ticket a k numéros communs
+      au_moins[k]            = nb de tirages avec au moins un ticket ayant >= k numéros communs
+      paires[k]              = nb de couples (ticket, tirage) avec exactement k numéros communs
+    La matrice d'intersections est traitée par paquets de propositions (mémoire bornée).
+    """
+    nb_tirages, nb_props = len(hist), len(props)
+    meilleur = np.zeros(nb_tirages, dtype=np.uint8)
+    paires = np.zeros(taille + 1, dtype=np.int64)
+    pas = max(1, elements_par_morceau // max(1, nb_tirages))
+
+    for debut in range(0, nb_props, pas):
+        morceau = props[debut:debut + pas]
+        communs = popcount(hist[:, None] & morceau[None, :])
+        np.maximum(meilleur, communs.max(axis=1), out=meilleur)
+        paires += np.bincount(communs.ravel(), minlength=taille + 1)[:taille + 1]
+
+    par_tirage = np.bincount(meilleur, minlength=taille + 1)[:taille + 1]
+    au_moins = np.cumsum(par_tirage[::-1])[::-1]
+    return {
+        "tirages": int(nb_tirages),
+        "propositions": int(nb_props),
+        "meilleur_par_tirage": {k: int(v) for k, v in enumerate(par_tirage)},
+        "au_moins": {k: int(v) for k, v in enumerate(au_moins) if k >= 1},
+        "paires": {k: int(v) for k, v in enumerate(paires)},
+    }
+
+def analyser_propositions(cfg, propositions):
+    """
+    Backtest des combinaisons 'propositions' contre l'historique de la loterie.
+    ValueError si une proposition n'est pas une combinaison valide de la loterie.
+    """
+    cc = compiler(cfg)
+    props = masques([cc.combinaison(c) for c in propositions])
+    return distribution_correspondances(masques_historique(cfg), props, cc.taille)
@@ -0,0 +1,97 @@
+import os
+import threading
+from collections import OrderedDict
+
+from .generateur_ultra_plus import (
+    get_historique_path,
+    get_proposes_path,
+    charger_historique,
+    charger_proposes,
+    calculer_mediane,
+)
+
+# --- Version d'un fichier de données (change dès que le fichier est réécrit) ---
+def version_fichier(path):
+    """Signature (mtime_ns, taille) du fichier, None s'il n'existe pas."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+# --- Cache LRU borné, partagé entre les threads d'un worker ---
+class CacheLRU:
+    def __init__(self, taille_max=4096):
+        self.taille_max = taille_max
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cle, defaut=None):
+        with self._lock:
+            try:
+                valeur = self._data[cle]
+            except KeyError:
+                self.misses += 1
+                return defaut
+            self._data.move_to_end(cle)
+            self.hits += 1
+            return valeur
+
+    def put(self, cle, valeur):
+        with self._lock:
+            self._data[cle] = valeur
+            self._data.move_to_end(cle)
+            while len(self._data) > self.taille_max:
+                self._data.popitem(last=False)
+
+    def vider(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "taille": len(self._data),
+                "taille_max": self.taille_max,
+                "hits": self.hits,
+                "misses": self.misses,
+                "taux_hits": (self.hits / total) if total else 0.0,
+            }
+
+# --- Contexte de vérification par loterie (historique, proposés, médiane) ---
+# Rechargé seulement quand l'un des deux fichiers change sur disque.
+_contextes = {}
+_contextes_lock = threading.Lock()
+
+def contexte_loterie(cfg):
+    """
+    Retourne un dict {historique, proposes, mediane, version_historique, version_proposes}
+    pour la loterie, en ne relisant les fichiers que si leur version a changé.
+    """
+    histo_path = get_historique_path(cfg)
+    prop_path = get_proposes_path(cfg)
+    versions = (version_fichier(histo_path), version_fichier(prop_path))
+
+    ctx = _contextes.get(cfg['nom'])
+    if ctx is not None and (ctx['version_historique'], ctx['version_proposes']) == versions:
+        return ctx
+
+    with _contextes_lock:
+        ctx = _contextes.get(cfg['nom'])
+        if ctx is not None and (ctx['version_historique'], ctx['version_proposes']) == versions:
+            return ctx
+        taille = cfg['nombre_numeros']
+        ctx = {
+            "historique": charger_historique(histo_path, taille),
+            "proposes": charger_proposes(prop_path, taille),
+            "mediane": calculer_mediane(histo_path, taille),
+            "version_historique": versions[0],
+            "version_proposes": versions[1],
+        }
+        _contextes[cfg['nom']] = ctx
+        return ctx
@@ -0,0 +1,287 @@
+"""
+Test de charge hors ligne de l'API Flask.
+
+Lance l'application sous gunicorn en local (ou vise --url), envoie un mélange
+configurable de requêtes /api/verifier, /api/verifier-bloc et /api/generer à
+concurrence fixe, puis rend débit et percentiles de latence par route en JSON.
+
+Les charges utiles sont tirées d'avance avec une graine: combinaisons au hasard,
+blocs valides produits par generer_par_blocs (sans rien écrire sur disque) et
+blocs invalides (numéro de la base répété, série interdite). Même graine, même
+nombre de requêtes et même mélange -> mêmes requêtes, donc des résultats
+comparables d'un run à l'autre.
+
+Usage (depuis la racine du projet):
+    python -m scripts.loto_gen.charge --requetes 2000 --concurrence 8
+    python -m scripts.loto_gen.charge --melange verifier=8,verifier-bloc=2,generer=1 --sortie charge.json
+    python -m scripts.loto_gen.charge --url http://127.0.0.1:5050 --duree 30
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .generateur_ultra_plus import LOTERIES, PROJECT_ROOT, generer_par_blocs
+
+ROUTES = {
+    "verifier": "/api/verifier",
+    "verifier-bloc": "/api/verifier-bloc",
+    "generer": "/api/generer",
+}
+PERCENTILES = (50, 90, 95, 99)
+
+# --- Charges utiles ---
+def _blocs_valides(cfg, nb):
+    with contextlib.redirect_stdout(io.StringIO()):
+        res, _ = generer_par_blocs(cfg, nb * (cfg["par_bloc_base"] + 1))
+    blocs = {}
+    for bloc_id, comb, _etoile in res:
+        blocs.setdefault(bloc_id, []).append(list(comb))
+    return list(blocs.values())
+
+def _bloc_invalide(bloc, rng, cfg):
+    bloc = [list(c) for c in bloc]
+    if rng.random() < 0.5:
+        # Un numéro de la première combinaison répété dans la deuxième (doublon dans la base)
+        bloc[1][0] = bloc[0][0]
+    else:
+        debut = cfg["plage_numeros"][0]
+        bloc[0] = list(range(debut, debut + cfg["nombre_numeros"]))
+    return bloc
+
+def preparer_requetes(lid, melange, nb, graine, nb_blocs_valides=20):
+    """Liste de (route, corps) tirée avec la graine; proportions données par melange {route: poids}."""
+    rng = random.Random(graine)
+    random.seed(graine)
+    cfg = LOTERIES[lid]
+    debut, fin = cfg["plage_numeros"]
+    taille = cfg["nombre_numeros"]
+    valides = _blocs_valides(cfg, nb_blocs_valides) if melange.get("verifier-bloc") else []
+    routes = list(melange)
+    poids = [melange[r] for r in routes]
+    requetes = []
+    for route in rng.choices(routes, poids, k=nb):
+        if route == "verifier":
+            corps = {"loterie": lid, "combinaison": sorted(rng.sample(range(debut, fin + 1), taille))}
+        elif route == "verifier-bloc":
+            bloc = rng.choice(valides)
+            corps = {"loterie": lid, "bloc": bloc if rng.random() < 0.5 else _bloc_invalide(bloc, rng, cfg)}
+        else:
+            corps = {"loterie": lid, "mode": "Gb", "blocs": rng.randint(1, 3)}
+        requetes.append((route, json.dumps(corps).encode("utf-8")))
+    return requetes
+
+# --- Serveur local ---
+def _port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def demarrer_gunicorn(workers, threads, journal=None, attente=60):
+    """Lance gunicorn (app:app) sur un port libre; retourne (processus, url)."""
+    port = _port_libre()
+    sortie = open(journal, "w") if journal else subprocess.DEVNULL
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers), "-k", "gthread", "--threads", str(threads),
+         "-t", "180", "-b", f"127.0.0.1:{port}", "app:app"],
+        cwd=str(PROJECT_ROOT), stdout=sortie, stderr=sortie,
+    )
+    url = f"http://127.0.0.1:{port}"
+    fin = time.monotonic() + attente
+    while time.monotonic() < fin:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn s'est arrêté (code {proc.returncode})")
+        try:
+            con = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            con.request("GET", "/health")
+            if con.getresponse().status == 200:
+                con.close()
+                return proc, url
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("gunicorn ne répond pas sur /health")
+
+# --- Client ---
+class _Client:
+    """Connexion HTTP persistante (une par thread), rouverte après une erreur."""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.hote = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.con = None
+
+    def post(self, chemin, corps):
+        if self.con is None:
+            self.con = http.client.HTTPConnection(self.hote, self.port, timeout=self.timeout)
+        try:
+            self.con.request("POST", chemin, corps, {"Content-Type": "application/json"})
+            resp = self.con.getresponse()
+            resp.read()
+            return resp.status
+        except (OSError, http.client.HTTPException):
+            self.con.close()
+            self.con = None
+            return 0
+
+def _executer(url, requetes, concurrence, duree=None, timeout=180):
+    """Envoie les requêtes avec 'concurrence' threads; retourne [(route, statut, secondes)], durée totale."""
+    resultats = []
+    lock = threading.Lock()
+    suivante = iter(requetes)
+    fin = (time.monotonic() + duree) if duree else None
+
+    def travailleur():
+        client = _Client(url, timeout)
+        locaux = []
+        while fin is None or time.monotonic() < fin:
+            with lock:
+                req = next(suivante, None)
+            if req is None:
+                break
+            route, corps = req
+            t0 = time.perf_counter()
+            statut = client.post(ROUTES[route], corps)
+            locaux.append((route, statut, time.perf_counter() - t0))
+        with lock:
+            resultats.extend(locaux)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=travailleur) for _ in range(concurrence)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return resultats, time.perf_counter() - t0
+
+# --- Rapport ---
+def _percentile(triees, p):
+    """Rang le plus proche (triees non vide)."""
+    return triees[max(0, -(-len(triees) * p // 100) - 1)]
+
+def _resume(mesures, duree):
+    latences = sorted(s for _statut, s in mesures)
+    statuts = {}
+    for statut, _s in mesures:
+        statuts[str(statut)] = statuts.get(str(statut), 0) + 1
+    res = {
+        "requetes": len(mesures),
+        "erreurs": sum(1 for statut, _s in mesures if statut == 0 or statut >= 500),
+        "statuts": dict(sorted(statuts.items())),
+        "debit": round(len(mesures) / duree, 2) if duree else None,
+    }
+    if latences:
+        res["latence_ms"] = {
+            **{f"p{p}": round(_percentile(latences, p) * 1000, 2) for p in PERCENTILES},
+            "moyenne": round(sum(latences) / len(latences) * 1000, 2),
+            "max": round(latences[-1] * 1000, 2),
+        }
+    return res
+
+def rapport(resultats, duree):
+    par_route = {}
+    for route, statut, s in resultats:
+        par_route.setdefault(route, []).append((statut, s))
+    return {
+        "total": _resume([(statut, s) for _r, statut, s in resultats], duree),
+        "routes": {route: _resume(m, duree) for route, m in sorted(par_route.items())},
+        "duree": round(duree, 3),
+    }
+
+def _version_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(PROJECT_ROOT),
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _melange(texte):
+    melange = {}
+    for morceau in texte.split(","):
+        route, _, poids = morceau.partition("=")
+        route = route.strip()
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"route inconnue: {route} (choix: {', '.join(ROUTES)})")
+        try:
+            melange[route] = float(poids) if poids else 1.0
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"poids invalide: {morceau}")
+    if not any(melange.values()):
+        raise argparse.ArgumentTypeError("mélange vide")
+    return melange
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge hors ligne de l'API (débit, percentiles).")
+    parser.add_argument("--loterie", default="2", help=f"id parmi {', '.join(sorted(LOTERIES))}")
+    parser.add_argument("--melange", type=_melange, default="verifier=8,verifier-bloc=2,generer=1",
+                        help="poids par route (verifier, verifier-bloc, generer)")
+    parser.add_argument("--requetes", type=int, default=1000)
+    parser.add_argument("--duree", type=float, help="secondes max (coupe avant --requetes)")
+    parser.add_argument("--concurrence", type=int, default=8)
+    parser.add_argument("--echauffement", type=int, default=20, help="requêtes non comptées (chargement des caches)")
+    parser.add_argument("--graine", type=int, default=1)
+    parser.add_argument("--url", help="serveur déjà lancé (sinon gunicorn local)")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--journal", help="fichier pour la sortie de gunicorn")
+    parser.add_argument("--sortie", help="fichier JSON (défaut: stdout)")
+    args = parser.parse_args(argv)
+    if args.loterie not in LOTERIES:
+        parser.error(f"loterie inconnue: {args.loterie}")
+
+    print("Préparation des requêtes...", file=sys.stderr)
+    requetes = preparer_requetes(args.loterie, args.melange, args.echauffement + args.requetes, args.graine)
+    proc = None
+    url = args.url
+    try:
+        if url is None:
+            print(f"Démarrage de gunicorn ({args.workers} workers x {args.threads} threads)...", file=sys.stderr)
+            proc, url = demarrer_gunicorn(args.workers, args.threads, args.journal)
+        _executer(url, requetes[:args.echauffement], args.concurrence)
+        print(f"{args.requetes} requêtes, concurrence {args.concurrence} sur {url}...", file=sys.stderr)
+        resultats, duree = _executer(url, requetes[args.echauffement:], args.concurrence, args.duree)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    sortie = {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _version_git(),
+        "parametres": {
+            "loterie": args.loterie,
+            "melange": args.melange,
+            "requetes": args.requetes,
+            "duree_max": args.duree,
+            "concurrence": args.concurrence,
+            "echauffement": args.echauffement,
+            "graine": args.graine,
+            "serveur": args.url or f"gunicorn -w {args.workers} --threads {args.threads}",
+            "cpu": os.cpu_count(),
+        },
+        **rapport(resultats, duree),
+    }
+    texte = json.dumps(sortie, ensure_ascii=False, indent=2) + "\n"
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            f.write(texte)
+    else:
+        sys.stdout.write(texte)
+    return 1 if sortie["total"]["erreurs"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
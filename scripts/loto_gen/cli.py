@@ -0,0 +1,273 @@
+"""
+CLI non interactive (cron, traitements de gros fichiers), sans passer par HTTP.
+
+Les combinaisons sont lues ligne à ligne (fichier ou '-' pour stdin, une
+combinaison par ligne, séparateurs espaces/virgules/points-virgules, '*' en tête
+pour une étoile) et les résultats écrits au fil de l'eau, une ligne par
+résultat, en JSON lines (défaut) ou CSV. Même historique en cache/indexé que
+l'application web (contexte_loterie, masques d'historique).
+
+Usage (depuis la racine du projet):
+    python -m scripts.loto_gen.cli generate 2 --blocs 5 [--enregistrer]
+    python -m scripts.loto_gen.cli verify 2 tickets.txt --format csv
+    python -m scripts.loto_gen.cli verify-blocks 2 - < blocs.txt
+    python -m scripts.loto_gen.cli ingest [ids]
+    python -m scripts.loto_gen.cli analyse 2 [--tickets tickets.txt]
+"""
+import argparse
+import contextlib
+import csv
+import json
+import math
+import os
+import sys
+from array import array
+from itertools import islice
+
+import numpy as np
+
+from .generateur_ultra_plus import (
+    LOTERIES,
+    generer_par_blocs,
+    verifier_criteres,
+    verrou_proposes,
+)
+from .cache import contexte_loterie
+from .reservations import reservations_partagees
+from .criteres_vectorises import NOMS_CRITERES
+
+# Blocs vérifiés par passe numpy dans verify-blocks
+BLOCS_PAR_LOT = 500
+
+# --- Entrées / sorties ligne à ligne ---
+def lire_lignes(source):
+    """Itère (numero_ligne, numéros, etoile) des lignes non vides, sans tout charger."""
+    f = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        for no, ligne in enumerate(f, 1):
+            tokens = ligne.replace(",", " ").replace(";", " ").split()
+            if tokens:
+                yield no, [int(x) for x in tokens if x.isdigit()], not tokens[0].isdigit()
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def lire_combinaisons(source, taille):
+    """Itère (numero_ligne, combinaison triée, etoile); ignore les lignes invalides."""
+    for no, nums, etoile in lire_lignes(source):
+        if len(nums) == taille:
+            yield no, tuple(sorted(nums)), etoile
+        else:
+            print(f"ligne {no} ignorée ({len(nums)}/{taille} numéros)", file=sys.stderr)
+
+def erreur_combinaison(nums, cfg):
+    """Message d'erreur si nums n'est pas une combinaison valide de la loterie, sinon None."""
+    taille = cfg["nombre_numeros"]
+    debut, fin = cfg["plage_numeros"]
+    if len(nums) != taille:
+        return f"{len(nums)}/{taille} numéros"
+    if any(x < debut or x > fin for x in nums):
+        return f"numéros attendus entre {debut} et {fin}"
+    if len(set(nums)) != taille:
+        return "numéro répété"
+    return None
+
+class Sortie:
+    """Écrit des dicts en JSON lines ou en CSV (en-tête = clés du premier dict)."""
+
+    def __init__(self, chemin, fmt):
+        self.f = open(chemin, "w", encoding="utf-8", newline="") if chemin else sys.stdout
+        self.fmt = fmt
+        self._csv = None
+
+    def ecrire(self, ligne):
+        if self.fmt == "csv":
+            if self._csv is None:
+                self._csv = csv.DictWriter(self.f, fieldnames=list(ligne))
+                self._csv.writeheader()
+            self._csv.writerow({k: " ".join(map(str, v)) if isinstance(v, (list, tuple)) else v
+                                for k, v in ligne.items()})
+        else:
+            self.f.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+
+    def fermer(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+        else:
+            self.f.flush()
+
+# --- Sous-commandes ---
+def cmd_generate(args, sortie):
+    cfg = LOTERIES[args.loterie]
+    total = args.blocs * (cfg["par_bloc_base"] + 1)
+    stats = {}
+    with contextlib.redirect_stdout(sys.stderr):
+        combis, path = generer_par_blocs(cfg, total, delai=args.delai, stats=stats,
+                                         reservations=reservations_partagees())
+    for bloc, comb, etoile in combis:
+        sortie.ecrire({"bloc": bloc, "combinaison": list(comb), "etoile": etoile})
+    if args.enregistrer:
+        with verrou_proposes(path), open(path, "a", newline="") as f:
+            writer = csv.writer(f, delimiter=" ")
+            for _bloc, c, etoile in combis:
+                writer.writerow((["*"] + list(c)) if etoile else list(c))
+        print(f"Enregistrées dans : {path}", file=sys.stderr)
+    if stats.get("partiel"):
+        print("Résultat partiel (délai ou échec de génération)", file=sys.stderr)
+        return 3
+    return 0
+
+def cmd_verify(args, sortie):
+    cfg = LOTERIES[args.loterie]
+    ctx = contexte_loterie(cfg)
+    for no, comb, _etoile in lire_combinaisons(args.entree, cfg["nombre_numeros"]):
+        erreur = erreur_combinaison(comb, cfg)
+        audit = {} if erreur else verifier_criteres(list(comb), cfg, ctx["mediane"])[0]
+        ligne = {
+            "ligne": no,
+            "combinaison": list(comb),
+            "existe": comb in ctx["historique"],
+            "propose": comb in ctx["proposes"],
+            "valide": not erreur and all(audit[nom] for nom in NOMS_CRITERES),
+        }
+        # Mêmes colonnes pour une combinaison invalide (sortie CSV)
+        ligne.update({nom: audit.get(nom) for nom in NOMS_CRITERES})
+        ligne["erreur"] = erreur
+        sortie.ecrire(ligne)
+    return 0
+
+def cmd_verify_blocks(args, sortie):
+    from .verification_blocs import verifier_blocs
+
+    cfg = LOTERIES[args.loterie]
+    par_bloc = cfg["par_bloc_base"] + 1
+    # Blocs = par_bloc lignes non vides consécutives, même si une ligne est invalide:
+    # une ligne mal formée n'invalide que son bloc, sans décaler les suivants.
+    lignes = lire_lignes(args.entree)
+    # Lots de BLOCS_PAR_LOT blocs: mémoire bornée, une passe numpy par lot
+    numero = 0
+    invalides = 0
+    while True:
+        lot = list(islice(lignes, BLOCS_PAR_LOT * par_bloc))
+        if not lot:
+            break
+        if len(lot) % par_bloc:
+            print(f"{len(lot) % par_bloc} combinaison(s) en fin de fichier hors bloc complet, ignorée(s)",
+                  file=sys.stderr)
+            lot = lot[:len(lot) - len(lot) % par_bloc]
+            if not lot:
+                break
+        rapport = [None] * (len(lot) // par_bloc)
+        blocs = []
+        positions = []
+        for b in range(len(rapport)):
+            bloc = lot[b * par_bloc:(b + 1) * par_bloc]
+            erreurs = [f"ligne {no}: {err}" for no, nums, _etoile in bloc
+                       if (err := erreur_combinaison(nums, cfg))]
+            if erreurs:
+                # Mêmes colonnes qu'un bloc vérifié (sortie CSV)
+                rapport[b] = {
+                    "bloc": numero + b + 1, "valide": False, "criteres_ko": [], "doublons_base": [],
+                    "reutilises_etoile": None, "etoile_ok": None, "repetees": [], "historique": [],
+                    "proposees": [], "erreur": "; ".join(erreurs),
+                }
+            else:
+                blocs.append([nums for _no, nums, _etoile in bloc])
+                positions.append(b)
+        if blocs:
+            for b, r in zip(positions, verifier_blocs(cfg, blocs)["rapport"]):
+                r["bloc"] = numero + b + 1
+                r["erreur"] = None
+                rapport[b] = r
+        for r in rapport:
+            invalides += not r["valide"]
+            sortie.ecrire(r)
+        numero += len(rapport)
+    return 1 if invalides else 0
+
+def cmd_ingest(args, sortie):
+    import populate_loterie
+
+    for lid in args.loteries or list(LOTERIES):
+        config = populate_loterie.LOTERIES[lid]
+        with contextlib.redirect_stdout(sys.stderr):
+            populate_loterie.populate_loterie(config, args.ordre)
+        sortie.ecrire({"loterie": lid, "nom": config["nom"], "historique": config["hist_csv"],
+                       "chronologie": config["chrono_csv"]})
+    return 0
+
+def cmd_analyse(args, sortie):
+    cfg = LOTERIES[args.loterie]
+    if not args.tickets:
+        from .analyse_criteres import analyse_loterie
+        sortie.ecrire({"loterie": args.loterie, **analyse_loterie(cfg)})
+        return 0
+
+    from .analytique import masques_historique, distribution_correspondances
+    # Les tickets sont lus en flux et gardés seulement sous forme de masques (8 octets chacun)
+    props = array("Q")
+    for _no, comb, _etoile in lire_combinaisons(args.tickets, cfg["nombre_numeros"]):
+        m = 0
+        for x in comb:
+            m |= 1 << x
+        props.append(m)
+    data = distribution_correspondances(
+        masques_historique(cfg), np.frombuffer(props, dtype=np.uint64), cfg["nombre_numeros"]
+    )
+    sortie.ecrire({"loterie": args.loterie, **data})
+    return 0
+
+def main(argv=None):
+    ids = ", ".join(sorted(LOTERIES))
+    parser = argparse.ArgumentParser(prog="python -m scripts.loto_gen.cli", description="Traitements par lots.")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--sortie", help="fichier de sortie (défaut: stdout)")
+    sous = parser.add_subparsers(dest="commande", required=True)
+
+    p = sous.add_parser("generate", help="génère des blocs")
+    p.add_argument("loterie", help=f"id parmi {ids}")
+    p.add_argument("--blocs", type=int, default=1)
+    p.add_argument("--delai", type=float, help="secondes max")
+    p.add_argument("--enregistrer", action="store_true", help="ajoute aux proposés (comme le menu Gb)")
+    p.set_defaults(fonction=cmd_generate)
+
+    p = sous.add_parser("verify", help="vérifie des combinaisons (historique, proposés, critères)")
+    p.add_argument("loterie", help=f"id parmi {ids}")
+    p.add_argument("entree", nargs="?", default="-", help="fichier ou '-' (stdin)")
+    p.set_defaults(fonction=cmd_verify)
+
+    p = sous.add_parser("verify-blocks", help="vérifie des blocs (par_bloc_base + 1 lignes, étoile en dernier)")
+    p.add_argument("loterie", help=f"id parmi {ids}")
+    p.add_argument("entree", nargs="?", default="-", help="fichier ou '-' (stdin)")
+    p.set_defaults(fonction=cmd_verify_blocks)
+
+    p = sous.add_parser("ingest", help="relit tirages_*.txt et réécrit historiques/chronologie")
+    p.add_argument("loteries", nargs="*", help=f"ids parmi {ids} (défaut: toutes)")
+    p.add_argument("--ordre", choices=("C", "M"), default="C")
+    p.set_defaults(fonction=cmd_ingest)
+
+    p = sous.add_parser("analyse", help="taux des critères, ou backtest d'un fichier de tickets")
+    p.add_argument("loterie", help=f"id parmi {ids}")
+    p.add_argument("--tickets", help="fichier de tickets ('-' pour stdin)")
+    p.set_defaults(fonction=cmd_analyse)
+
+    args = parser.parse_args(argv)
+    delai = getattr(args, "delai", None)
+    if delai is not None and not (math.isfinite(delai) and delai > 0):
+        parser.error("--delai doit être un nombre de secondes > 0")
+    for lid in getattr(args, "loteries", None) or [getattr(args, "loterie", None)]:
+        if lid is not None and lid not in LOTERIES:
+            parser.error(f"loterie inconnue: {lid}")
+
+    sortie = Sortie(args.sortie, args.format)
+    try:
+        return args.fonction(args, sortie)
+    except BrokenPipeError:
+        # Sortie coupée par le lecteur (ex: | head): arrêt silencieux
+        sys.stdout = open(os.devnull, "w")
+        return 1
+    finally:
+        sortie.fermer()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Compactage des fichiers proposes_lot_*.csv et rapprochement avec l'historique.
+
+Le fichier des proposés ne fait que grandir (ajouts du menu Gb / de la CLI),
+avec des doublons et des combinaisons sorties depuis. Le compactage le réécrit:
+  - une ligne par combinaison (base puis étoiles '*', chacune triée), même
+    format qu'avant: charger_proposes / charger_proposes_avec_types et les
+    ajouts à la suite continuent de fonctionner sans changement;
+  - les combinaisons sorties depuis (historique daté, lots bonis compris) sont
+    marquées dans le fichier de métadonnées, et retirées du fichier avec
+    retirer_sorties (l'historique les exclut déjà de la génération);
+  - proposes_lot_*.meta.json garde les sorties et un journal des compactages
+    (lignes lues, ajoutées depuis le précédent, doublons supprimés...).
+
+Écriture atomique (fichier temporaire puis os.replace): un lecteur voit l'ancien
+ou le nouveau fichier, jamais un fichier partiel. Le compactage et les ajouts
+prennent le même verrou (verrou_proposes): aucun ajout ne se perd pendant la
+réécriture.
+
+Usage (depuis la racine du projet):
+    python -m scripts.loto_gen.compactage [ids] [--retirer-sorties] [--simulation]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from .generateur_ultra_plus import LOTERIES, get_proposes_path, charger_proposes_avec_types, verrou_proposes
+from .historique_dates import historique_dates
+
+# Entrées gardées dans le journal des compactages
+JOURNAL_MAX = 100
+
+def get_meta_path(cfg) -> str:
+    return str(Path(get_proposes_path(cfg)).with_suffix(".meta.json"))
+
+def _ecrire_atomique(path, texte):
+    """Écrit dans un fichier temporaire puis le renomme sur path."""
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(texte)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def _lire_meta(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _nb_lignes(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, newline="") as f:
+        return sum(1 for ligne in f if ligne.strip())
+
+def compacter(cfg, retirer_sorties=False, simulation=False):
+    """Compacte le fichier des proposés de la loterie; retourne le rapport (aussi journalisé)."""
+    path = get_proposes_path(cfg)
+    meta_path = get_meta_path(cfg)
+    taille = cfg["nombre_numeros"]
+    histo = historique_dates(cfg, bonis=True)
+
+    # Verrou tenu de la lecture au renommage: les ajouts attendent, puis écrivent dans le nouveau fichier
+    with verrou_proposes(path):
+        lues = _nb_lignes(path)
+        base, etoiles = charger_proposes_avec_types(path, taille)
+
+        sorties = []
+        for comb, etoile in [(c, False) for c in sorted(base)] + [(c, True) for c in sorted(etoiles)]:
+            positions = histo.par_combinaison.get(comb)
+            if positions:
+                sorties.append({
+                    "combinaison": list(comb),
+                    "etoile": etoile,
+                    "dates": [histo.dates[p] for p in positions],
+                })
+        if retirer_sorties:
+            for s in sorties:
+                (etoiles if s["etoile"] else base).discard(tuple(s["combinaison"]))
+
+        meta = _lire_meta(meta_path)
+        rapport = {
+            "compacte_le": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "lignes_lues": lues,
+            # Lignes ajoutées depuis le compactage précédent (le lot de propositions du moment)
+            "ajoutees": lues - meta.get("lignes", 0),
+            "lignes": len(base) + len(etoiles),
+            "supprimees": lues - len(base) - len(etoiles),
+            "sorties": len(sorties),
+            "sorties_retirees": len(sorties) if retirer_sorties else 0,
+        }
+        if simulation:
+            return rapport
+
+        lignes = [" ".join(map(str, c)) for c in sorted(base)]
+        lignes += ["* " + " ".join(map(str, c)) for c in sorted(etoiles)]
+        _ecrire_atomique(path, "".join(ligne + "\n" for ligne in lignes))
+
+        journal = (meta.get("journal", []) + [rapport])[-JOURNAL_MAX:]
+        _ecrire_atomique(meta_path, json.dumps({
+            "loterie": cfg["nom"],
+            "compacte_le": rapport["compacte_le"],
+            "lignes": rapport["lignes"],
+            "base": len(base),
+            "etoiles": len(etoiles),
+            "sorties": sorties,
+            "journal": journal,
+        }, ensure_ascii=False, indent=2) + "\n")
+    return rapport
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compacte les fichiers de proposés (dédoublonnage, sorties).")
+    parser.add_argument("loteries", nargs="*", help=f"ids parmi {', '.join(sorted(LOTERIES))} (défaut: toutes)")
+    parser.add_argument("--retirer-sorties", action="store_true",
+                        help="retire du fichier les combinaisons sorties depuis (gardées dans le .meta.json)")
+    parser.add_argument("--simulation", action="store_true", help="rapport seulement, rien n'est écrit")
+    args = parser.parse_args(argv)
+    inconnues = [lid for lid in args.loteries if lid not in LOTERIES]
+    if inconnues:
+        parser.error(f"loterie(s) inconnue(s): {', '.join(inconnues)}")
+
+    rapport = {}
+    for lid in args.loteries or list(LOTERIES):
+        cfg = LOTERIES[lid]
+        rapport[lid] = {"nom": cfg["nom"], "fichier": get_proposes_path(cfg),
+                        **compacter(cfg, args.retirer_sorties, args.simulation)}
+    sys.stdout.write(json.dumps(rapport, ensure_ascii=False, indent=2) + "\n")
+
+if __name__ == "__main__":
+    main()
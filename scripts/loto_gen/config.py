@@ -0,0 +1,167 @@
+"""
+Configuration des loteries, validée et compilée une fois au démarrage.
+
+La source reste le dict LOTERIES de generateur_ultra_plus; chaque entrée est
+transformée en ConfigLoterie: objet immuable (__slots__) qui se lit toujours
+comme le dict d'origine (cfg["nom"], cfg.get(...), {**cfg, ...}) mais porte les
+tables précalculées des critères (bitsets de comptes valides, masques de bits
+par dizaine / finale / multiple), pour que les tests ne refassent aucun travail
+de dictionnaire dans les boucles chaudes.
+"""
+from collections.abc import Mapping
+from types import MappingProxyType
+
+CLES_REQUISES = (
+    "nom", "historique", "nombre_numeros", "plage_numeros",
+    "pair_impair_valides", "petit_grand_valides", "groupes_dizaines",
+    "fin_identique_max", "min_finales", "max_par_multi",
+    "somme_min", "somme_max", "par_bloc_base", "reutilises_dans_etoile",
+)
+
+MULTIPLICATEURS = range(2, 10)
+
+def _masque(nums):
+    m = 0
+    for x in nums:
+        m |= 1 << x
+    return m
+
+def _bitset_comptes(paires, taille, cle, nom):
+    """[(a, b), ...] -> bitset des 'a' admis; chaque paire doit sommer à la taille."""
+    bits = 0
+    for a, b in paires:
+        if a < 0 or b < 0 or a + b != taille:
+            raise ValueError(f"Loterie {nom}: {cle} contient ({a}, {b}) qui ne somme pas à {taille}")
+        bits |= 1 << a
+    return bits
+
+class ConfigLoterie(Mapping):
+    __slots__ = (
+        "_valeurs", "nom", "taille", "debut", "fin", "somme_min", "somme_max",
+        "parite_ok", "petit_ok", "cap_dizaines", "fin_max", "min_finales", "max_multi",
+        "masque_pairs", "masques_dizaines", "masques_finales", "masques_multiples",
+    )
+
+    def __init__(self, valeurs):
+        manquantes = [c for c in CLES_REQUISES if c not in valeurs]
+        nom = valeurs.get("nom", "?")
+        if manquantes:
+            raise ValueError(f"Loterie {nom}: clé(s) manquante(s): {', '.join(manquantes)}")
+        taille = int(valeurs["nombre_numeros"])
+        debut, fin = (int(x) for x in valeurs["plage_numeros"])
+        if not 1 <= debut <= fin <= 63 or fin - debut + 1 < taille or taille < 1:
+            raise ValueError(f"Loterie {nom}: plage {debut}-{fin} incompatible avec {taille} numéros")
+        if valeurs["somme_min"] > valeurs["somme_max"]:
+            raise ValueError(f"Loterie {nom}: somme_min > somme_max")
+        if valeurs["reutilises_dans_etoile"] > taille:
+            raise ValueError(f"Loterie {nom}: reutilises_dans_etoile > nombre_numeros")
+
+        pose = object.__setattr__
+        pose(self, "_valeurs", MappingProxyType(dict(valeurs)))
+        pose(self, "nom", nom)
+        pose(self, "taille", taille)
+        pose(self, "debut", debut)
+        pose(self, "fin", fin)
+        pose(self, "somme_min", int(valeurs["somme_min"]))
+        pose(self, "somme_max", int(valeurs["somme_max"]))
+        pose(self, "parite_ok", _bitset_comptes(valeurs["pair_impair_valides"], taille, "pair_impair_valides", nom))
+        pose(self, "petit_ok", _bitset_comptes(valeurs["petit_grand_valides"], taille, "petit_grand_valides", nom))
+        pose(self, "cap_dizaines", int(valeurs["groupes_dizaines"]))
+        pose(self, "fin_max", int(valeurs["fin_identique_max"]))
+        pose(self, "min_finales", int(valeurs["min_finales"]))
+        pose(self, "max_multi", int(valeurs["max_par_multi"]))
+        numeros = range(debut, fin + 1)
+        pose(self, "masque_pairs", _masque(x for x in numeros if x % 2 == 0))
+        pose(self, "masques_dizaines", tuple(
+            _masque(x for x in range(1, fin + 1) if (x - 1) // 10 == g) for g in range((fin + 9) // 10)
+        ))
+        pose(self, "masques_finales", tuple(
+            m for m in (_masque(x for x in numeros if x % 10 == d) for d in range(10)) if m
+        ))
+        pose(self, "masques_multiples", tuple(_masque(x for x in numeros if x % m == 0) for m in MULTIPLICATEURS))
+
+    def __setattr__(self, nom, valeur):
+        raise AttributeError("ConfigLoterie est immuable")
+
+    # --- Lecture comme le dict d'origine ---
+    def __getitem__(self, cle):
+        return self._valeurs[cle]
+
+    def __iter__(self):
+        return iter(self._valeurs)
+
+    def __len__(self):
+        return len(self._valeurs)
+
+    def __repr__(self):
+        return f"ConfigLoterie({dict(self._valeurs)!r})"
+
+    # --- Combinaison saisie (API, fichiers) ---
+    def combinaison(self, nums):
+        """Tuple trié de nums; ValueError si ce ne sont pas 'taille' entiers distincts de la plage."""
+        try:
+            comb = tuple(sorted(int(x) for x in nums))
+        except (TypeError, ValueError):
+            raise ValueError("Combinaison invalide: liste d'entiers attendue")
+        if len(comb) != self.taille or len(set(comb)) != self.taille or comb[0] < self.debut or comb[-1] > self.fin:
+            raise ValueError(
+                f"Chaque combinaison doit avoir {self.taille} numéros distincts entre {self.debut} et {self.fin}"
+            )
+        return comb
+
+    # --- Critères sur le masque de bits d'une combinaison ---
+    def pair_impair(self, m):
+        return bool(self.parite_ok >> (m & self.masque_pairs).bit_count() & 1)
+
+    def petit_grand(self, m, mediane):
+        return bool(self.petit_ok >> (m & ((2 << mediane) - 1)).bit_count() & 1)
+
+    @staticmethod
+    def series(m):
+        # adj: bit x si x et x+1 sont tirés; une série = une suite de bits de adj
+        adj = m & (m >> 1)
+        if adj & (adj >> 1) & (adj >> 2):
+            return False  # série de 4 numéros ou plus
+        return (adj & ~(adj << 1)).bit_count() <= 2
+
+    def dizaines(self, m):
+        cap = self.cap_dizaines
+        return all((m & d).bit_count() <= cap for d in self.masques_dizaines)
+
+    def fin_identique(self, m):
+        cap = self.fin_max
+        return all((m & f).bit_count() <= cap for f in self.masques_finales)
+
+    def diversite_finales(self, m):
+        return sum(1 for f in self.masques_finales if m & f) >= self.min_finales
+
+    def symboliques(self, m, max_par_multi=None):
+        cap = self.max_multi if max_par_multi is None else max_par_multi
+        return all((m & mm).bit_count() <= cap for mm in self.masques_multiples)
+
+    def somme(self, comb):
+        return self.somme_min <= sum(comb) <= self.somme_max
+
+    def passe(self, comb, mediane):
+        """Tous les critères de verifier_criteres (combinaison sans doublon)."""
+        m = 0
+        for x in comb:
+            m |= 1 << x
+        return (
+            self.pair_impair(m)
+            and self.petit_grand(m, mediane)
+            and self.series(m)
+            and self.dizaines(m)
+            and self.fin_identique(m)
+            and self.diversite_finales(m)
+            and self.symboliques(m)
+            and self.somme(comb)
+        )
+
+def compiler(cfg):
+    """Dict de loterie (ou ConfigLoterie déjà compilée) -> ConfigLoterie validée."""
+    return cfg if isinstance(cfg, ConfigLoterie) else ConfigLoterie(cfg)
+
+def compiler_loteries(loteries):
+    """Valide et compile toutes les loteries; ValueError dès le démarrage si l'une est incohérente."""
+    return MappingProxyType({lid: compiler(cfg) for lid, cfg in loteries.items()})
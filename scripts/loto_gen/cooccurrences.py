@@ -0,0 +1,280 @@
+"""
+Co-occurrences de paires et de triplets dans l'historique.
+
+- paires: matrice (N+1, N+1) symétrique, paires[a, b] = nb de tirages contenant a et b
+  (diagonale = fréquence du numéro);
+- triplets: tableau 1D "compact" indexé par le rang colex du triplet a < b < c
+  (C(N+1, 3) cases, ~21k pour Lotto Max), triplets[rang] = nb de tirages.
+
+Les comptes sont calculés avec numpy à partir de l'historique daté (tous les
+tirages, lots bonis compris), enregistrés dans data/cooccurrences_*.npz à côté
+de l'historique, puis complétés avec les seuls nouveaux tirages quand la
+chronologie grandit.
+
+Recalcul complet en ligne de commande:
+    python -m scripts.loto_gen.cooccurrences [ids]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+
+from .generateur_ultra_plus import LOTERIES, get_chronologie_path
+from .historique_dates import historique_dates
+
+def get_cooccurrences_path(cfg) -> str:
+    chrono = Path(get_chronologie_path(cfg))
+    return str(chrono.with_name(chrono.name.replace('chronologie_', 'cooccurrences_', 1)).with_suffix('.npz'))
+
+def rangs_triplets(t):
+    """Rang colex de triplets triés (tableau (..., 3)) de numéros >= 1."""
+    a, b, c = t[..., 0].astype(np.int64), t[..., 1].astype(np.int64), t[..., 2].astype(np.int64)
+    return a + b * (b - 1) // 2 + c * (c - 1) * (c - 2) // 6
+
+def _taille_triplets(plage_max):
+    n = plage_max + 1
+    return n * (n - 1) * (n - 2) // 6
+
+# --- Comptes ---
+class Cooccurrences:
+    def __init__(self, plage_max, taille):
+        self.plage_max = plage_max
+        self.taille = taille
+        self.paires = np.zeros((plage_max + 1, plage_max + 1), dtype=np.int32)
+        self.triplets = np.zeros(_taille_triplets(plage_max), dtype=np.int32)
+        self.tirages = 0
+        self.dernier = ()   # dernier tirage compté (contrôle de continuité)
+        self._idx3 = np.array(list(combinations(range(taille), 3)), dtype=np.int64).reshape(-1, 3)
+
+    def ajouter(self, tirages):
+        """Ajoute des tirages (combinaisons triées) aux comptes, en une passe numpy."""
+        if not len(tirages):
+            return
+        arr = np.asarray(tirages, dtype=np.int64).reshape(len(tirages), self.taille)
+        un = np.zeros((len(arr), self.plage_max + 1), dtype=np.int32)
+        np.put_along_axis(un, arr, 1, axis=1)
+        self.paires += un.T @ un
+        self.triplets += np.bincount(
+            rangs_triplets(arr[:, self._idx3]).ravel(), minlength=len(self.triplets)
+        ).astype(np.int32)
+        self.tirages += len(arr)
+        self.dernier = tuple(int(x) for x in arr[-1])
+
+    # --- Requêtes ---
+    def paire(self, a, b):
+        return int(self.paires[a, b])
+
+    def triplet(self, a, b, c):
+        return int(self.triplets[rangs_triplets(np.array(sorted((a, b, c))))])
+
+    def top_paires(self, n=20, numero=None):
+        if numero is not None:
+            ligne = self.paires[numero].copy()
+            ligne[numero] = -1
+            ligne[0] = -1
+            ordre = np.argsort(-ligne, kind="stable")[:n]
+            return [{"paire": sorted((numero, int(b))), "tirages": int(ligne[b])} for b in ordre]
+        haut = np.triu(self.paires, k=1)
+        plat = np.argsort(-haut, axis=None, kind="stable")[:n]
+        return [
+            {"paire": [int(a), int(b)], "tirages": int(haut[a, b])}
+            for a, b in zip(*np.unravel_index(plat, haut.shape))
+        ]
+
+    def top_triplets(self, n=20, numeros=()):
+        numeros = sorted(set(numeros))
+        if len(numeros) == 3:
+            return [{"triplet": numeros, "tirages": self.triplet(*numeros)}]
+        # Tous les triplets (petit: ~21k), filtrés sur les numéros imposés
+        tous = np.array(list(combinations(range(1, self.plage_max + 1), 3)), dtype=np.int64)
+        for x in numeros:
+            tous = tous[(tous == x).any(axis=1)]
+        comptes = self.triplets[rangs_triplets(tous)]
+        ordre = np.argsort(-comptes, kind="stable")[:n]
+        return [{"triplet": [int(x) for x in tous[i]], "tirages": int(comptes[i])} for i in ordre]
+
+    # --- Persistance ---
+    def enregistrer(self, path):
+        # Un fichier temporaire par processus: deux workers peuvent réécrire en même temps
+        tmp = f"{path}.tmp{os.getpid()}.npz"
+        try:
+            np.savez(tmp, paires=self.paires, triplets=self.triplets,
+                     tirages=np.int64(self.tirages), dernier=np.array(self.dernier, dtype=np.int16))
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+
+    @classmethod
+    def charger(cls, path, plage_max, taille):
+        co = cls(plage_max, taille)
+        with np.load(path) as f:
+            if f["paires"].shape != co.paires.shape or f["triplets"].shape != co.triplets.shape:
+                raise ValueError("Fichier de co-occurrences d'une autre plage")
+            co.paires = f["paires"].astype(np.int32)
+            co.triplets = f["triplets"].astype(np.int32)
+            co.tirages = int(f["tirages"])
+            co.dernier = tuple(int(x) for x in f["dernier"])
+        return co
+
+# --- Comptes de la loterie, tenus à jour avec l'historique daté ---
+_cooc = {}
+_cooc_lock = threading.Lock()
+
+def _a_jour(co, histo):
+    """Le fichier est-il un préfixe de l'historique courant ?"""
+    n = co.tirages
+    return n <= len(histo) and (n == 0 or histo.tirages[n - 1] == co.dernier)
+
+def cooccurrences(cfg, recalculer=False):
+    """
+    Comptes de co-occurrence de la loterie: chargés depuis le .npz si celui-ci
+    correspond au début de l'historique, complétés avec les nouveaux tirages,
+    sinon recalculés entièrement. Le .npz est réécrit après chaque mise à jour.
+    """
+    histo = historique_dates(cfg, bonis=True)
+    plage_max, taille = cfg["plage_numeros"][1], cfg["nombre_numeros"]
+    ent = _cooc.get(cfg["nom"])
+    if not recalculer and ent is not None and ent[0] is histo and ent[1].tirages == len(histo):
+        return ent[1]
+
+    with _cooc_lock:
+        ent = _cooc.get(cfg["nom"])
+        if not recalculer and ent is not None and ent[0] is histo and ent[1].tirages == len(histo):
+            return ent[1]
+        path = get_cooccurrences_path(cfg)
+        co = ent[1] if ent is not None and not recalculer else None
+        if co is None and not recalculer and os.path.exists(path):
+            try:
+                co = Cooccurrences.charger(path, plage_max, taille)
+            except Exception:
+                # Fichier illisible (tronqué, zip corrompu, autre format): recalcul
+                co = None
+        if co is None or not _a_jour(co, histo):
+            co = Cooccurrences(plage_max, taille)
+        if co.tirages < len(histo) or recalculer:
+            co.ajouter(histo.tirages[co.tirages:])
+            try:
+                co.enregistrer(path)
+            except OSError:
+                pass  # disque en lecture seule: les comptes restent en mémoire
+        _cooc[cfg["nom"]] = (histo, co)
+        return co
+
+# --- Préférence optionnelle du générateur: score de paires historiques ---
+# Après le premier candidat valide, on cherche encore au plus FACTEUR_RECHERCHE fois plus longtemps
+FACTEUR_RECHERCHE = 4
+
+class FiltrePaires:
+    """
+    Score d'une combinaison = somme des co-occurrences historiques de ses paires.
+    mode 'eviter': score bas préféré; 'favoriser': score haut préféré. Le seuil
+    est le quantile demandé des scores des vrais tirages (calculé une fois).
+
+    Le score classe les candidats valides, il ne les élimine pas: une position
+    presque imposée (fin de base, étoile) n'a souvent aucun candidat au-delà du
+    seuil. Voir ChoixPaires.
+    """
+
+    def __init__(self, co, tirages, mode="eviter", quantile=0.5):
+        if mode not in ("eviter", "favoriser"):
+            raise ValueError("score_paires.mode doit être 'eviter' ou 'favoriser'")
+        if isinstance(quantile, bool) or not isinstance(quantile, (int, float)) or not 0 <= quantile <= 1:
+            raise ValueError("score_paires.quantile doit être un nombre entre 0 et 1")
+        self.mode = mode
+        self.paires = co.paires.astype(np.int64)
+        self._table = self.paires.tolist()
+        self._i, self._j = np.triu_indices(co.taille, k=1)
+        scores = self.scores(tirages) if len(tirages) else np.zeros(1)
+        self.seuil = float(np.quantile(scores, quantile))
+
+    def scores(self, lignes):
+        lignes = np.asarray(lignes, dtype=np.int64)
+        return self.paires[lignes[:, self._i], lignes[:, self._j]].sum(axis=1)
+
+    def score(self, cand):
+        t = self._table
+        s = 0
+        for x, a in enumerate(cand):
+            ligne = t[a]
+            for b in cand[x + 1:]:
+                s += ligne[b]
+        return s
+
+    def atteint(self, s):
+        return s <= self.seuil if self.mode == "eviter" else s >= self.seuil
+
+    def __call__(self, cand):
+        return self.atteint(self.score(cand))
+
+    def choix(self):
+        return ChoixPaires(self)
+
+class ChoixPaires:
+    """
+    Meilleur candidat valide d'une recherche (une position de la base, ou l'étoile).
+    Un candidat qui atteint le seuil arrête la recherche; sinon on garde le mieux
+    classé, et on s'arrête après FACTEUR_RECHERCHE fois les tirages qu'il a fallu
+    pour trouver le premier valide.
+    """
+    __slots__ = ("filtre", "cand", "_preference", "_limite")
+
+    def __init__(self, filtre):
+        self.filtre = filtre
+        self.cand = None
+        self._preference = None
+        self._limite = None
+
+    def proposer(self, cand, essais):
+        """cand valide, trouvé après 'essais' tirages; True = arrêter la recherche (garder self.cand)."""
+        s = self.filtre.score(cand)
+        if self.filtre.atteint(s):
+            self.cand = cand
+            return True
+        preference = -s if self.filtre.mode == "eviter" else s
+        if self.cand is None or preference > self._preference:
+            self.cand = cand
+            self._preference = preference
+        if self._limite is None:
+            self._limite = essais * FACTEUR_RECHERCHE
+        return essais >= self._limite
+
+def filtre_paires(cfg):
+    """FiltrePaires selon cfg['score_paires'] ({'mode', 'quantile'}), None si désactivé."""
+    reglage = cfg.get("score_paires")
+    if not reglage:
+        return None
+    co = cooccurrences(cfg)
+    tirages = historique_dates(cfg, bonis=True).tirages[:co.tirages]
+    return FiltrePaires(co, tirages, reglage.get("mode", "eviter"), reglage.get("quantile", 0.5))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recalcule les co-occurrences de paires/triplets.")
+    parser.add_argument("loteries", nargs="*", help=f"ids parmi {', '.join(sorted(LOTERIES))} (défaut: toutes)")
+    args = parser.parse_args(argv)
+    inconnues = [lid for lid in args.loteries if lid not in LOTERIES]
+    if inconnues:
+        parser.error(f"loterie(s) inconnue(s): {', '.join(inconnues)}")
+
+    rapport = {}
+    for lid in args.loteries or list(LOTERIES):
+        cfg = LOTERIES[lid]
+        co = cooccurrences(cfg, recalculer=True)
+        rapport[lid] = {
+            "nom": cfg["nom"],
+            "tirages": co.tirages,
+            "fichier": get_cooccurrences_path(cfg),
+            "top_paires": co.top_paires(5),
+            "top_triplets": co.top_triplets(5),
+        }
+    sys.stdout.write(json.dumps(rapport, ensure_ascii=False, indent=2) + "\n")
+
+if __name__ == "__main__":
+    main()
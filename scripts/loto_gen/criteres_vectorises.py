@@ -0,0 +1,78 @@
+import numpy as np
+
+# --- Mêmes critères que verifier_criteres, évalués sur un tableau (n, taille) trié par ligne ---
+# Les noms sont ceux des clés de verifier_criteres pour pouvoir comparer les deux.
+NOMS_CRITERES = (
+    "Pair/Impair",
+    "Petit/Grand",
+    "Séries",
+    "Dizaines",
+    "Somme",
+    "Fin identique",
+    "Diversité finales",
+    "Symboliques",
+)
+
+def tableau(combinaisons, taille):
+    """Liste de combinaisons -> tableau int16 (n, taille) trié par ligne."""
+    if not len(combinaisons):
+        return np.zeros((0, taille), dtype=np.int16)
+    arr = np.asarray(combinaisons, dtype=np.int16).reshape(-1, taille)
+    return np.sort(arr, axis=1)
+
+def _comptes_valides(paires, taille):
+    """[(a, b), ...] -> valeurs de 'a' admises (b = taille - a)."""
+    return np.array([a for a, b in paires if a + b == taille], dtype=np.int16)
+
+def evaluer_criteres(arr, cfg, mediane=25):
+    """Retourne {nom_critere: tableau bool (n,)} pour toutes les lignes de arr."""
+    taille = arr.shape[1]
+    fin = cfg["plage_numeros"][1]
+
+    pairs = (arr % 2 == 0).sum(axis=1)
+    petits = (arr <= mediane).sum(axis=1)
+
+    # Séries: au plus 2 séries, aucune de 4 numéros ou plus (3 écarts de 1 d'affilée)
+    consec = np.diff(arr, axis=1) == 1
+    debuts = consec.copy()
+    debuts[:, 1:] &= ~consec[:, :-1]
+    quatuor = (consec[:, :-2] & consec[:, 1:-1] & consec[:, 2:]).any(axis=1) if taille >= 4 else np.zeros(len(arr), dtype=bool)
+    series_ok = (debuts.sum(axis=1) <= 2) & ~quatuor
+
+    dizaines = (arr - 1) // 10
+    dizaines_ok = np.ones(len(arr), dtype=bool)
+    for g in range((fin + 9) // 10):
+        dizaines_ok &= (dizaines == g).sum(axis=1) <= cfg["groupes_dizaines"]
+
+    sommes = arr.sum(axis=1)
+
+    finales = arr % 10
+    fin_ok = np.ones(len(arr), dtype=bool)
+    nb_finales = np.zeros(len(arr), dtype=np.int16)
+    for d in range(10):
+        c = (finales == d).sum(axis=1)
+        fin_ok &= c <= cfg["fin_identique_max"]
+        nb_finales += c > 0
+
+    symb_ok = np.ones(len(arr), dtype=bool)
+    for m in range(2, 10):
+        symb_ok &= (arr % m == 0).sum(axis=1) <= cfg["max_par_multi"]
+
+    return {
+        "Pair/Impair": np.isin(pairs, _comptes_valides(cfg["pair_impair_valides"], taille)),
+        "Petit/Grand": np.isin(petits, _comptes_valides(cfg["petit_grand_valides"], taille)),
+        "Séries": series_ok,
+        "Dizaines": dizaines_ok,
+        "Somme": (sommes >= cfg["somme_min"]) & (sommes <= cfg["somme_max"]),
+        "Fin identique": fin_ok,
+        "Diversité finales": nb_finales >= cfg["min_finales"],
+        "Symboliques": symb_ok,
+    }
+
+def tous_criteres(arr, cfg, mediane=25):
+    """Masque bool (n,): la ligne respecte tous les critères."""
+    res = evaluer_criteres(arr, cfg, mediane)
+    ok = np.ones(len(arr), dtype=bool)
+    for v in res.values():
+        ok &= v
+    return ok
@@ -0,0 +1,136 @@
+import gzip
+import json
+import struct
+import sys
+from array import array
+
+from .resultats import BlocsGeneres
+
+# MessagePack est optionnel: sans le paquet, le format n'est simplement pas proposé
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    msgpack = None
+
+# --- Formats de réponse proposés aux clients "bulk" ---
+MIME_JSON = "application/json"
+MIME_COLONNES = "application/vnd.loto.colonnes+json"
+MIME_BINAIRE = "application/vnd.loto.binaire"
+MIME_MSGPACK = "application/msgpack"
+
+FORMATS = {
+    "json": MIME_JSON,
+    "colonnes": MIME_COLONNES,
+    "binaire": MIME_BINAIRE,
+    "msgpack": MIME_MSGPACK,
+}
+
+# En-tête du format binaire: magic, version, taille d'une combinaison, nb de combinaisons
+ENTETE_BINAIRE = struct.Struct("<4sBBI")
+MAGIC_GENERATION = b"LOTO"
+VERSION_BINAIRE = 1
+
+# En dessous de ce nombre d'octets, gzip coûte plus qu'il ne rapporte
+GZIP_SEUIL = 1024
+
+def negocier_format(param, accept_mimetypes, disponibles):
+    """
+    Choisit le format de sortie: ?format=... en priorité, sinon l'en-tête Accept.
+    Retourne le nom du format, ou None si le format demandé n'est pas disponible.
+    """
+    if msgpack is None:
+        disponibles = [f for f in disponibles if f != "msgpack"]
+    if param:
+        param = param.strip().lower()
+        return param if param in disponibles else None
+    mimes = [FORMATS[f] for f in disponibles]
+    meilleur = accept_mimetypes.best_match(mimes, default=MIME_JSON) if accept_mimetypes else MIME_JSON
+    for nom in disponibles:
+        if FORMATS[nom] == meilleur:
+            return nom
+    return "json"
+
+# --- Génération: colonnes parallèles ---
+def generation_en_colonnes(data):
+    """[{bloc, combinaison, etoile}, ...] ou BlocsGeneres -> {bloc: [...], combinaison: [...], etoile: [...]}"""
+    if isinstance(data, BlocsGeneres):
+        return data.en_colonnes()
+    return {
+        "bloc": [d["bloc"] for d in data],
+        "combinaison": [list(d["combinaison"]) for d in data],
+        "etoile": [bool(d["etoile"]) for d in data],
+    }
+
+# --- Génération: binaire compact ---
+def generation_en_binaire(data, taille):
+    """
+    Disposition (little-endian):
+      en-tête  "LOTO" | version u8 | taille u8 | n u32
+      blocs    n x u16
+      numéros  n x taille x u8
+      étoiles  bitmap ceil(n/8) octets (bit i%8 de l'octet i//8 = combinaison i étoile)
+    """
+    n = len(data)
+    if isinstance(data, BlocsGeneres):
+        # Les tampons du conteneur sont déjà dans la bonne disposition
+        etoiles = bytearray((n + 7) // 8)
+        for i in range(n):
+            if data.etoiles[i]:
+                etoiles[i >> 3] |= 1 << (i & 7)
+        return b"".join((
+            ENTETE_BINAIRE.pack(MAGIC_GENERATION, VERSION_BINAIRE, taille, n),
+            data.blocs_octets(),
+            bytes(data.numeros),
+            bytes(etoiles),
+        ))
+    blocs = array("H", (d["bloc"] for d in data))
+    if sys.byteorder == "big":
+        blocs.byteswap()
+    numeros = bytearray(n * taille)
+    etoiles = bytearray((n + 7) // 8)
+    for i, d in enumerate(data):
+        numeros[i * taille:(i + 1) * taille] = bytes(d["combinaison"])
+        if d["etoile"]:
+            etoiles[i >> 3] |= 1 << (i & 7)
+    return b"".join((
+        ENTETE_BINAIRE.pack(MAGIC_GENERATION, VERSION_BINAIRE, taille, n),
+        blocs.tobytes(),
+        bytes(numeros),
+        bytes(etoiles),
+    ))
+
+# --- Génération: JSON sans passer par les dicts ---
+def generation_en_json(payload):
+    """
+    payload {"data": BlocsGeneres, ...} -> corps JSON identique à jsonify (clés triées,
+    compact, ASCII, '\n' final), la liste étant écrite directement depuis les tampons.
+    """
+    reste = json.dumps({k: v for k, v in payload.items() if k != "data"}, sort_keys=True, separators=(",", ":"))
+    corps = '{"data":' + payload["data"].en_json() + ("," + reste[1:] if reste != "{}" else "}")
+    return (corps + "\n").encode("utf-8")
+
+# --- Vérification: détails en colonnes ---
+def verification_en_colonnes(data):
+    """Remplace la liste d'audits 'details' par un dict critère -> liste de valeurs."""
+    details = data.get("details") or []
+    colonnes = {}
+    for audit in details:
+        for cle, val in audit.items():
+            colonnes.setdefault(cle, []).append(list(val) if cle == "Combinaison" else val)
+    return {**data, "details": colonnes}
+
+# --- Encodage final ---
+def encoder(payload, fmt):
+    """Retourne (octets, mimetype) pour un payload déjà mis en forme."""
+    if fmt == "binaire":
+        return payload, MIME_BINAIRE
+    if fmt == "msgpack":
+        return msgpack.packb(payload, use_bin_type=True), MIME_MSGPACK
+    corps = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return corps.encode("utf-8"), FORMATS.get(fmt, MIME_JSON)
+
+def compresser(corps, accept_encoding):
+    """gzip si le client l'accepte et que le corps est assez gros. Retourne (octets, encodage|None)."""
+    if len(corps) < GZIP_SEUIL or not accept_encoding or "gzip" not in accept_encoding:
+        return corps, None
+    return gzip.compress(corps, compresslevel=5), "gzip"
@@ -3,11 +3,28 @@ import sys
 import csv
 import json
 import random
+import time
 import unicodedata
 from collections import Counter
-from math import ceil
+from contextlib import contextmanager
+from itertools import combinations
+from math import ceil, comb as binomial, isfinite
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows: pas de flock, ajouts et compactage non coordonnés
+    fcntl = None
+
+try:
+    from .config import ConfigLoterie, compiler, compiler_loteries
+    from .reservations import reservations_partagees
+    from .resultats import BlocsGeneres
+except ImportError:  # exécuté comme script: python generateur_ultra_plus.py
+    from config import ConfigLoterie, compiler, compiler_loteries
+    from reservations import reservations_partagees
+    from resultats import BlocsGeneres
+
 # --- Utilitaire pour extraire une ligne de tirage (si CSV colonnes) ---
 def extraire_tirage(row):
     return sorted(int(v) for v in row.values() if v and str(v).isdigit())
@@ -16,6 +33,7 @@ def extraire_tirage(row):
 LOTERIES = {
     "1": {
         "nom": "Grande Vie",
+        "tirages": "tirages_grande_vie.txt",
         "historique": "historiques_grande_vie.csv",
         "nombre_numeros": 5,
         "plage_numeros": (1, 49),
@@ -28,10 +46,14 @@ LOTERIES = {
         "somme_min": 80,
         "somme_max": 179,
         "par_bloc_base": 9,
-        "reutilises_dans_etoile": 1
+        "reutilises_dans_etoile": 1,
+        "generation_vectorisee": False,
+        "score_paires": None,  # ex: {"mode": "eviter", "quantile": 0.5} (cooccurrences.FiltrePaires)
+        "ponderation": None  # ex: {"schema": "chaud", "derniers": 100, "force": 1.0} (tirage_pondere)
     },
     "2": {
         "nom": "Lotto Max",
+        "tirages": "tirages_lotto_max.txt",
         "historique": "historiques_lotto_max.csv",
         "nombre_numeros": 7,
         "plage_numeros": (1, 50),
@@ -44,10 +66,14 @@ LOTERIES = {
         "somme_min": 140,
         "somme_max": 219,
         "par_bloc_base": 7,
-        "reutilises_dans_etoile": 6
+        "reutilises_dans_etoile": 6,
+        "generation_vectorisee": False,
+        "score_paires": None,  # ex: {"mode": "eviter", "quantile": 0.5} (cooccurrences.FiltrePaires)
+        "ponderation": None  # ex: {"schema": "chaud", "derniers": 100, "force": 1.0} (tirage_pondere)
     },
     "3": {
         "nom": "649",
+        "tirages": "tirages_649.txt",
         "historique": "historiques_649.csv",
         "nombre_numeros": 6,
         "plage_numeros": (1, 49),
@@ -60,10 +86,16 @@ LOTERIES = {
         "somme_min": 100,
         "somme_max": 199,
         "par_bloc_base": 8,
-        "reutilises_dans_etoile": 5
+        "reutilises_dans_etoile": 5,
+        "generation_vectorisee": False,
+        "score_paires": None,  # ex: {"mode": "eviter", "quantile": 0.5} (cooccurrences.FiltrePaires)
+        "ponderation": None  # ex: {"schema": "chaud", "derniers": 100, "force": 1.0} (tirage_pondere)
     }
 }
 
+# Source unique: validée et compilée au chargement du module (voir config.py)
+LOTERIES = compiler_loteries(LOTERIES)
+
 # --- Dossiers de données (prod-safe Render + compat lecture) ---
 import os, unicodedata
 from pathlib import Path
@@ -106,6 +138,13 @@ def get_historique_path(cfg) -> str:
     p2 = DATA_DIR_SCRIPTS / name
     return str(p2) if p2.exists() else str(p1)  # défaut: racine
 
+def get_chronologie_path(cfg) -> str:
+    """
+    Tirages datés (chronologie_*.csv écrit par populate_loterie), à côté de l'historique
+    """
+    histo = Path(get_historique_path(cfg))
+    return str(histo.with_name(histo.name.replace('historiques_', 'chronologie_', 1)))
+
 def get_proposes_path(cfg) -> str:
     """
     Écriture : toujours dans DATA_DIR_ROOT (configurable par $DATA_DIR)
@@ -113,6 +152,23 @@ def get_proposes_path(cfg) -> str:
     slug = _slugify(cfg['nom'])
     return str(DATA_DIR_ROOT / f"proposes_lot_{slug}.csv")
 
+@contextmanager
+def verrou_proposes(path):
+    """
+    Verrou exclusif sur le fichier des proposés (flock sur path + '.lock').
+    Pris par les ajouts et par le compactage: un ajout ne peut pas se perdre
+    dans un fichier en cours de réécriture.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", "a") as verrou:
+        if fcntl is not None:
+            fcntl.flock(verrou.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(verrou.fileno(), fcntl.LOCK_UN)
+
 # --- Chargements (historique SANS calcul de sommes) ---
 def charger_historique(path, n):
     historique = set()
@@ -173,53 +229,51 @@ def charger_proposes_avec_types(path, n):
                 (star if is_star else base).add(t)
     return base, star
 
+def calculer_mediane(path, n):
+    """Médiane de tous les numéros tirés (pour Petit/Grand), 25 si pas d'historique."""
+    tous = []
+    if os.path.exists(path):
+        with open(path, newline='') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                parts = line.split()
+                tir = [int(x) for x in parts if x.isdigit()]
+                if len(tir) == n:
+                    tous.extend(tir)
+    return sorted(tous)[len(tous)//2] if tous else 25
+
 # --- Critères ---
+# Les tests passent par la config compilée (config.ConfigLoterie): comptes par masques de bits.
+def _masque(comb):
+    m = 0
+    for x in comb:
+        m |= 1 << x
+    return m
+
 def test_pair_impair(comb, cfg):
-    p = sum(1 for x in comb if x % 2 == 0)
-    i = len(comb) - p
-    return (p, i) in cfg['pair_impair_valides']
+    return compiler(cfg).pair_impair(_masque(comb))
 
 def test_petit_grand(comb, cfg, mediane):
-    petit = sum(1 for x in comb if x <= mediane)
-    grand = len(comb) - petit
-    return (petit, grand) in cfg['petit_grand_valides']
+    return compiler(cfg).petit_grand(_masque(comb), mediane)
 
 def test_series_max2_sans_quatuor(comb):
     # max 2 séries, aucune série >= 4
-    count = 0
-    i = 0
-    n = len(comb)
-    while i < n - 1:
-        if comb[i+1] == comb[i] + 1:
-            length = 2
-            j = i + 1
-            while j < n - 1 and comb[j+1] == comb[j] + 1:
-                length += 1
-                j += 1
-            if length > 3:
-                return False
-            count += 1
-            i = j
-        else:
-            i += 1
-    return count <= 2
+    return ConfigLoterie.series(_masque(comb))
 
 def test_repartition_dizaines(comb, cfg):
-    groups = [0] * ((cfg['plage_numeros'][1] + 9) // 10)
-    for x in comb:
-        groups[(x - 1) // 10] += 1
-    return all(c <= cfg['groupes_dizaines'] for c in groups)
+    return compiler(cfg).dizaines(_masque(comb))
 
 def test_somme(comb, min_s, max_s):
     s = sum(comb)
     return min_s <= s <= max_s
 
 def test_same_ending(comb, cfg):
-    endings = Counter(n % 10 for n in comb)
-    return all(count <= cfg['fin_identique_max'] for count in endings.values())
+    return compiler(cfg).fin_identique(_masque(comb))
 
 def test_diversite_finales(comb, cfg):
-    return len(set(n % 10 for n in comb)) >= cfg['min_finales']
+    return compiler(cfg).diversite_finales(_masque(comb))
 
 def test_symboliques(comb, multiplicateurs=range(2, 10), max_par_multi=4):
     for m in multiplicateurs:
@@ -229,9 +283,8 @@ def test_symboliques(comb, multiplicateurs=range(2, 10), max_par_multi=4):
     return True
 
 def verifier_criteres(combinaisons, cfg, mediane=25):
-    # Utilise les bornes fixes depuis cfg
-    somme_min = cfg["somme_min"]
-    somme_max = cfg["somme_max"]
+    """Audit des critères par combinaison; ValueError si une combinaison est invalide (plage, doublon)."""
+    cc = compiler(cfg)
 
     if not combinaisons:
         return []
@@ -239,17 +292,18 @@ def verifier_criteres(combinaisons, cfg, mediane=25):
         combinaisons = [combinaisons]
     results = []
     for comb in combinaisons:
-        comb = tuple(sorted(comb))
+        comb = cc.combinaison(comb)
+        m = _masque(comb)
         res = {
             "Combinaison": comb,
-            "Pair/Impair": test_pair_impair(comb, cfg),
-            "Petit/Grand": test_petit_grand(comb, cfg, mediane),
-            "Séries": test_series_max2_sans_quatuor(comb),
-            "Dizaines": test_repartition_dizaines(comb, cfg),
-            "Somme": test_somme(comb, somme_min, somme_max),
-            "Fin identique": test_same_ending(comb, cfg),
-            "Diversité finales": test_diversite_finales(comb, cfg),
-            "Symboliques": test_symboliques(comb, range(2, 10), cfg['max_par_multi']),
+            "Pair/Impair": cc.pair_impair(m),
+            "Petit/Grand": cc.petit_grand(m, mediane),
+            "Séries": cc.series(m),
+            "Dizaines": cc.dizaines(m),
+            "Somme": cc.somme(comb),
+            "Fin identique": cc.fin_identique(m),
+            "Diversité finales": cc.diversite_finales(m),
+            "Symboliques": cc.symboliques(m),
         }
         results.append(res)
     return results
@@ -259,134 +313,279 @@ def etoile_est_sous_ensemble_de_base(base, star):
     used = set(x for c in base for x in c)
     return all(x in used for x in star)
 
+# --- Budgets d'essais de la génération par blocs ---
+ESSAIS_BLOCS_MAX = 800      # tentatives de construction d'un même bloc
+BUDGET_POSITION_INITIAL = 400  # candidats par position tant qu'on n'a pas de statistiques
+BUDGET_POSITION_MIN = 30
+BUDGET_POSITION_MAX = 2000
+MARGE_BUDGET = 6            # budget = MARGE / taux -> proba d'échouer à tort ~ e^-6
+ESSAIS_AVANT_ADAPTATION = 50
+
+def _budget_position(essais, succes):
+    """Nombre de candidats accordés à une position de la base, d'après son taux d'acceptation observé."""
+    if essais < ESSAIS_AVANT_ADAPTATION:
+        return BUDGET_POSITION_INITIAL
+    taux = (succes + 1) / (essais + 2)
+    return max(BUDGET_POSITION_MIN, min(BUDGET_POSITION_MAX, ceil(MARGE_BUDGET / taux)))
+
+def _pool_faisable(dispo, cfg, mediane):
+    """Conditions nécessaires pour qu'au moins une combinaison valide puisse sortir de dispo."""
+    taille = cfg["nombre_numeros"]
+    if len(dispo) < taille:
+        return False
+    pairs = sum(1 for x in dispo if x % 2 == 0)
+    if not any(p <= pairs and i <= len(dispo) - pairs for p, i in cfg['pair_impair_valides']):
+        return False
+    petits = sum(1 for x in dispo if x <= mediane)
+    if not any(p <= petits and g <= len(dispo) - petits for p, g in cfg['petit_grand_valides']):
+        return False
+    tri = sorted(dispo)
+    if sum(tri[:taille]) > cfg['somme_max'] or sum(tri[-taille:]) < cfg['somme_min']:
+        return False
+    return len(set(x % 10 for x in dispo)) >= cfg['min_finales']
+
+def _passe_criteres(cand, cfg, mediane):
+    return compiler(cfg).passe(cand, mediane)
+
+ESSAIS_ETOILE = 500
+
+def _construire_etoile(base, used_base_nums, restants, cfg, mediane, exclus, essais=ESSAIS_ETOILE, filtre=None):
+    """
+    Cherche une étoile pour une base déjà validée: les numéros restants (hors base)
+    complétés par au moins reutilises_dans_etoile numéros de la base.
+    filtre: préférence optionnelle (cooccurrences.FiltrePaires): classe les étoiles valides.
+    Retourne (etoile | None, nb d'essais).
+    """
+    taille = cfg["nombre_numeros"]
+    nb_restants = len(restants)
+    nb_reutilises = taille - nb_restants
+    if nb_reutilises < cfg["reutilises_dans_etoile"]:
+        nb_reutilises = cfg["reutilises_dans_etoile"]
+        nb_restants = taille - nb_reutilises
+        if nb_restants > len(restants):
+            return None, 0
+
+    reutilises_pool = list(used_base_nums)
+    espace = binomial(len(reutilises_pool), nb_reutilises) * binomial(len(restants), nb_restants)
+    if espace <= essais:
+        # Petit espace (ex: Grande Vie, 1 seul réutilisé): on l'énumère en entier, dans le désordre
+        candidats = [
+            r + rs
+            for r in combinations(reutilises_pool, nb_reutilises)
+            for rs in combinations(restants, nb_restants)
+        ]
+        random.shuffle(candidats)
+    else:
+        candidats = (
+            tuple(random.sample(reutilises_pool, nb_reutilises)) + tuple(random.sample(restants, nb_restants))
+            for _ in range(essais)
+        )
+
+    choix = filtre.choix() if filtre is not None else None
+    n = 0
+    for cand in candidats:
+        n += 1
+        etoile = tuple(sorted(cand))
+        if etoile in base or any(etoile in ens for ens in exclus):
+            continue
+        if not _passe_criteres(etoile, cfg, mediane):
+            continue
+        if choix is None or choix.proposer(etoile, n):
+            return (etoile if choix is None else choix.cand), n
+    return (None if choix is None else choix.cand), n
+
+def _donnees_exclusion(cfg, histo_path, prop_path, taille):
+    """(historique, proposés, médiane): contexte partagé en cache (relu seulement si les fichiers changent)."""
+    try:
+        from .cache import contexte_loterie
+    except ImportError:  # exécuté comme script: pas de cache partagé
+        return charger_historique(histo_path, taille), charger_proposes(prop_path, taille), \
+            calculer_mediane(histo_path, taille)
+    ctx = contexte_loterie(cfg)
+    return ctx["historique"], ctx["proposes"], ctx["mediane"]
+
 # --- Génération par blocs couvrants + étoile (utilise fourchettes fixes cfg) ---
-def generer_par_blocs(cfg, nb_total):
+def generer_par_blocs(cfg, nb_total, delai=None, stats=None, vectorise=None, reservations=None):
+    """
+    vectorise: tirage des candidats par lots numpy (generation_vectorisee);
+    None = réglage 'generation_vectorisee' de la loterie.
+    delai: secondes max (horloge murale), > 0; None = sans limite. Passé ce délai, on
+    rend les blocs complets déjà générés au lieu de continuer.
+    stats: dict optionnel, rempli avec les compteurs d'essais, le drapeau 'partiel'
+    et les durées par phase ('durees', secondes).
+    reservations: store partagé (reservations.Reservations) où chaque bloc est réservé
+    avant d'être rendu, pour l'unicité entre workers / instances.
+    Retourne (BlocsGeneres, chemin des proposés); le résultat s'itère en (bloc_id, combinaison, etoile).
+    """
+    t0 = time.perf_counter()
+    if delai is not None and not (isfinite(delai) and delai > 0):
+        raise ValueError("delai doit être un nombre de secondes > 0")
+    fin_delai = (time.monotonic() + delai) if delai is not None else None
+    cfg = compiler(cfg)
+    passe = cfg.passe
     taille = cfg["nombre_numeros"]
     debut, fin = cfg["plage_numeros"]
     total_numeros = set(range(debut, fin + 1))
 
     par_bloc_base = cfg["par_bloc_base"]
-    reutilises_dans_etoile = cfg["reutilises_dans_etoile"]
-    somme_min, somme_max = cfg["somme_min"], cfg["somme_max"]
 
     histo_path = get_historique_path(cfg)
     prop_path = get_proposes_path(cfg)
 
-    historique = charger_historique(histo_path, taille)
-    propositions = charger_proposes(prop_path, taille)
-
-    # Médiane dynamique (à partir de l'historique) pour Petit/Grand
-    tous = []
-    if os.path.exists(histo_path):
-        with open(histo_path, newline='') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split()
-                tir = [int(x) for x in parts if x.isdigit()]
-                if len(tir) == taille:
-                    tous.extend(tir)
-    mediane = sorted(tous)[len(tous)//2] if tous else 25
-
-    res = []
+    # Historique, proposés et médiane dynamique (Petit/Grand), partagés entre les requêtes
+    historique, propositions, mediane = _donnees_exclusion(cfg, histo_path, prop_path, taille)
+    t_historique = time.perf_counter()
+
+    # Score de paires historiques (optionnel): classe les candidats valides, matrice précalculée
+    filtre = None
+    if cfg.get("score_paires"):
+        from .cooccurrences import filtre_paires
+        filtre = filtre_paires(cfg)
+
+    # Tirage pondéré des numéros (optionnel): chaud / froid / retard, sinon uniforme
+    poids = None
+    tirage = None
+    if cfg.get("ponderation"):
+        from .tirage_pondere import TiragePondere, poids_numeros
+        poids = poids_numeros(cfg, cfg["ponderation"])
+        tirage = TiragePondere(poids)
+
+    if vectorise is None:
+        vectorise = cfg.get("generation_vectorisee", False)
+    lots = None
+    if vectorise:
+        from .generation_vectorisee import LotsCandidats
+        lots = LotsCandidats(cfg, mediane, historique | propositions, poids)
+
+    t_preparation = time.perf_counter()
+
+    res = BlocsGeneres(taille)
     combis_deja = set()
     par_bloc_total = par_bloc_base + 1
     nb_blocs = ceil(nb_total / par_bloc_total)
 
+    # Taux d'acceptation par position de la base, sur tout l'appel
+    essais_pos = [0] * par_bloc_base
+    succes_pos = [0] * par_bloc_base
+    essais_blocs = 0
+    abandons_precoces = 0
+    essais_etoile = 0
+    conflits_reservation = 0
+    delai_depasse = False
+
     for bloc_id in range(1, nb_blocs + 1):
-        for essai_bloc in range(800):
+        for essai_bloc in range(ESSAIS_BLOCS_MAX):
+            if fin_delai is not None and time.monotonic() > fin_delai:
+                delai_depasse = True
+                break
+            essais_blocs += 1
             base = []
             dispo = list(range(debut, fin + 1))
             random.shuffle(dispo)
+            if tirage is not None:
+                tirage.reinitialiser()
             ok_bloc = True
 
             # Générer la base
             for i in range(par_bloc_base):
                 success_this = False
-                for _ in range(400):
-                    if len(dispo) < taille:
-                        success_this = False
+                # Pool restant incapable de fournir une combinaison valide: on recommence le bloc tout de suite
+                if not _pool_faisable(dispo, cfg, mediane):
+                    abandons_precoces += 1
+                    ok_bloc = False
+                    break
+                budget = _budget_position(essais_pos[i], succes_pos[i])
+                choix = filtre.choix() if filtre is not None else None
+                if lots is not None:
+                    # Chemin vectorisé: les candidats arrivent déjà filtrés (critères + historique/proposés)
+                    tires = 0
+                    while tires < budget:
+                        cand, n = lots.suivant(dispo, budget - tires)
+                        tires += n
+                        essais_pos[i] += n
+                        if cand is None:
+                            if n == 0:
+                                break
+                            continue
+                        if cand in combis_deja or cand in base:
+                            continue
+                        if choix is not None and not choix.proposer(cand, tires):
+                            continue
+                        success_this = True
                         break
-                    cand = tuple(sorted(random.sample(dispo, taille)))
-
-                    if (
-                        cand in historique
-                        or cand in propositions
-                        or cand in combis_deja
-                        or cand in base
-                        or not test_pair_impair(cand, cfg)
-                        or not test_petit_grand(cand, cfg, mediane)
-                        or not test_series_max2_sans_quatuor(cand)
-                        or not test_repartition_dizaines(cand, cfg)
-                        or not test_same_ending(cand, cfg)
-                        or not test_diversite_finales(cand, cfg)
-                        or not test_symboliques(cand, range(2, 10), cfg['max_par_multi'])
-                        or not test_somme(cand, somme_min, somme_max)
-                    ):
-                        continue
-
-                    base.append(cand)
-                    for x in cand:
-                        if x in dispo:
-                            dispo.remove(x)
+                else:
+                    for n in range(1, budget + 1):
+                        if len(dispo) < taille:
+                            success_this = False
+                            break
+                        essais_pos[i] += 1
+                        if tirage is not None:
+                            cand = tuple(sorted(tirage.echantillon(taille)))
+                        else:
+                            cand = tuple(sorted(random.sample(dispo, taille)))
+
+                        if (
+                            cand in historique
+                            or cand in propositions
+                            or cand in combis_deja
+                            or cand in base
+                            or not passe(cand, mediane)
+                        ):
+                            continue
+                        if choix is not None and not choix.proposer(cand, n):
+                            continue
+
+                        success_this = True
+                        break
+                if choix is not None and choix.cand is not None:
+                    # Budget épuisé ou recherche arrêtée: le mieux classé des candidats valides
+                    cand = choix.cand
                     success_this = True
-                    break
                 if not success_this:
                     ok_bloc = False
                     break
 
+                base.append(cand)
+                for x in cand:
+                    if x in dispo:
+                        dispo.remove(x)
+                    if tirage is not None:
+                        tirage.retirer(x)
+                succes_pos[i] += 1
+
             if not ok_bloc:
                 continue
 
-            # Construire l'étoile
+            # Construire l'étoile: la base est chère, on cherche longtemps avant de la jeter
             used_base_nums = set(x for comb in base for x in comb)
             restants = list(total_numeros - used_base_nums)
-            random.shuffle(restants)
-
-            taille_etoile = taille
-            nb_restants = len(restants)
-            nb_reutilises = taille_etoile - nb_restants
-            if nb_reutilises < reutilises_dans_etoile:
-                nb_reutilises = reutilises_dans_etoile
-                nb_restants = taille_etoile - nb_reutilises
-                if nb_restants > len(restants):
-                    continue
-
-            reutilises_pool = list(used_base_nums)
-            random.shuffle(reutilises_pool)
-
-            etoile_reutilises = reutilises_pool[:nb_reutilises]
-            etoile_restants = restants[:nb_restants]
-
-            etoile = tuple(sorted(etoile_reutilises + etoile_restants))
-
-            # Validation étoile
-            if (
-                etoile in historique
-                or etoile in propositions
-                or etoile in combis_deja
-                or etoile in base
-                or not test_pair_impair(etoile, cfg)
-                or not test_petit_grand(etoile, cfg, mediane)
-                or not test_series_max2_sans_quatuor(etoile)
-                or not test_repartition_dizaines(etoile, cfg)
-                or not test_same_ending(etoile, cfg)
-                or not test_diversite_finales(etoile, cfg)
-                or not test_symboliques(etoile, range(2, 10), cfg['max_par_multi'])
-                or not test_somme(etoile, somme_min, somme_max)
-            ):
+            etoile, n_essais = _construire_etoile(
+                base, used_base_nums, restants, cfg, mediane,
+                (historique, propositions, combis_deja),
+                filtre=filtre,
+            )
+            essais_etoile += n_essais
+            if etoile is None:
                 continue
 
+            if reservations is not None:
+                garde = (base + [etoile])[:nb_total - len(res)]
+                prises = reservations.reserver(cfg["nom"], garde)
+                if prises:
+                    # Rendues entre-temps par un autre worker: exclues, et on refait le bloc
+                    conflits_reservation += len(prises)
+                    combis_deja.update(prises)
+                    continue
+
             for c in base:
-                res.append((bloc_id, c, False))
+                res.ajouter(bloc_id, c, False)
                 combis_deja.add(c)
                 if len(res) >= nb_total:
                     break
             if len(res) >= nb_total:
                 break
 
-            res.append((bloc_id, etoile, True))
+            res.ajouter(bloc_id, etoile, True)
             combis_deja.add(etoile)
             print(f"Bloc {bloc_id} généré ({len(base)}/{par_bloc_base}) + étoile ★")
             break
@@ -394,13 +593,34 @@ def generer_par_blocs(cfg, nb_total):
             print(f"Bloc {bloc_id} : échec après de multiples tentatives.")
             break
 
+        if delai_depasse:
+            print(f"Bloc {bloc_id} : délai de {delai}s dépassé, résultat partiel.")
+            break
+
         if len(res) >= nb_total:
             break
 
-    return res[:nb_total], prop_path
+    if stats is not None:
+        stats.update({
+            "partiel": len(res) < nb_total,
+            "delai_depasse": delai_depasse,
+            "essais_blocs": essais_blocs,
+            "abandons_precoces": abandons_precoces,
+            "candidats": round(sum(essais_pos)),
+            "essais_etoile": essais_etoile,
+            "conflits_reservation": conflits_reservation,
+            "taux_par_position": [round(ok / n, 4) if n else None for ok, n in zip(succes_pos, essais_pos)],
+            "durees": {
+                "historique": round(t_historique - t0, 4),
+                "preparation": round(t_preparation - t_historique, 4),
+                "generation": round(time.perf_counter() - t_preparation, 4),
+            },
+        })
+
+    return res, prop_path
 
 # --- I/O console ---
-def lire_combinaisons_attendues(taille_comb):
+def lire_combinaisons_attendues(taille_comb, cfg=None):
     while True:
         lines = []
         print(f"\nCollez ou tapez vos combinaisons ({taille_comb} chiffres chacune, espaces ou virgules, ligne vide pour terminer) :")
@@ -414,6 +634,8 @@ def lire_combinaisons_attendues(taille_comb):
                 if len(nums) != taille_comb:
                     print(f"❌ Il faut {taille_comb} chiffres par combinaison. Erreur dans la ligne : '{l}'")
                     continue
+                if cfg is not None:
+                    compiler(cfg).combinaison(nums)
                 lines.append(nums)
             except Exception as e:
                 print(f"❌ Mauvais format dans la ligne : '{l}'. Détail : {e}")
@@ -528,7 +750,7 @@ def menu_principal():
                 continue
 
             while True:
-                lines = lire_combinaisons_attendues(taille_comb)
+                lines = lire_combinaisons_attendues(taille_comb, cfg)
 
                 # Chargements
                 historique = charger_historique(histo_path, taille_comb)
@@ -622,6 +844,11 @@ def menu_principal():
                     if len(nums) != taille_comb:
                         print(f"❌ Ligne invalide ({len(nums)}/{taille_comb} chiffres) : {l}")
                         continue
+                    try:
+                        compiler(cfg).combinaison(nums)
+                    except ValueError as e:
+                        print(f"❌ Ligne invalide ({e}) : {l}")
+                        continue
                     lines.append(nums)
 
                 if retour_menu:
@@ -715,8 +942,7 @@ def menu_principal():
                 afficher_blocs(combis, avec_bloc=True)
 
                 # Enregistrer les propositions (créera le fichier si absent)
-                os.makedirs(os.path.dirname(path), exist_ok=True)
-                with open(path, 'a', newline='') as f:
+                with verrou_proposes(path), open(path, 'a', newline='') as f:
                     writer = csv.writer(f, delimiter=' ')
                     for _bloc_id, c, is_star in combis:
                         row = (['*'] + list(c)) if is_star else list(c)
@@ -734,26 +960,21 @@ def menu_principal():
             break
 
 # --- API simple pour le backend / exécution non-interactive ---
-def generer_combinaisons_depuis_web(loterie_id: str, nb_blocs: int):
-    from .generateur_ultra_plus import generer_par_blocs, LOTERIES
-
+def generer_combinaisons_depuis_web(loterie_id: str, nb_blocs: int, delai=None, stats=None, score_paires=None,
+                                    ponderation=None):
     cfg = LOTERIES.get(loterie_id)
     if not cfg:
         raise ValueError("Loterie invalide")
+    if score_paires:
+        cfg = {**cfg, "score_paires": score_paires}
+    if ponderation:
+        cfg = {**cfg, "ponderation": ponderation}
 
     total_combis = nb_blocs * (cfg["par_bloc_base"] + 1)
 
-    combis, _ = generer_par_blocs(cfg, total_combis)
-
-    resultat = [
-        {
-            "bloc": bloc,
-            "combinaison": comb,
-            "etoile": is_star
-        }
-        for bloc, comb, is_star in combis
-    ]
-    return resultat
+    # Conteneur compact gardé tel quel jusqu'à la sérialisation (en_json, en_colonnes, en_dicts)
+    combis, _ = generer_par_blocs(cfg, total_combis, delai=delai, stats=stats, reservations=reservations_partagees())
+    return combis
 
 
 # --- Entrée principale ---
@@ -761,8 +982,9 @@ if __name__ == "__main__":
     # Modes:
     #  - Interactif:          python generateur_ultra_plus.py
     #  - Non-interactif API:  python generateur_ultra_plus.py <loterie_id> <mode> <nb_blocs>
+    #    (seul le mode Gb existe; pour les traitements par lots: python -m scripts.loto_gen.cli)
     #
-    # Ex: python generateur_ultra_plus.py 2 Gn 1
+    # Ex: python generateur_ultra_plus.py 2 Gb 1
     if len(sys.argv) >= 4:
         loterie_id = sys.argv[1]
         mode = sys.argv[2]
@@ -771,12 +993,21 @@ if __name__ == "__main__":
         except ValueError:
             print(json.dumps({"ok": False, "error": "nb_blocs doit être un entier"}))
             sys.exit(2)
+        if mode.lower() not in ("gb", "gn"):
+            print(json.dumps({"ok": False, "error": f"Mode inconnu: {mode} (seul Gb est disponible)"}))
+            sys.exit(2)
 
-        data = generer_combinaisons_depuis_web(loterie_id, nb_blocs, mode)
+        try:
+            # Les messages de progression partent sur stderr: stdout reste du JSON pur
+            import contextlib
+            with contextlib.redirect_stdout(sys.stderr):
+                data = generer_combinaisons_depuis_web(loterie_id, nb_blocs)
+        except ValueError as e:
+            print(json.dumps({"ok": False, "error": str(e)}, ensure_ascii=False))
+            sys.exit(2)
         # Sortie JSON propre pour le backend
-        print(json.dumps({"ok": True, "data": data}, ensure_ascii=False))
+        print(json.dumps({"ok": True, "data": data.en_dicts()}, ensure_ascii=False))
         sys.exit(0)
     else:
         # Interactif (menu)
         menu_principal()
-    if __name__ == "__main__": menu_principal()
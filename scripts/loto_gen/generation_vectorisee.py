@@ -0,0 +1,184 @@
+"""
+Tirage des candidats par lots numpy pour generer_par_blocs.
+
+Au lieu de tirer et tester une combinaison à la fois, on tire un lot de
+combinaisons dans le pool 'dispo' d'un coup (taille ajustée au taux de survie
+observé, jusqu'à 8192), on les filtre avec les critères
+vectorisés et un test d'appartenance à l'historique/aux proposés (rangs triés +
+searchsorted), puis on consomme les survivantes une à une. Quand des numéros
+sortent de 'dispo', les survivantes qui les contiennent sont simplement écartées:
+les autres restent uniformes sur les combinaisons du nouveau pool.
+
+Avec les configurations actuelles (60-80 % d'acceptation), le chemin scalaire
+reste plus rapide: il ne faut qu'un ou deux candidats par position, et chaque
+lot paie un coût fixe numpy. Le chemin vectorisé gagne dès que la config devient
+restrictive (ex: Lotto Max avec somme 172-182, 4 pairs, 3 petits: ~2,4x).
+
+Comparaison avec le chemin scalaire:
+    python -m scripts.loto_gen.generation_vectorisee [ids] --blocs 200
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+from math import comb as binomial
+
+import numpy as np
+
+from .criteres_vectorises import tous_criteres
+from .tirage_pondere import log_poids
+
+TAILLE_LOT_MIN = 64
+TAILLE_LOT_MAX = 8192
+# Survivantes visées par lot: la plupart deviennent inutilisables dès que 'dispo' rétrécit
+SURVIVANTES_VISEES = 4
+
+def table_binomiale(n, k):
+    return np.array([[binomial(i, j) for j in range(k + 1)] for i in range(n + 1)], dtype=np.int64)
+
+def rangs(lignes, binom):
+    """Rang colex de chaque ligne triée de numéros >= 1."""
+    lignes = np.asarray(lignes, dtype=np.int64)
+    return sum(binom[lignes[:, i] - 1, i + 1] for i in range(lignes.shape[1]))
+
+def rangs_exclus(combinaisons, binom, taille):
+    """Rangs triés (uniques) d'un ensemble de combinaisons (historique, proposés...)."""
+    if not combinaisons:
+        return np.zeros(0, dtype=np.int64)
+    arr = np.array(sorted(combinaisons), dtype=np.int64).reshape(-1, taille)
+    return np.unique(rangs(arr, binom))
+
+def _masques(lignes):
+    m = np.zeros(len(lignes), dtype=np.uint64)
+    for i in range(lignes.shape[1]):
+        m |= np.left_shift(np.uint64(1), lignes[:, i].astype(np.uint64))
+    return m
+
+def _masque(nums):
+    m = 0
+    for x in nums:
+        m |= 1 << x
+    return m
+
+class LotsCandidats:
+    """Réserve de candidats déjà filtrés, tirés dans le pool courant."""
+
+    def __init__(self, cfg, mediane, exclus, poids=None):
+        self.cfg = cfg
+        self.mediane = mediane
+        # Poids des numéros (tirage_pondere): tirage sans remise par clés de Gumbel
+        self.log_poids = log_poids(poids) if poids is not None else None
+        self.taille = cfg["nombre_numeros"]
+        self.tires = 0
+        self.survivantes = 0
+        self.binom = table_binomiale(cfg["plage_numeros"][1], self.taille)
+        self.exclus = rangs_exclus(exclus, self.binom, self.taille)
+        self.rng = np.random.default_rng(random.getrandbits(64))
+        self._lignes = np.zeros((0, self.taille), dtype=np.int16)
+        self._masques = np.zeros(0, dtype=np.uint64)
+        self._source = 0  # masque du pool dans lequel la réserve a été tirée
+        self._cout = 0.0  # tirages bruts par survivante du lot en réserve
+
+    def _tirer(self, dispo, n):
+        pool = np.asarray(dispo, dtype=np.int16)
+        if self.log_poids is None:
+            # k premiers indices d'une permutation aléatoire par ligne = k-sous-ensemble uniforme
+            idx = np.argpartition(self.rng.random((n, len(pool))), self.taille - 1, axis=1)[:, :self.taille]
+        else:
+            # k plus grandes clés log(w) + Gumbel = tirage pondéré sans remise
+            cles = self.log_poids[pool] + self.rng.gumbel(size=(n, len(pool)))
+            idx = np.argpartition(-cles, self.taille - 1, axis=1)[:, :self.taille]
+        lignes = np.sort(pool[idx], axis=1)
+        lignes = lignes[tous_criteres(lignes, self.cfg, self.mediane)]
+        if len(self.exclus) and len(lignes):
+            r = rangs(lignes, self.binom)
+            pos = np.searchsorted(self.exclus, r)
+            pos[pos == len(self.exclus)] = 0
+            lignes = lignes[self.exclus[pos] != r]
+        self.tires += n
+        self.survivantes += len(lignes)
+        return lignes
+
+    def _taille_lot(self, budget):
+        """Lot dimensionné sur le taux de survie observé, plafonné par le budget de la position."""
+        taux = (self.survivantes + 1) / (self.tires + 2)
+        n = int(np.ceil(SURVIVANTES_VISEES / taux))
+        if budget:
+            n = min(n, int(budget))
+        return max(TAILLE_LOT_MIN, min(TAILLE_LOT_MAX, n))
+
+    def suivant(self, dispo, budget=None):
+        """
+        Prochain candidat valide tiré dans dispo: (tuple | None, coût en tirages bruts).
+        Chaque candidat rendu coûte sa part du lot d'où il vient (tirages / survivantes),
+        qu'il sorte d'un lot neuf ou de la réserve. None si un lot entier n'a rien donné
+        (coût = le lot).
+        """
+        masque_dispo = _masque(dispo)
+        if masque_dispo & ~self._source or (self.log_poids is not None and masque_dispo != self._source):
+            # Le pool a grandi (nouveau bloc): la réserve n'est plus uniforme, on la jette.
+            # En tirage pondéré, le filtrage par pool ne conserve pas la loi: on la jette aussi.
+            self._lignes = self._lignes[:0]
+            self._masques = self._masques[:0]
+        if len(self._lignes):
+            hors = np.uint64(~masque_dispo & ((1 << 64) - 1))
+            garde = (self._masques & hors) == 0
+            self._lignes = self._lignes[garde]
+            self._masques = self._masques[garde]
+        self._source = masque_dispo
+
+        if not len(self._lignes):
+            if len(dispo) < self.taille:
+                return None, 0
+            tires = self._taille_lot(budget)
+            self._lignes = self._tirer(dispo, tires)
+            self._masques = _masques(self._lignes)
+            if not len(self._lignes):
+                return None, tires
+            self._cout = tires / len(self._lignes)
+
+        cand = tuple(int(x) for x in self._lignes[-1])
+        self._lignes = self._lignes[:-1]
+        self._masques = self._masques[:-1]
+        return cand, self._cout
+
+# --- Banc d'essai: scalaire vs vectorisé ---
+def comparer(cfg, nb_blocs, repetitions=3):
+    from .generateur_ultra_plus import generer_par_blocs
+
+    nb_total = nb_blocs * (cfg["par_bloc_base"] + 1)
+    res = {}
+    for nom, vectorise in (("scalaire", False), ("vectorise", True)):
+        durees = []
+        for _ in range(repetitions):
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generer_par_blocs(cfg, nb_total, vectorise=vectorise)
+            durees.append(time.perf_counter() - t0)
+        res[nom] = {"meilleure": round(min(durees), 4), "moyenne": round(sum(durees) / len(durees), 4)}
+    res["acceleration"] = round(res["scalaire"]["meilleure"] / res["vectorise"]["meilleure"], 2)
+    return res
+
+def main(argv=None):
+    from .generateur_ultra_plus import LOTERIES
+
+    parser = argparse.ArgumentParser(description="Compare la génération scalaire et vectorisée.")
+    parser.add_argument("loteries", nargs="*", help=f"ids parmi {', '.join(sorted(LOTERIES))} (défaut: toutes)")
+    parser.add_argument("--blocs", type=int, default=200)
+    parser.add_argument("--repetitions", type=int, default=3)
+    args = parser.parse_args(argv)
+    inconnues = [lid for lid in args.loteries if lid not in LOTERIES]
+    if inconnues:
+        parser.error(f"loterie(s) inconnue(s): {', '.join(inconnues)}")
+
+    rapport = {
+        lid: {"nom": LOTERIES[lid]["nom"], **comparer(LOTERIES[lid], args.blocs, args.repetitions)}
+        for lid in args.loteries or list(LOTERIES)
+    }
+    sys.stdout.write(json.dumps(rapport, ensure_ascii=False, indent=2) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import csv
+import io
+import os
+import threading
+from bisect import bisect_left
+import datetime
+
+from .generateur_ultra_plus import get_chronologie_path
+from .cache import version_fichier
+
+# --- Historique daté + index inversés (numéro -> positions des tirages) ---
+class HistoriqueDate:
+    """
+    Tirages dans l'ordre chronologique (position 0 = plus ancien).
+    positions[n] = positions (croissantes) des tirages contenant n,
+    par_combinaison[comb] = positions des tirages de cette combinaison.
+    """
+
+    def __init__(self, plage_max):
+        self.dates = []      # "" si la date est inconnue
+        self.tirages = []
+        self.bonus = []
+        self.positions = [[] for _ in range(plage_max + 1)]
+        self.par_combinaison = {}
+
+    def __len__(self):
+        return len(self.tirages)
+
+    @property
+    def datee(self):
+        return bool(self.dates) and bool(self.dates[-1])
+
+    def ajouter(self, date, nums, bonus=None):
+        """Ajoute un tirage à la fin (mise à jour incrémentale des index)."""
+        if date and self.dates and self.dates[-1] and date < self.dates[-1]:
+            raise ValueError(f"Tirage du {date} antérieur au dernier tirage ({self.dates[-1]})")
+        comb = tuple(sorted(nums))
+        pos = len(self.tirages)
+        self.dates.append(date or "")
+        self.tirages.append(comb)
+        self.bonus.append(bonus)
+        for n in comb:
+            self.positions[n].append(pos)
+        self.par_combinaison.setdefault(comb, []).append(pos)
+
+    # --- Fenêtres ---
+    def debut_fenetre(self, derniers=None, depuis=None):
+        """Première position de la fenêtre (N derniers tirages et/ou depuis une date ISO)."""
+        debut = 0
+        if derniers is not None:
+            derniers = int(derniers)
+            if derniers < 0:
+                raise ValueError("'derniers' doit être positif ou nul")
+            debut = max(0, len(self.tirages) - derniers)
+        if depuis:
+            try:
+                depuis = datetime.date.fromisoformat(str(depuis)).isoformat()
+            except ValueError:
+                raise ValueError(f"'depuis' doit être une date AAAA-MM-JJ (reçu: {depuis})")
+            if not self.datee:
+                raise ValueError("Pas de dates pour cette loterie (utiliser 'derniers')")
+            debut = max(debut, bisect_left(self.dates, depuis))
+        return debut
+
+    def _fenetre(self, positions, debut):
+        return positions[bisect_left(positions, debut):]
+
+    # --- Requêtes ---
+    def frequences(self, derniers=None, depuis=None):
+        debut = self.debut_fenetre(derniers, depuis)
+        return {
+            "tirages": len(self.tirages) - debut,
+            "debut": self.dates[debut] if debut < len(self.dates) else "",
+            "frequences": {
+                n: len(pos) - bisect_left(pos, debut)
+                for n, pos in enumerate(self.positions) if n
+            },
+        }
+
+    def retards(self):
+        """Nombre de tirages depuis la dernière sortie de chaque numéro (None: jamais sorti)."""
+        dernier = len(self.tirages) - 1
+        return {
+            n: {
+                "retard": dernier - pos[-1] if pos else None,
+                "date": self.dates[pos[-1]] if pos else "",
+            }
+            for n, pos in enumerate(self.positions) if n
+        }
+
+    def cooccurrences(self, numeros, derniers=None, depuis=None, exemples=20):
+        """Tirages de la fenêtre qui contiennent TOUS les numéros donnés."""
+        numeros = sorted(set(int(n) for n in numeros))
+        if not numeros or any(n <= 0 or n >= len(self.positions) for n in numeros):
+            raise ValueError("Numéros hors plage")
+        debut = self.debut_fenetre(derniers, depuis)
+        listes = sorted((self._fenetre(self.positions[n], debut) for n in numeros), key=len)
+        communs = listes[0]
+        for autre in listes[1:]:
+            s = set(autre)
+            communs = [p for p in communs if p in s]
+        return {
+            "numeros": numeros,
+            "tirages": len(communs),
+            "fenetre": len(self.tirages) - debut,
+            "derniers": [
+                {"position": p, "date": self.dates[p], "combinaison": list(self.tirages[p])}
+                for p in reversed(communs[-exemples:])
+            ],
+        }
+
+    def apparitions(self, combinaison, derniers=None, depuis=None):
+        """Sorties d'une combinaison exacte dans la fenêtre."""
+        debut = self.debut_fenetre(derniers, depuis)
+        pos = self._fenetre(self.par_combinaison.get(tuple(sorted(int(n) for n in combinaison)), []), debut)
+        return {"tirages": len(pos), "dates": [self.dates[p] for p in pos], "positions": pos}
+
+# --- Lecture de chronologie_*.csv (date,type,n1..nk,bonus) ---
+def _lire_lignes(lignes, histo, taille, bonis):
+    for row in csv.reader(lignes):
+        if len(row) < taille + 3 or row[0] == "date":
+            continue
+        if row[1] != "principal" and not bonis:
+            continue
+        nums = [int(x) for x in row[2:2 + taille]]
+        bonus = int(row[2 + taille]) if row[2 + taille] else None
+        histo.ajouter(row[0], nums, bonus)
+
+def construire_historique_dates(path, cfg, bonis=False, debut=0):
+    """Construit l'historique depuis l'octet 'debut' du fichier; retourne (histo, fin)."""
+    histo = HistoriqueDate(cfg["plage_numeros"][1])
+    fin = _completer(histo, path, cfg, bonis, debut)
+    return histo, fin
+
+def _completer(histo, path, cfg, bonis, debut):
+    """Ajoute les lignes du fichier à partir de l'octet 'debut'; retourne l'octet de fin."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        f.seek(debut)
+        donnees = f.read()
+    # Ne consomme que les lignes complètes (fichier en cours d'écriture)
+    complet = donnees.rfind(b"\n") + 1
+    _lire_lignes(io.StringIO(donnees[:complet].decode("utf-8")), histo, cfg["nombre_numeros"], bonis)
+    return debut + complet
+
+# Une entrée par (loterie, bonis): (version, octet de fin, queue du fichier, histo)
+_historiques = {}
+_historiques_lock = threading.Lock()
+TAILLE_QUEUE = 256
+
+def _queue(path, fin):
+    with open(path, "rb") as f:
+        f.seek(max(0, fin - TAILLE_QUEUE))
+        return f.read(min(fin, TAILLE_QUEUE))
+
+def historique_dates(cfg, bonis=False):
+    """
+    Historique daté de la loterie, construit une fois puis tenu à jour:
+    si le fichier a seulement grandi (mêmes octets avant l'ancienne fin),
+    seules les nouvelles lignes sont indexées; sinon on reconstruit.
+    """
+    path = get_chronologie_path(cfg)
+    version = version_fichier(path)
+    cle = (cfg["nom"], bool(bonis))
+    ent = _historiques.get(cle)
+    if ent is not None and ent[0] == version:
+        return ent[3]
+
+    with _historiques_lock:
+        ent = _historiques.get(cle)
+        if ent is not None and ent[0] == version:
+            return ent[3]
+        histo = None
+        if ent is not None and version is not None and version[1] >= ent[1]:
+            _, fin, queue, histo = ent
+            if _queue(path, fin) == queue:
+                try:
+                    fin = _completer(histo, path, cfg, bonis, fin)
+                except ValueError:
+                    histo = None  # ajout hors ordre chronologique: reconstruction complète
+            else:
+                histo = None
+        if histo is None:
+            # L'ancienne entrée a pu être modifiée en partie: on ne la réutilise plus
+            _historiques.pop(cle, None)
+            histo, fin = construire_historique_dates(path, cfg, bonis)
+        queue = _queue(path, fin) if version is not None else b""
+        _historiques[cle] = (version, fin, queue, histo)
+        return histo
@@ -0,0 +1,125 @@
+"""
+Rapport mémoire: taille des structures d'un worker, mesurée avec tracemalloc.
+
+Chaque structure est reconstruite une fois sous tracemalloc, à côté des caches
+partagés: 'taille' = octets encore alloués tant que la structure existe, 'pic'
+= pic d'allocation pendant sa construction. La génération est mesurée comme
+dans une requête (contexte partagé déjà chargé), sous sa forme compacte
+(BlocsGeneres) puis, pour comparaison, sous l'ancienne forme liste de dicts et
+en JSON.
+
+tracemalloc ralentit toutes les allocations du processus pendant la mesure:
+un rapport à la fois, et tracemalloc est arrêté ensuite s'il ne tournait pas.
+
+Usage (depuis la racine du projet):
+    python -m scripts.loto_gen.memoire [ids] [--blocs 100]
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+import threading
+import tracemalloc
+
+from .generateur_ultra_plus import (
+    LOTERIES,
+    get_historique_path,
+    get_proposes_path,
+    get_chronologie_path,
+    charger_historique,
+    charger_proposes,
+    calculer_mediane,
+    generer_par_blocs,
+    verifier_criteres,
+)
+from .analytique import masques
+from .cache import contexte_loterie
+from .historique_dates import construire_historique_dates
+
+_lock = threading.Lock()
+
+def _mesurer(construire):
+    """(résultat, {taille, pic}) en octets; tracemalloc doit être actif."""
+    tracemalloc.reset_peak()
+    avant = tracemalloc.get_traced_memory()[0]
+    resultat = construire()
+    actuel, pic = tracemalloc.get_traced_memory()
+    return resultat, {"taille": actuel - avant, "pic": pic - avant}
+
+def memoire_processus():
+    """RSS et pic de RSS du processus (octets), depuis /proc si disponible."""
+    res = {}
+    try:
+        with open("/proc/self/status") as f:
+            for ligne in f:
+                cle, _, val = ligne.partition(":")
+                if cle in ("VmRSS", "VmHWM"):
+                    res["rss" if cle == "VmRSS" else "pic_rss"] = int(val.split()[0]) * 1024
+    except OSError:
+        import resource
+        # ru_maxrss: kilo-octets sous Linux, octets sous macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        res["pic_rss"] = maxrss if sys.platform == "darwin" else maxrss * 1024
+    return res
+
+def rapport_memoire(cfg, blocs=100):
+    """Tailles par structure pour une loterie; blocs = taille de la génération mesurée."""
+    taille = cfg["nombre_numeros"]
+    histo_path = get_historique_path(cfg)
+    structures = {}
+    with _lock:
+        demarre = not tracemalloc.is_tracing()
+        if demarre:
+            tracemalloc.start()
+        try:
+            historique, structures["historique"] = _mesurer(lambda: charger_historique(histo_path, taille))
+            structures["historique"]["elements"] = len(historique)
+            proposes, structures["proposes"] = _mesurer(lambda: charger_proposes(get_proposes_path(cfg), taille))
+            structures["proposes"]["elements"] = len(proposes)
+            mediane = calculer_mediane(histo_path, taille)
+
+            histo, structures["historique_dates"] = _mesurer(
+                lambda: construire_historique_dates(get_chronologie_path(cfg), cfg, bonis=True)[0]
+            )
+            structures["historique_dates"]["elements"] = len(histo)
+            m, structures["masques_historique"] = _mesurer(lambda: masques(histo.tirages))
+            structures["masques_historique"]["elements"] = len(m)
+            del histo, m
+
+            nb_total = blocs * (cfg["par_bloc_base"] + 1)
+            contexte_loterie(cfg)
+            with contextlib.redirect_stdout(io.StringIO()):
+                res, structures["generation"] = _mesurer(lambda: generer_par_blocs(cfg, nb_total)[0])
+            structures["generation"]["elements"] = len(res)
+            structures["generation"]["tampons"] = res.nbytes()
+            dicts, structures["generation_dicts"] = _mesurer(res.en_dicts)
+            structures["generation_dicts"]["elements"] = len(dicts)
+            del dicts
+            texte, structures["generation_json"] = _mesurer(res.en_json)
+            structures["generation_json"]["elements"] = len(texte)
+            del texte
+
+            combis = [c for _b, c, _e in res]
+            audits, structures["verifier_criteres"] = _mesurer(lambda: verifier_criteres(combis, cfg, mediane))
+            structures["verifier_criteres"]["elements"] = len(audits)
+            del audits, combis, res
+        finally:
+            if demarre:
+                tracemalloc.stop()
+    return {"loterie": cfg["nom"], "blocs": blocs, "structures": structures, "processus": memoire_processus()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Taille mémoire des structures (tracemalloc).")
+    parser.add_argument("loteries", nargs="*", help=f"ids parmi {', '.join(sorted(LOTERIES))} (défaut: toutes)")
+    parser.add_argument("--blocs", type=int, default=100, help="taille de la génération mesurée")
+    args = parser.parse_args(argv)
+    inconnues = [lid for lid in args.loteries if lid not in LOTERIES]
+    if inconnues:
+        parser.error(f"loterie(s) inconnue(s): {', '.join(inconnues)}")
+
+    rapport = {lid: rapport_memoire(LOTERIES[lid], args.blocs) for lid in args.loteries or list(LOTERIES)}
+    sys.stdout.write(json.dumps(rapport, ensure_ascii=False, indent=2) + "\n")
+
+if __name__ == "__main__":
+    main()
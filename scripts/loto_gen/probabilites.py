@@ -0,0 +1,278 @@
+"""
+Calcul EXACT de la fraction des combinaisons admises par une configuration LOTERIES.
+
+Compte, sans énumérer les C(n, k) combinaisons, combien de k-sous-ensembles du pool
+respectent tous les critères de verifier_criteres (et chaque critère seul).
+
+Principe:
+- programmation dynamique sur les numéros en ordre croissant, avec un état
+  (nb pris, pairs, petits, série en cours, nb de séries, compte de la dizaine en
+  cours, compteurs de multiples) et un tableau numpy des comptes par somme;
+  un compteur de multiples qui ne peut plus dépasser son plafond avec les tirages
+  restants est remis à 0, ce qui fusionne énormément d'états;
+- les critères sur les finales (même finale, diversité) sont traités à part: on
+  énumère explicitement les combinaisons qui les violent (peu nombreuses), on garde
+  celles qui passent les autres critères, et on les retranche du compte de la DP.
+
+Usage (depuis la racine du projet):
+    python -m scripts.loto_gen.probabilites            # les 3 loteries, JSON sur stdout
+"""
+import argparse
+import json
+import sys
+import time
+from itertools import combinations
+from math import comb as binomial
+
+import numpy as np
+
+from .generateur_ultra_plus import LOTERIES, get_historique_path, calculer_mediane
+from .criteres_vectorises import NOMS_CRITERES, evaluer_criteres
+
+MULTIPLICATEURS = range(2, 10)
+
+def _comptes_valides(paires, taille):
+    return {a for a, b in paires if a + b == taille}
+
+# --- DP sur les numéros (tout sauf les finales) ---
+def _dp(pool, k, cfg, mediane, parite=True, petit=True, series=True, dizaines=True,
+        multiples=True, somme=True):
+    """Nombre de k-sous-ensembles du pool qui respectent les critères activés."""
+    pv = _comptes_valides(cfg["pair_impair_valides"], k) if parite else None
+    sv = _comptes_valides(cfg["petit_grand_valides"], k) if petit else None
+    cap_diz = cfg["groupes_dizaines"]
+    cap_multi = cfg["max_par_multi"]
+    if somme:
+        somme_min, somme_max = cfg["somme_min"], cfg["somme_max"]
+    else:
+        somme_min, somme_max = 0, sum(sorted(pool)[-k:])
+    L = somme_max + 1
+    if not pool or k > len(pool):
+        return 0
+
+    if pv is not None and not pv or sv is not None and not sv:
+        return 0
+    ev_max = max(pv) if pv else k
+    odd_max = k - min(pv) if pv else k
+    sm_max = max(sv) if sv else k
+    lg_max = k - min(sv) if sv else k
+
+    depart = np.zeros(L, dtype=np.int64)
+    depart[0] = 1
+    vide_multi = (0,) * len(MULTIPLICATEURS) if multiples else ()
+    # (pris, pairs, petits, serie, nb_series, diz, multiples)
+    etats = {(0, 0, 0, 0, 0, 0, vide_multi): depart}
+
+    prec = None
+    for x in pool:
+        nouvelle_diz = prec is None or (x - 1) // 10 != (prec - 1) // 10
+        adjacent = prec == x - 1
+        pair = x % 2 == 0
+        est_petit = x <= mediane
+        sig = tuple(1 if x % m == 0 else 0 for m in MULTIPLICATEURS) if multiples else ()
+        suivants = {}
+
+        def ajouter(cle, arr):
+            a = suivants.get(cle)
+            suivants[cle] = arr if a is None else a + arr
+
+        for (c, ev, sm, serie, nb_series, diz, mv), arr in etats.items():
+            if nouvelle_diz:
+                diz = 0
+            if not adjacent:
+                serie = 0
+            # Ne pas prendre x
+            ajouter((c, ev, sm, 0, nb_series, diz, mv), arr)
+
+            # Prendre x
+            if c == k or x >= L:
+                continue
+            c2 = c + 1
+            ev2 = ev + pair if pv else 0
+            sm2 = sm + est_petit if sv else 0
+            if pv and (ev2 > ev_max or c2 - ev2 > odd_max):
+                continue
+            if sv and (sm2 > sm_max or c2 - sm2 > lg_max):
+                continue
+            serie2 = serie + 1
+            nb_series2 = nb_series + (serie2 == 2)
+            if series and (serie2 > 3 or nb_series2 > 2):
+                continue
+            if dizaines and diz + 1 > cap_diz:
+                continue
+            if multiples:
+                reste = k - c2
+                mv2 = tuple(a + b for a, b in zip(mv, sig))
+                if max(mv2) > cap_multi:
+                    continue
+                mv2 = tuple(v if v + reste > cap_multi else 0 for v in mv2)
+            else:
+                mv2 = ()
+            decale = np.zeros(L, dtype=np.int64)
+            decale[x:] = arr[:L - x]
+            if series:
+                cle = (c2, ev2, sm2, serie2, nb_series2, diz + 1 if dizaines else 0, mv2)
+            else:
+                cle = (c2, ev2, sm2, 1, 0, diz + 1 if dizaines else 0, mv2)
+            ajouter(cle, decale)
+        etats = suivants
+        prec = x
+
+    total = 0
+    for (c, ev, sm, _serie, _nb, _diz, _mv), arr in etats.items():
+        if c != k:
+            continue
+        if pv is not None and ev not in pv:
+            continue
+        if sv is not None and sm not in sv:
+            continue
+        total += int(arr[somme_min:somme_max + 1].sum())
+    return total
+
+# --- Finales: comptes marginaux par chiffre ---
+def _par_chiffre(pool):
+    groupes = {}
+    for x in pool:
+        groupes.setdefault(x % 10, []).append(x)
+    return groupes
+
+def _compte_fin_identique(pool, k, fmax):
+    poly = [1] + [0] * k
+    for nums in _par_chiffre(pool).values():
+        facteur = [binomial(len(nums), j) for j in range(min(fmax, len(nums)) + 1)]
+        nouveau = [0] * (k + 1)
+        for i, a in enumerate(poly):
+            if a:
+                for j, b in enumerate(facteur):
+                    if i + j <= k:
+                        nouveau[i + j] += a * b
+        poly = nouveau
+    return poly[k]
+
+def _compte_diversite(pool, k, min_finales):
+    etats = {(0, 0): 1}
+    for nums in _par_chiffre(pool).values():
+        suivants = {}
+        for (c, nd), n in etats.items():
+            for j in range(0, min(len(nums), k - c) + 1):
+                cle = (c + j, min(nd + (j > 0), min_finales))
+                suivants[cle] = suivants.get(cle, 0) + n * binomial(len(nums), j)
+        etats = suivants
+    return sum(n for (c, nd), n in etats.items() if c == k and nd >= min_finales)
+
+# --- Énumération des combinaisons qui violent un critère de finales ---
+def _lignes(groupe, autres, j, k):
+    a = list(combinations(groupe, j))
+    b = list(combinations(autres, k - j))
+    A = np.array(a, dtype=np.int16).reshape(len(a), j)
+    B = np.array(b, dtype=np.int16).reshape(len(b), k - j)
+    if not len(A) or not len(B):
+        return np.zeros((0, k), dtype=np.int16)
+    lignes = np.hstack([np.repeat(A, len(B), axis=0), np.tile(B, (len(A), 1))])
+    return np.sort(lignes, axis=1)
+
+def _violateurs_finales(pool, k, fmax, min_finales):
+    groupes = _par_chiffre(pool)
+    # Au moins fmax+1 numéros qui finissent par le même chiffre
+    for d, nums in groupes.items():
+        autres = [x for x in pool if x % 10 != d]
+        for j in range(fmax + 1, min(len(nums), k) + 1):
+            yield _lignes(nums, autres, j, k)
+    # Moins de min_finales chiffres finaux distincts: tout dans l'union de min_finales-1 chiffres
+    nb = min(min_finales - 1, len(groupes))
+    if nb > 0:
+        for chiffres in combinations(sorted(groupes), nb):
+            union = sorted(x for d in chiffres for x in groupes[d])
+            if len(union) >= k:
+                lignes = list(combinations(union, k))
+                yield np.array(lignes, dtype=np.int16).reshape(len(lignes), k)
+
+def _rangs(lignes, pool, binom):
+    pos = np.searchsorted(np.asarray(pool), lignes)
+    return sum(binom[pos[:, i], i + 1] for i in range(lignes.shape[1]))
+
+# --- API ---
+def compter_acceptees(cfg, mediane=25, numeros=None):
+    """
+    Compte exact des combinaisons du pool (défaut: toute la plage) qui passent
+    tous les critères, et de celles qui passent chaque critère pris seul.
+    """
+    t0 = time.perf_counter()
+    k = cfg["nombre_numeros"]
+    debut, fin = cfg["plage_numeros"]
+    pool = sorted(set(int(x) for x in numeros)) if numeros else list(range(debut, fin + 1))
+    total = binomial(len(pool), k)
+
+    # Tout sauf les finales, puis on retire les violateurs de finales qui passent le reste
+    coeur = _dp(pool, k, cfg, mediane)
+    binom = np.array([[binomial(i, j) for j in range(k + 1)] for i in range(len(pool) + 1)], dtype=np.int64)
+    autres_criteres = ("Pair/Impair", "Petit/Grand", "Séries", "Dizaines", "Somme", "Symboliques")
+    rangs = []
+    for lignes in _violateurs_finales(pool, k, cfg["fin_identique_max"], cfg["min_finales"]):
+        if not len(lignes):
+            continue
+        res = evaluer_criteres(lignes, cfg, mediane)
+        ok = np.ones(len(lignes), dtype=bool)
+        for nom in autres_criteres:
+            ok &= res[nom]
+        if ok.any():
+            rangs.append(_rangs(lignes[ok], pool, binom))
+    retires = len(np.unique(np.concatenate(rangs))) if rangs else 0
+    acceptees = coeur - retires
+
+    tous_off = dict(parite=False, petit=False, series=False, dizaines=False, multiples=False, somme=False)
+    marginales = {
+        "Pair/Impair": _dp(pool, k, cfg, mediane, **{**tous_off, "parite": True}),
+        "Petit/Grand": _dp(pool, k, cfg, mediane, **{**tous_off, "petit": True}),
+        "Séries": _dp(pool, k, cfg, mediane, **{**tous_off, "series": True}),
+        "Dizaines": _dp(pool, k, cfg, mediane, **{**tous_off, "dizaines": True}),
+        "Somme": _dp(pool, k, cfg, mediane, **{**tous_off, "somme": True}),
+        "Fin identique": _compte_fin_identique(pool, k, cfg["fin_identique_max"]),
+        "Diversité finales": _compte_diversite(pool, k, cfg["min_finales"]),
+        "Symboliques": _dp(pool, k, cfg, mediane, **{**tous_off, "multiples": True}),
+    }
+
+    return {
+        "nom": cfg["nom"],
+        "mediane": mediane,
+        "numeros": len(pool),
+        "total": total,
+        "acceptees": acceptees,
+        "probabilite": acceptees / total if total else 0.0,
+        # Nombre moyen de tirages uniformes pour obtenir UNE combinaison valide
+        "essais_moyens": (total / acceptees) if acceptees else None,
+        "marginales": {
+            nom: {"acceptees": marginales[nom], "probabilite": marginales[nom] / total if total else 0.0}
+            for nom in NOMS_CRITERES
+        },
+        "duree": round(time.perf_counter() - t0, 3),
+    }
+
+def valider_config(cfg, mediane=25, probabilite_min=1e-4):
+    """Lève ValueError si la configuration n'admet (presque) aucune combinaison."""
+    res = compter_acceptees(cfg, mediane)
+    if res["probabilite"] < probabilite_min:
+        raise ValueError(
+            f"Configuration {cfg['nom']} trop restrictive: "
+            f"{res['acceptees']} / {res['total']} combinaisons admises"
+        )
+    return res
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fraction exacte de combinaisons admises par config.")
+    parser.add_argument("loteries", nargs="*", help=f"ids parmi {', '.join(sorted(LOTERIES))} (défaut: toutes)")
+    parser.add_argument("--mediane", type=int, help="médiane Petit/Grand (défaut: celle de l'historique)")
+    args = parser.parse_args(argv)
+    inconnues = [lid for lid in args.loteries if lid not in LOTERIES]
+    if inconnues:
+        parser.error(f"loterie(s) inconnue(s): {', '.join(inconnues)}")
+
+    rapport = {}
+    for lid in args.loteries or list(LOTERIES):
+        cfg = LOTERIES[lid]
+        mediane = args.mediane or calculer_mediane(get_historique_path(cfg), cfg["nombre_numeros"])
+        rapport[lid] = compter_acceptees(cfg, mediane)
+    sys.stdout.write(json.dumps(rapport, ensure_ascii=False, indent=2) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Profilage à la demande et journal des requêtes lentes.
+
+- Profileur: cProfile sur une requête, écrit un fichier .prof (lisible avec
+  pstats ou snakeviz) dans un dossier borné aux N derniers profils. Un seul
+  profil à la fois par processus: une requête qui arrive pendant un profil
+  n'est pas profilée (pas d'attente, pas de conflit entre profileurs).
+- journal_requete_lente: une ligne JSON par requête au-delà du seuil, sur le
+  logger "loto.lent" (stderr, ou fichier si JOURNAL_LENT est défini).
+
+Rien n'est fait tant que le profilage n'est pas demandé: le coût hors profil se
+limite à deux lectures d'horloge par requête.
+"""
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+
+journal_lent = logging.getLogger("loto.lent")
+
+def configurer_journal(fichier=None):
+    """Handler du journal des requêtes lentes (une seule fois par processus)."""
+    if journal_lent.handlers:
+        return
+    handler = logging.FileHandler(fichier, encoding="utf-8") if fichier else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    journal_lent.addHandler(handler)
+    journal_lent.setLevel(logging.INFO)
+    journal_lent.propagate = False
+
+def journal_requete_lente(entree):
+    journal_lent.warning(json.dumps(entree, ensure_ascii=False, default=str))
+
+# --- Profil cProfile d'une requête ---
+class Profileur:
+    def __init__(self, dossier, max_fichiers=50):
+        self.dossier = dossier
+        self.max_fichiers = max_fichiers
+        self._lock = threading.Lock()
+
+    def demarrer(self):
+        """Profile actif, ou None si un autre profil est déjà en cours."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            # Autre outil de profilage déjà actif sur ce processus
+            self._lock.release()
+            return None
+        return prof
+
+    def arreter(self, prof, etiquette):
+        """Arrête le profil, l'écrit sur disque et retourne le nom du fichier."""
+        try:
+            prof.disable()
+            os.makedirs(self.dossier, exist_ok=True)
+            nom = f"{time.strftime('%Y%m%d-%H%M%S')}_{etiquette}_{os.getpid()}_{threading.get_ident()}.prof"
+            prof.dump_stats(os.path.join(self.dossier, nom))
+            self._purger()
+            return nom
+        finally:
+            self._lock.release()
+
+    def _purger(self):
+        fichiers = sorted(
+            (os.path.join(self.dossier, f) for f in os.listdir(self.dossier) if f.endswith(".prof")),
+            key=os.path.getmtime,
+        )
+        for f in fichiers[:max(0, len(fichiers) - self.max_fichiers)]:
+            try:
+                os.remove(f)
+            except OSError:
+                pass
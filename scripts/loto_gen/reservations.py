@@ -0,0 +1,135 @@
+"""
+Réservation des combinaisons générées dans un fichier SQLite partagé.
+
+combis_deja (generer_par_blocs) ne déduplique qu'un appel: deux workers, ou deux
+instances montées sur le même disque, peuvent rendre la même combinaison. Chaque
+bloc terminé est donc réservé d'un coup (une transaction, un aller-retour par
+bloc): tout le bloc passe, ou rien n'est écrit et les combinaisons déjà prises
+sont renvoyées pour être exclues avant de refaire le bloc. La génération reste
+parallèle; seule l'écriture du bloc est sérialisée, le temps d'une transaction.
+
+Clé = (loterie, masque de bits de la combinaison). Activé par RESERVATIONS_DB
+(chemin du fichier); sans cette variable, pas de coordination (comportement
+d'origine).
+
+Les réservations expirent après RESERVATIONS_DUREE_JOURS jours (défaut 30,
+0 = jamais): purge à l'ouverture du store puis au plus une fois par
+PURGE_INTERVALLE pendant les réservations. Une combinaison expirée peut être
+rendue de nouveau.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+# Secondes entre deux purges des réservations expirées (par processus)
+PURGE_INTERVALLE = 3600
+
+class Reservations:
+    def __init__(self, chemin, attente=30.0, duree=None):
+        """duree: secondes de validité d'une réservation (None = sans expiration)."""
+        self.chemin = chemin
+        self.attente = attente
+        self.duree = duree
+        self._prochaine_purge = 0.0
+        self._local = threading.local()
+        dossier = os.path.dirname(os.path.abspath(chemin))
+        os.makedirs(dossier, exist_ok=True)
+        con = self._connexion_neuve()
+        try:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS reservations ("
+                " loterie TEXT NOT NULL, masque INTEGER NOT NULL, cree REAL NOT NULL,"
+                " PRIMARY KEY (loterie, masque)) WITHOUT ROWID"
+            )
+        finally:
+            con.close()
+        self._purger_expirees()
+
+    def _connexion_neuve(self):
+        con = sqlite3.connect(self.chemin, timeout=self.attente, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        return con
+
+    def _connexion(self):
+        # Une connexion par thread et par processus (les workers gunicorn sont forkés)
+        con = getattr(self._local, "con", None)
+        if con is None or self._local.pid != os.getpid():
+            con = self._connexion_neuve()
+            self._local.con = con
+            self._local.pid = os.getpid()
+        return con
+
+    @staticmethod
+    def _masque(comb):
+        m = 0
+        for x in comb:
+            m |= 1 << x
+        return m
+
+    def reserver(self, loterie, combinaisons):
+        """
+        Réserve toutes les combinaisons ou aucune.
+        Retourne la liste de celles déjà réservées (vide = tout est réservé).
+        """
+        self._purger_expirees()
+        con = self._connexion()
+        maintenant = time.time()
+        prises = []
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            for comb in combinaisons:
+                cur = con.execute(
+                    "INSERT OR IGNORE INTO reservations (loterie, masque, cree) VALUES (?, ?, ?)",
+                    (loterie, self._masque(comb), maintenant),
+                )
+                if cur.rowcount == 0:
+                    prises.append(comb)
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("ROLLBACK" if prises else "COMMIT")
+        return prises
+
+    def liberer(self, loterie, combinaisons):
+        con = self._connexion()
+        con.executemany(
+            "DELETE FROM reservations WHERE loterie = ? AND masque = ?",
+            [(loterie, self._masque(c)) for c in combinaisons],
+        )
+
+    def purger(self, avant):
+        """Supprime les réservations créées avant le timestamp 'avant'; retourne leur nombre."""
+        return self._connexion().execute("DELETE FROM reservations WHERE cree < ?", (avant,)).rowcount
+
+    def _purger_expirees(self):
+        if not self.duree:
+            return
+        maintenant = time.time()
+        if maintenant < self._prochaine_purge:
+            return
+        self._prochaine_purge = maintenant + PURGE_INTERVALLE
+        self.purger(maintenant - self.duree)
+
+    def compter(self, loterie=None):
+        con = self._connexion()
+        if loterie is None:
+            return con.execute("SELECT COUNT(*) FROM reservations").fetchone()[0]
+        return con.execute("SELECT COUNT(*) FROM reservations WHERE loterie = ?", (loterie,)).fetchone()[0]
+
+_partagees = None
+_partagees_lock = threading.Lock()
+
+def reservations_partagees():
+    """Store désigné par RESERVATIONS_DB (un par processus), None si non configuré."""
+    global _partagees
+    chemin = os.environ.get("RESERVATIONS_DB")
+    if not chemin:
+        return None
+    if _partagees is None or _partagees.chemin != chemin:
+        with _partagees_lock:
+            if _partagees is None or _partagees.chemin != chemin:
+                jours = float(os.environ.get("RESERVATIONS_DUREE_JOURS", "30"))
+                _partagees = Reservations(chemin, duree=jours * 86400 if jours > 0 else None)
+    return _partagees
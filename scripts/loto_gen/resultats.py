@@ -0,0 +1,90 @@
+"""
+Conteneur compact des combinaisons générées.
+
+Au lieu d'une liste de (bloc_id, tuple, bool) puis d'une liste de dicts
+{bloc, combinaison, etoile}, les résultats sont rangés dans trois tampons
+contigus: numéros de bloc (u32), numéros (u8, 'taille' par combinaison) et
+drapeaux étoile (u8). Environ 12 octets par combinaison Lotto Max au lieu de
+~1 Ko d'objets Python (tuple de la combinaison, triplet, dict).
+
+Le conteneur s'itère toujours comme l'ancienne liste, en (bloc_id, tuple,
+etoile), pour l'affichage, l'enregistrement et les simulations. Les sorties
+(json, colonnes, binaire) lisent directement les tampons, au moment de la
+sérialisation.
+"""
+import sys
+from array import array
+
+class BlocsGeneres:
+    __slots__ = ("taille", "blocs", "numeros", "etoiles")
+
+    def __init__(self, taille):
+        self.taille = taille
+        self.blocs = array("I")
+        self.numeros = bytearray()
+        self.etoiles = bytearray()
+
+    def ajouter(self, bloc, comb, etoile):
+        self.blocs.append(bloc)
+        self.numeros += bytes(comb)
+        self.etoiles.append(1 if etoile else 0)
+
+    def __len__(self):
+        return len(self.blocs)
+
+    def combinaison(self, i):
+        return tuple(self.numeros[i * self.taille:(i + 1) * self.taille])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.blocs[i], self.combinaison(i), bool(self.etoiles[i])
+
+    def __iter__(self):
+        t = self.taille
+        nums = self.numeros
+        for i, (bloc, etoile) in enumerate(zip(self.blocs, self.etoiles)):
+            yield bloc, tuple(nums[i * t:(i + 1) * t]), bool(etoile)
+
+    def __repr__(self):
+        return f"BlocsGeneres({len(self)} combinaisons de {self.taille})"
+
+    def nbytes(self):
+        """Octets des tampons (hors en-têtes des objets)."""
+        return self.blocs.itemsize * len(self.blocs) + len(self.numeros) + len(self.etoiles)
+
+    # --- Sérialisation ---
+    def en_dicts(self):
+        """Ancienne forme [{bloc, combinaison, etoile}, ...]."""
+        return [{"bloc": b, "combinaison": c, "etoile": e} for b, c, e in self]
+
+    def en_json(self):
+        """Même JSON que en_dicts (clés triées, compact), sans créer les dicts."""
+        t = self.taille
+        nums = self.numeros
+        return "[" + ",".join(
+            f'{{"bloc":{bloc},"combinaison":[{",".join(map(str, nums[i * t:(i + 1) * t]))}],'
+            f'"etoile":{"true" if etoile else "false"}}}'
+            for i, (bloc, etoile) in enumerate(zip(self.blocs, self.etoiles))
+        ) + "]"
+
+    def en_colonnes(self):
+        t = self.taille
+        return {
+            "bloc": self.blocs.tolist(),
+            "combinaison": [list(self.numeros[i:i + t]) for i in range(0, len(self.numeros), t)],
+            "etoile": [bool(e) for e in self.etoiles],
+        }
+
+    def blocs_octets(self):
+        """Numéros de bloc en u16 little-endian (format binaire)."""
+        if self.blocs and max(self.blocs) > 0xFFFF:
+            raise ValueError("Format binaire: numéros de bloc limités à 65535")
+        blocs = array("H", self.blocs)
+        if sys.byteorder == "big":
+            blocs.byteswap()
+        return blocs.tobytes()
@@ -0,0 +1,193 @@
+import random
+import time
+from array import array
+from itertools import combinations
+from math import comb as binomial
+
+from .config import compiler
+from .cache import contexte_loterie
+
+# --- Roue (design couvrant) : N tickets qui couvrent un maximum de t-uplets ---
+#
+# Chaque t-uplet de numéros du pool a un rang (système combinatoire, ordre colex).
+# On garde, pour chaque rang, le nombre de tickets qui le contiennent: un échange
+# de numéro dans un ticket ne touche que les t-uplets qui contiennent l'ancien ou
+# le nouveau numéro, donc le gain d'un mouvement se calcule sans tout recompter.
+
+# Nb max de t-uplets suivis (C(taille du pool, garantie)): borne la mémoire d'une requête
+T_UPLETS_MAX = 1_000_000
+# Compteurs de couverture en u16: un t-uplet ne peut pas être dans plus de tickets
+TICKETS_MAX = 65535
+# Pool assez petit (C(pool, taille)) pour énumérer ses tickets valides au lieu de les tirer au hasard
+ENUMERATION_MAX = 100_000
+
+AUCUN_TICKET = "Aucun ticket de ce pool ne respecte les critères (hors historique et proposés): élargir 'numeros'"
+
+def _table_binomiale(n, t):
+    return [[binomial(i, j) for j in range(t + 1)] for i in range(n + 1)]
+
+def _rang(positions, binom):
+    """Rang colex d'un t-uplet donné par ses positions TRIÉES dans le pool."""
+    return sum(binom[p][i + 1] for i, p in enumerate(positions))
+
+def generer_roue(cfg, nb_tickets, garantie=3, numeros=None, delai=3.0, essais_glouton=200):
+    """
+    Construit nb_tickets combinaisons (respectant verifier_criteres et absentes de
+    l'historique/des proposés) qui maximisent le nombre de t-uplets couverts,
+    t = garantie: si t numéros tirés font partie d'un t-uplet couvert, au moins un
+    ticket les contient tous les t.
+
+    Glouton (meilleur de essais_glouton candidats par ticket) puis recherche locale
+    par échange de numéros jusqu'à 'delai' secondes. Si le pool ne donne plus de
+    ticket valide avant le délai, le rapport est 'partiel'.
+    Retourne (tickets, rapport_couverture); ValueError si le pool ne peut donner
+    aucun ticket valide.
+    """
+    taille = cfg["nombre_numeros"]
+    debut, fin = cfg["plage_numeros"]
+    if numeros:
+        pool = sorted(set(int(x) for x in numeros))
+        if pool[0] < debut or pool[-1] > fin:
+            raise ValueError(f"Numéros hors plage {debut}-{fin}")
+    else:
+        pool = list(range(debut, fin + 1))
+    if not 2 <= garantie <= taille:
+        raise ValueError(f"garantie doit être entre 2 et {taille}")
+    if len(pool) < taille:
+        raise ValueError(f"Il faut au moins {taille} numéros dans le pool")
+    if not 1 <= nb_tickets <= TICKETS_MAX:
+        raise ValueError(f"nb_tickets doit être entre 1 et {TICKETS_MAX}")
+    if binomial(len(pool), garantie) > T_UPLETS_MAX:
+        raise ValueError(
+            f"C({len(pool)}, {garantie}) = {binomial(len(pool), garantie)} t-uplets: au-delà de {T_UPLETS_MAX}, "
+            "réduire la garantie ou le pool de numéros"
+        )
+
+    fin_recherche = time.monotonic() + max(0.0, float(delai))
+
+    ctx = contexte_loterie(cfg)
+    historique, propositions, mediane = ctx["historique"], ctx["proposes"], ctx["mediane"]
+    passe = compiler(cfg).passe
+
+    v = len(pool)
+    position = {n: i for i, n in enumerate(pool)}
+    binom = _table_binomiale(v, garantie)
+    couverture = array("H", bytes(2 * binom[v][garantie]))
+    couverts = 0
+
+    def valide(cand, deja):
+        return not (
+            cand in historique
+            or cand in propositions
+            or cand in deja
+            or not passe(cand, mediane)
+        )
+
+    def rangs_de(ticket):
+        pos = [position[x] for x in ticket]  # ticket trié -> positions triées
+        return [_rang(s, binom) for s in combinations(pos, garantie)]
+
+    valides = None
+    if binomial(v, taille) <= ENUMERATION_MAX:
+        # Petit pool: on tire parmi ses tickets valides, et on sait tout de suite s'il n'y en a aucun
+        valides = [c for c in combinations(pool, taille) if valide(c, ())]
+        if not valides:
+            raise ValueError(AUCUN_TICKET)
+        rang_valide = {c: i for i, c in enumerate(valides)}
+
+    def tirer():
+        if valides is not None:
+            return random.choice(valides)
+        return tuple(sorted(random.sample(pool, taille)))
+
+    def retirer(ticket):
+        # Ticket pris: on ne le tire plus (échange avec le dernier, puis pop)
+        if valides is not None:
+            i = rang_valide.pop(ticket)
+            dernier = valides.pop()
+            if i < len(valides):
+                valides[i] = dernier
+                rang_valide[dernier] = i
+
+    # 1) Glouton: chaque ticket ajouté est le meilleur d'un échantillon de candidats valides
+    tickets = []
+    deja = set()
+    for _ in range(nb_tickets):
+        if valides is not None and not valides:
+            break
+        meilleur, meilleur_gain = None, -1
+        for _ in range(essais_glouton):
+            cand = tirer()
+            if not valide(cand, deja):
+                continue
+            gain = sum(1 for r in rangs_de(cand) if couverture[r] == 0)
+            if gain > meilleur_gain:
+                meilleur, meilleur_gain = cand, gain
+        # Échantillon sans ticket valide (pool restrictif): on insiste jusqu'au délai
+        while meilleur is None and time.monotonic() < fin_recherche:
+            cand = tirer()
+            if valide(cand, deja):
+                meilleur = cand
+        if meilleur is None:
+            break
+        for r in rangs_de(meilleur):
+            if couverture[r] == 0:
+                couverts += 1
+            couverture[r] += 1
+        tickets.append(meilleur)
+        deja.add(meilleur)
+        retirer(meilleur)
+
+    # 2) Recherche locale: remplacer x par y dans un ticket si ça ne fait pas baisser la couverture
+    mouvements = 0
+    while tickets and time.monotonic() < fin_recherche and couverts < len(couverture):
+        for _ in range(256):
+            idx = random.randrange(len(tickets))
+            ticket = tickets[idx]
+            x = random.choice(ticket)
+            y = random.choice(pool)
+            if y in ticket:
+                continue
+            reste = [position[n] for n in ticket if n != x]
+            px, py = position[x], position[y]
+            perdus, gagnes = [], []
+            for s in combinations(reste, garantie - 1):
+                rx = _rang(sorted(s + (px,)), binom)
+                ry = _rang(sorted(s + (py,)), binom)
+                perdus.append(rx)
+                gagnes.append(ry)
+            delta = (sum(1 for r in gagnes if couverture[r] == 0)
+                     - sum(1 for r in perdus if couverture[r] == 1))
+            if delta < 0:
+                continue
+            nouveau = tuple(sorted([n for n in ticket if n != x] + [y]))
+            if not valide(nouveau, deja):
+                continue
+            for r in perdus:
+                couverture[r] -= 1
+                if couverture[r] == 0:
+                    couverts -= 1
+            for r in gagnes:
+                if couverture[r] == 0:
+                    couverts += 1
+                couverture[r] += 1
+            deja.discard(ticket)
+            deja.add(nouveau)
+            tickets[idx] = nouveau
+            mouvements += 1
+
+    if not tickets:
+        raise ValueError(AUCUN_TICKET)
+
+    rapport = {
+        "partiel": len(tickets) < nb_tickets,
+        "garantie": garantie,
+        "pool": pool,
+        "tickets": len(tickets),
+        "tickets_demandes": nb_tickets,
+        "t_uplets_total": len(couverture),
+        "t_uplets_couverts": couverts,
+        "couverture": couverts / len(couverture) if couverture else 0.0,
+        "mouvements": mouvements,
+    }
+    return tickets, rapport
@@ -0,0 +1,87 @@
+import threading
+
+import numpy as np
+
+from .analytique import masques, popcount, ELEMENTS_PAR_MORCEAU
+from .historique_dates import historique_dates
+
+# --- Index de similarité: tous les tirages (lots bonis compris) en masques uint64 contigus ---
+class IndexSimilarite:
+    def __init__(self, histo):
+        self.histo = histo
+        self.masques = masques(histo.tirages)
+
+    def completer(self):
+        """L'historique daté a grandi (ajout en fin): on n'encode que les nouveaux tirages."""
+        n = len(self.masques)
+        if n < len(self.histo):
+            self.masques = np.concatenate([self.masques, masques(self.histo.tirages[n:])])
+
+    def _tirage(self, pos, communs):
+        return {
+            "position": int(pos),
+            "date": self.histo.dates[pos],
+            "combinaison": list(self.histo.tirages[pos]),
+            "communs": int(communs),
+        }
+
+    def _selection(self, communs, top, minimum, limite):
+        """Positions retenues, triées par nb de numéros communs puis du plus récent au plus ancien."""
+        # Clé unique (communs, position): départage les ex-aequo sans tri complet
+        cle = communs.astype(np.int64) * len(communs) + np.arange(len(communs))
+        if minimum is not None:
+            pos = np.flatnonzero(communs >= minimum)
+        else:
+            top = min(top, len(communs))
+            pos = np.argpartition(-cle, top - 1)[:top] if top else np.zeros(0, dtype=np.intp)
+        return pos[np.argsort(-cle[pos])][:limite]
+
+    def _resultat(self, communs, taille, top, minimum, limite):
+        pos = self._selection(communs, top, minimum, limite)
+        return {
+            "meilleur": int(communs.max()) if len(communs) else 0,
+            "distribution": {k: int(v) for k, v in enumerate(np.bincount(communs, minlength=taille + 1)[:taille + 1])},
+            "tirages": [self._tirage(p, communs[p]) for p in pos],
+        }
+
+    def requete(self, combinaison, taille, top=10, minimum=None, limite=1000):
+        """Tirages les plus proches d'une combinaison: top-N, ou tous ceux avec >= minimum communs."""
+        q = masques([combinaison])[0]
+        return self._resultat(popcount(self.masques & q), taille, top, minimum, limite)
+
+    def requetes(self, combinaisons, taille, top=10, minimum=None, limite=1000,
+                 elements_par_morceau=ELEMENTS_PAR_MORCEAU):
+        """Même chose pour plusieurs tickets: matrice tickets x tirages traitée par paquets."""
+        qs = masques(combinaisons)
+        pas = max(1, elements_par_morceau // max(1, len(self.masques)))
+        res = []
+        for debut in range(0, len(qs), pas):
+            communs = popcount(qs[debut:debut + pas, None] & self.masques[None, :])
+            res.extend(self._resultat(ligne, taille, top, minimum, limite) for ligne in communs)
+        return res
+
+# Un index par loterie, suit l'historique daté (reconstruit si celui-ci l'est)
+_index = {}
+_index_lock = threading.Lock()
+
+def index_similarite(cfg):
+    histo = historique_dates(cfg, bonis=True)
+    idx = _index.get(cfg["nom"])
+    if idx is not None and idx.histo is histo and len(idx.masques) == len(histo):
+        return idx
+    with _index_lock:
+        idx = _index.get(cfg["nom"])
+        if idx is None or idx.histo is not histo:
+            idx = IndexSimilarite(histo)
+            _index[cfg["nom"]] = idx
+        else:
+            idx.completer()
+        return idx
+
+def plus_proches(cfg, combinaisons, top=10, minimum=None):
+    """Une combinaison (liste d'entiers) -> dict; une liste de combinaisons -> liste de dicts."""
+    taille = cfg["nombre_numeros"]
+    idx = index_similarite(cfg)
+    if combinaisons and isinstance(combinaisons[0], (list, tuple)):
+        return idx.requetes([tuple(sorted(int(x) for x in c)) for c in combinaisons], taille, top, minimum)
+    return idx.requete(tuple(sorted(int(x) for x in combinaisons)), taille, top, minimum)
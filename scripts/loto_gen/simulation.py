@@ -0,0 +1,196 @@
+"""
+Backtest Monte Carlo: blocs générés vs tickets uniformes, sur tout l'historique.
+
+Chaque simulation génère un jeu de blocs avec generer_par_blocs et, pour
+comparaison, autant de tickets tirés uniformément; les deux jeux sont confrontés
+à tous les tirages passés (analytique.distribution_correspondances, matrice
+traitée par paquets). Par stratégie et par rang k (nb de numéros communs), on
+agrège au fil de l'eau:
+  - paires[k]   : couples (ticket, tirage) avec exactement k numéros communs
+  - au_moins[k] : tirages où au moins un ticket a >= k numéros communs
+sous forme de moyenne / écart-type / min / max (Welford, fusion de Chan): la
+mémoire ne dépend pas du nombre de simulations. Les simulations sont réparties
+par paquets entre processus et les agrégats partiels fusionnés dès leur retour.
+
+Usage (depuis la racine du projet):
+    python -m scripts.loto_gen.simulation 2 --simulations 200 --blocs 5
+    python -m scripts.loto_gen.simulation 1 --simulations 1000 --format csv --sortie backtest.csv
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from math import sqrt
+
+from .generateur_ultra_plus import LOTERIES, generer_par_blocs
+from .analytique import masques, masques_historique, distribution_correspondances
+
+STRATEGIES = ("blocs", "uniforme")
+
+# --- Agrégat en ligne (moyenne, variance, bornes) fusionnable entre processus ---
+class Agregat:
+    __slots__ = ("n", "moyenne", "m2", "min", "max")
+
+    def __init__(self):
+        self.n = 0
+        self.moyenne = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def ajouter(self, x):
+        self.n += 1
+        d = x - self.moyenne
+        self.moyenne += d / self.n
+        self.m2 += d * (x - self.moyenne)
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+
+    def fusionner(self, autre):
+        if not autre.n:
+            return
+        if not self.n:
+            self.n, self.moyenne, self.m2, self.min, self.max = autre.n, autre.moyenne, autre.m2, autre.min, autre.max
+            return
+        n = self.n + autre.n
+        d = autre.moyenne - self.moyenne
+        self.moyenne += d * autre.n / n
+        self.m2 += autre.m2 + d * d * self.n * autre.n / n
+        self.n = n
+        self.min = min(self.min, autre.min)
+        self.max = max(self.max, autre.max)
+
+    def resume(self):
+        return {
+            "n": self.n,
+            "moyenne": self.moyenne,
+            "ecart_type": sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0,
+            "min": self.min,
+            "max": self.max,
+        }
+
+def _agregats_vides(taille):
+    return {
+        s: {"paires": [Agregat() for _ in range(taille + 1)], "au_moins": [Agregat() for _ in range(taille + 1)]}
+        for s in STRATEGIES
+    }
+
+def _fusionner(total, partiel):
+    for s, metriques in partiel.items():
+        for metrique, agregats in metriques.items():
+            for a, b in zip(total[s][metrique], agregats):
+                a.fusionner(b)
+
+# --- Une simulation ---
+def _tickets_uniformes(cfg, nb):
+    debut, fin = cfg["plage_numeros"]
+    numeros = range(debut, fin + 1)
+    return [tuple(sorted(random.sample(numeros, cfg["nombre_numeros"]))) for _ in range(nb)]
+
+def _tickets_blocs(cfg, nb_total):
+    with contextlib.redirect_stdout(io.StringIO()):
+        res, _ = generer_par_blocs(cfg, nb_total)
+    return [comb for _, comb, _ in res]
+
+def _simuler_paquet(lid, nb_blocs, nb_simulations, graine):
+    """Exécuté dans un processus: nb_simulations simulations -> agrégats partiels."""
+    random.seed(graine)
+    cfg = LOTERIES[lid]
+    taille = cfg["nombre_numeros"]
+    hist = masques_historique(cfg)
+    nb_total = nb_blocs * (cfg["par_bloc_base"] + 1)
+    agregats = _agregats_vides(taille)
+    for _ in range(nb_simulations):
+        blocs = _tickets_blocs(cfg, nb_total)
+        jeux = {"blocs": blocs, "uniforme": _tickets_uniformes(cfg, len(blocs))}
+        for s, tickets in jeux.items():
+            dist = distribution_correspondances(hist, masques(tickets), taille)
+            for k in range(taille + 1):
+                agregats[s]["paires"][k].ajouter(dist["paires"][k])
+                agregats[s]["au_moins"][k].ajouter(dist["au_moins"].get(k, dist["tirages"]))
+    return agregats
+
+# --- Moteur ---
+def simuler(lid, nb_simulations=100, nb_blocs=5, processus=None, paquet=10, graine=None):
+    """
+    Lance nb_simulations simulations pour la loterie lid, par paquets de 'paquet'
+    répartis sur 'processus' processus (défaut: nb de CPU; 1 = dans ce processus).
+    """
+    cfg = LOTERIES[lid]
+    taille = cfg["nombre_numeros"]
+    t0 = time.perf_counter()
+    rng = random.Random(graine)
+    paquets = []
+    reste = nb_simulations
+    while reste > 0:
+        n = min(paquet, reste)
+        paquets.append((lid, nb_blocs, n, rng.getrandbits(64)))
+        reste -= n
+
+    total = _agregats_vides(taille)
+    processus = processus or os.cpu_count() or 1
+    if processus == 1:
+        for p in paquets:
+            _fusionner(total, _simuler_paquet(*p))
+    else:
+        with ProcessPoolExecutor(max_workers=processus) as ex:
+            for fut in as_completed([ex.submit(_simuler_paquet, *p) for p in paquets]):
+                _fusionner(total, fut.result())
+
+    return {
+        "loterie": lid,
+        "nom": cfg["nom"],
+        "simulations": nb_simulations,
+        "blocs": nb_blocs,
+        "tickets_par_simulation": nb_blocs * (cfg["par_bloc_base"] + 1),
+        "tirages": len(masques_historique(cfg)),
+        "strategies": {
+            s: {metrique: {k: a.resume() for k, a in enumerate(agregats)} for metrique, agregats in metriques.items()}
+            for s, metriques in total.items()
+        },
+        "duree": round(time.perf_counter() - t0, 3),
+    }
+
+# --- Exports ---
+def en_lignes_csv(rapport):
+    """Rapport -> lignes (strategie, metrique, k, n, moyenne, ecart_type, min, max)."""
+    lignes = [["loterie", "strategie", "metrique", "k", "n", "moyenne", "ecart_type", "min", "max"]]
+    for s, metriques in rapport["strategies"].items():
+        for metrique, par_k in metriques.items():
+            for k, r in par_k.items():
+                lignes.append([rapport["nom"], s, metrique, k, r["n"], r["moyenne"], r["ecart_type"], r["min"], r["max"]])
+    return lignes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest Monte Carlo des blocs générés vs tickets uniformes.")
+    parser.add_argument("loterie", help=f"id parmi {', '.join(sorted(LOTERIES))}")
+    parser.add_argument("--simulations", type=int, default=100)
+    parser.add_argument("--blocs", type=int, default=5, help="blocs par simulation")
+    parser.add_argument("--processus", type=int, help="défaut: nb de CPU (1 = sans multiprocessing)")
+    parser.add_argument("--paquet", type=int, default=10, help="simulations par tâche envoyée à un processus")
+    parser.add_argument("--graine", type=int)
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    parser.add_argument("--sortie", help="fichier (défaut: stdout)")
+    args = parser.parse_args(argv)
+    if args.loterie not in LOTERIES:
+        parser.error(f"loterie inconnue: {args.loterie}")
+
+    rapport = simuler(args.loterie, args.simulations, args.blocs, args.processus, args.paquet, args.graine)
+    sortie = open(args.sortie, "w", encoding="utf-8", newline="") if args.sortie else sys.stdout
+    try:
+        if args.format == "csv":
+            csv.writer(sortie).writerows(en_lignes_csv(rapport))
+        else:
+            sortie.write(json.dumps(rapport, ensure_ascii=False, indent=2) + "\n")
+    finally:
+        if args.sortie:
+            sortie.close()
+
+if __name__ == "__main__":
+    main()
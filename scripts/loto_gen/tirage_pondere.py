@@ -0,0 +1,156 @@
+import math
+import random
+
+import numpy as np
+
+from .historique_dates import historique_dates
+
+# --- Poids des numéros d'après l'historique daté ---
+SCHEMAS = ("chaud", "froid", "retard")
+# Exposant des poids: 0 = uniforme; au-delà de FORCE_MAX, les poids débordent ou écrasent le tirage
+FORCE_MAX = 5.0
+
+def poids_numeros(cfg, reglage):
+    """
+    reglage = {"schema": "chaud|froid|retard", "derniers": 100, "force": 1.0}
+    - chaud : proportionnel à (fréquence + 1) sur la fenêtre
+    - froid : proportionnel à 1 / (fréquence + 1)
+    - retard: proportionnel à (tirages depuis la dernière sortie + 1)
+    Retourne une liste indexée par numéro (index 0 et hors plage: 0), poids ** force,
+    avec 0 <= force <= FORCE_MAX (ValueError sinon).
+    """
+    schema = reglage.get("schema", "chaud")
+    if schema not in SCHEMAS:
+        raise ValueError(f"ponderation.schema doit être parmi {', '.join(SCHEMAS)}")
+    try:
+        force = float(reglage.get("force", 1.0))
+    except (TypeError, ValueError):
+        force = math.nan
+    if not (math.isfinite(force) and 0 <= force <= FORCE_MAX):
+        raise ValueError(f"ponderation.force doit être un nombre entre 0 et {FORCE_MAX:g}")
+    debut, fin = cfg["plage_numeros"]
+    histo = historique_dates(cfg)
+
+    if schema == "retard":
+        retards = histo.retards()
+        jamais = len(histo)
+        brut = {n: (r["retard"] if r["retard"] is not None else jamais) + 1 for n, r in retards.items()}
+    else:
+        freq = histo.frequences(reglage.get("derniers"), reglage.get("depuis"))["frequences"]
+        brut = {n: (f + 1) if schema == "chaud" else 1.0 / (f + 1) for n, f in freq.items()}
+
+    poids = [0.0] * (fin + 1)
+    for n in range(debut, fin + 1):
+        poids[n] = float(brut.get(n, 1)) ** force
+    return poids
+
+# --- Tirage pondéré sans remise (arbre de Fenwick sur les numéros) ---
+class TiragePondere:
+    """
+    Tire des numéros sans remise selon leurs poids. Retirer un numéro du pool
+    (dispo) et tirer un numéro coûtent O(log n); reinitialiser() remet tout le
+    pool (nouveau bloc) en O(n).
+    """
+
+    def __init__(self, poids):
+        self.base = [float(w) for w in poids]
+        self.n = len(self.base) - 1
+        self._pas = 1 << (self.n.bit_length() - 1) if self.n else 0
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        n = self.n
+        arbre = list(self.base)
+        arbre[0] = 0.0
+        for i in range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                arbre[j] += arbre[i]
+        self.arbre = arbre
+        self.poids = list(self.base)
+        self.total = sum(self.base[1:])
+
+    def _maj(self, i, delta):
+        arbre, n = self.arbre, self.n
+        while i <= n:
+            arbre[i] += delta
+            i += i & -i
+
+    def retirer(self, x):
+        w = self.poids[x]
+        if w:
+            self.poids[x] = 0.0
+            self._maj(x, -w)
+            self.total -= w
+
+    def _remettre(self, x, w):
+        self.poids[x] = w
+        self._maj(x, w)
+        self.total += w
+
+    def _trouver(self, u):
+        arbre, n = self.arbre, self.n
+        pos, pas = 0, self._pas
+        while pas:
+            suivant = pos + pas
+            if suivant <= n and arbre[suivant] <= u:
+                pos = suivant
+                u -= arbre[suivant]
+            pas >>= 1
+        return pos + 1
+
+    # Rejets tolérés (doublons) avant de passer au tirage avec retrait temporaire
+    REJETS_MAX = 16
+
+    def echantillon(self, k):
+        """
+        k numéros distincts du pool courant (le pool n'est pas modifié).
+        Tirage avec remise + rejet des doublons: même loi que le tirage successif
+        sans remise, sans toucher à l'arbre; si les poids sont trop concentrés
+        (trop de rejets), on retire temporairement les numéros tirés.
+        """
+        arbre, n, pas0, total, poids = self.arbre, self.n, self._pas, self.total, self.poids
+        if total <= 0:
+            raise ValueError("Pool pondéré épuisé")
+        pris = []
+        rejets = 0
+        while len(pris) < k:
+            u = random.random() * total
+            pos, pas = 0, pas0
+            while pas:
+                suivant = pos + pas
+                if suivant <= n and arbre[suivant] <= u:
+                    pos = suivant
+                    u -= arbre[suivant]
+                pas >>= 1
+            x = pos + 1
+            # Arrondi flottant en bout d'arbre, ou numéro déjà pris: on retire au sort
+            if x > n or not poids[x] or x in pris:
+                rejets += 1
+                if rejets > self.REJETS_MAX:
+                    return self._echantillon_avec_retrait(k)
+                continue
+            pris.append(x)
+        return pris
+
+    def _echantillon_avec_retrait(self, k):
+        pris = []
+        try:
+            while len(pris) < k:
+                if self.total <= 0:
+                    raise ValueError("Pool pondéré épuisé")
+                x = self._trouver(random.random() * self.total)
+                if x > self.n or not self.poids[x]:
+                    continue
+                pris.append((x, self.poids[x]))
+                self.retirer(x)
+        finally:
+            for x, w in pris:
+                self._remettre(x, w)
+        return [x for x, _ in pris]
+
+def log_poids(poids):
+    """Poids -> tableau numpy de log-poids (tirage par lots, clés de Gumbel)."""
+    arr = np.asarray(poids, dtype=np.float64)
+    with np.errstate(divide="ignore"):
+        return np.log(arr)
@@ -0,0 +1,98 @@
+import numpy as np
+
+from .cache import contexte_loterie
+from .analytique import masques_historique
+from .criteres_vectorises import evaluer_criteres
+
+# --- Vérification de nombreux blocs (base + étoile) en une passe numpy ---
+def _masques(lignes):
+    """Tableau (n, taille) -> masques uint64 (bit n = numéro n)."""
+    un = np.left_shift(np.uint64(1), lignes.astype(np.uint64))
+    return np.bitwise_or.reduce(un, axis=1)
+
+def _indices(masque_ligne):
+    return [int(i) for i in np.flatnonzero(masque_ligne)]
+
+def verifier_blocs(cfg, blocs, etoile_index=None):
+    """
+    blocs: liste de blocs de par_bloc_base + 1 combinaisons.
+    etoile_index: index de l'étoile (int commun, liste par bloc, défaut: la dernière).
+    Contrôles par bloc: critères de chaque combinaison, doublons de numéros dans la base,
+    nb de numéros de la base réutilisés par l'étoile (>= reutilises_dans_etoile),
+    combinaisons répétées dans la requête, déjà sorties (historique) ou déjà proposées.
+    Lève ValueError si la forme des blocs est invalide.
+    """
+    taille = cfg["nombre_numeros"]
+    debut, fin = cfg["plage_numeros"]
+    par_bloc = cfg["par_bloc_base"] + 1
+    try:
+        arr = np.array(blocs, dtype=np.int64)
+    except (TypeError, ValueError):
+        raise ValueError("blocs doit être une liste de blocs de combinaisons d'entiers de même taille")
+    if arr.ndim != 3 or arr.shape[1:] != (par_bloc, taille):
+        raise ValueError(f"Chaque bloc doit contenir {par_bloc} combinaisons de {taille} numéros")
+    nb = len(arr)
+
+    # Étoile en dernière position de chaque bloc
+    if etoile_index is not None:
+        etoiles = np.broadcast_to(np.asarray(etoile_index, dtype=np.int64), (nb,))
+        if ((etoiles < 0) | (etoiles >= par_bloc)).any():
+            raise ValueError(f"etoileIndex doit être entre 0 et {par_bloc - 1}")
+        ordre = np.tile(np.arange(par_bloc), (nb, 1))
+        ordre[np.arange(nb), etoiles] = par_bloc - 1
+        ordre[:, -1] = etoiles
+        arr = np.take_along_axis(arr, ordre[:, :, None], axis=1)
+
+    arr = np.sort(arr, axis=2)
+    if ((arr < debut) | (arr > fin)).any():
+        raise ValueError(f"Numéros attendus entre {debut} et {fin}")
+    if (np.diff(arr, axis=2) == 0).any():
+        raise ValueError("Numéro répété dans une combinaison")
+
+    ctx = contexte_loterie(cfg)
+    plat = arr.reshape(-1, taille)
+
+    # 1) Critères: un booléen par combinaison et par critère
+    res = evaluer_criteres(plat, cfg, ctx["mediane"])
+    ok = np.ones(len(plat), dtype=bool)
+    for v in res.values():
+        ok &= v
+    ok = ok.reshape(nb, par_bloc)
+
+    # 2) Doublons de numéros dans la base / réutilisation par l'étoile
+    comptes = np.zeros((nb, fin + 1), dtype=np.int16)
+    np.add.at(comptes, (np.repeat(np.arange(nb), (par_bloc - 1) * taille), arr[:, :-1, :].ravel()), 1)
+    dans_base = comptes > 0
+    reutilises = dans_base[np.arange(nb)[:, None], arr[:, -1, :]].sum(axis=1)
+    etoile_ok = reutilises >= cfg["reutilises_dans_etoile"]
+
+    # 3) Combinaisons répétées dans la requête, sorties ou déjà proposées
+    m = _masques(plat)
+    _, inverse, nb_occ = np.unique(m, return_inverse=True, return_counts=True)
+    repetees = (nb_occ[inverse] > 1).reshape(nb, par_bloc)
+    sorties = np.isin(m, masques_historique(cfg)).reshape(nb, par_bloc)
+    proposes = ctx["proposes"]
+    deja_proposees = np.array([tuple(c) in proposes for c in plat.tolist()], dtype=bool).reshape(nb, par_bloc)
+
+    doublons_base = comptes > 1
+    valides = ok.all(axis=1) & ~doublons_base.any(axis=1) & etoile_ok & ~repetees.any(axis=1)
+    rapport = []
+    for b in range(nb):
+        rapport.append({
+            "bloc": b + 1,
+            "valide": bool(valides[b]),
+            "criteres_ko": _indices(~ok[b]),
+            "doublons_base": _indices(doublons_base[b]),
+            "reutilises_etoile": int(reutilises[b]),
+            "etoile_ok": bool(etoile_ok[b]),
+            "repetees": _indices(repetees[b]),
+            "historique": _indices(sorties[b]),
+            "proposees": _indices(deja_proposees[b]),
+        })
+    return {
+        "blocs": nb,
+        "valides": int(valides.sum()),
+        # Détail par critère sur l'ensemble (nb de combinaisons en échec)
+        "echecs_par_critere": {nom: int((~v).sum()) for nom, v in res.items()},
+        "rapport": rapport,
+    }
@@ -0,0 +1,18 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Racine du projet importable ('app', 'scripts.loto_gen'), d'où que pytest soit lancé
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+@pytest.fixture(autouse=True)
+def graine():
+    # Génération aléatoire reproductible (random sert aussi de graine aux tirages numpy)
+    random.seed(1234)
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
@@ -0,0 +1,16 @@
+import pytest
+
+from scripts.loto_gen.generateur_ultra_plus import LOTERIES
+from scripts.loto_gen.probabilites import valider_config
+
+# --- Faisabilité des configurations (vérifiée au démarrage de l'app) ---
+def test_valider_config_restrictive():
+    cfg = LOTERIES["1"]
+    taille = cfg["nombre_numeros"]
+    # Une seule somme possible: celle des 'taille' plus petits numéros
+    somme = sum(range(cfg["plage_numeros"][0], cfg["plage_numeros"][0] + taille))
+    with pytest.raises(ValueError):
+        valider_config({**cfg, "somme_min": somme, "somme_max": somme})
+
+def test_valider_config_loterie():
+    assert valider_config(LOTERIES["1"])["probabilite"] > 0.5
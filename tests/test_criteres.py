@@ -0,0 +1,128 @@
+import random
+from collections import Counter
+
+import pytest
+
+from scripts.loto_gen.cache import contexte_loterie
+from scripts.loto_gen.config import ConfigLoterie
+from scripts.loto_gen.generateur_ultra_plus import LOTERIES, verifier_criteres
+
+# --- Référence: les anciens test_* (comptes sur dict), avant les masques de bits ---
+def ref_pair_impair(comb, cfg):
+    p = sum(1 for x in comb if x % 2 == 0)
+    return (p, len(comb) - p) in cfg["pair_impair_valides"]
+
+def ref_petit_grand(comb, cfg, mediane):
+    petit = sum(1 for x in comb if x <= mediane)
+    return (petit, len(comb) - petit) in cfg["petit_grand_valides"]
+
+def ref_series(comb):
+    count = 0
+    i = 0
+    n = len(comb)
+    while i < n - 1:
+        if comb[i+1] == comb[i] + 1:
+            length = 2
+            j = i + 1
+            while j < n - 1 and comb[j+1] == comb[j] + 1:
+                length += 1
+                j += 1
+            if length > 3:
+                return False
+            count += 1
+            i = j
+        else:
+            i += 1
+    return count <= 2
+
+def ref_dizaines(comb, cfg):
+    groups = [0] * ((cfg["plage_numeros"][1] + 9) // 10)
+    for x in comb:
+        groups[(x - 1) // 10] += 1
+    return all(c <= cfg["groupes_dizaines"] for c in groups)
+
+def ref_somme(comb, cfg):
+    return cfg["somme_min"] <= sum(comb) <= cfg["somme_max"]
+
+def ref_fin_identique(comb, cfg):
+    return all(c <= cfg["fin_identique_max"] for c in Counter(n % 10 for n in comb).values())
+
+def ref_diversite_finales(comb, cfg):
+    return len(set(n % 10 for n in comb)) >= cfg["min_finales"]
+
+def ref_symboliques(comb, cfg):
+    return all(sum(1 for n in comb if n % m == 0) <= cfg["max_par_multi"] for m in range(2, 10))
+
+def ref_criteres(comb, cfg, mediane):
+    return {
+        "Pair/Impair": ref_pair_impair(comb, cfg),
+        "Petit/Grand": ref_petit_grand(comb, cfg, mediane),
+        "Séries": ref_series(comb),
+        "Dizaines": ref_dizaines(comb, cfg),
+        "Somme": ref_somme(comb, cfg),
+        "Fin identique": ref_fin_identique(comb, cfg),
+        "Diversité finales": ref_diversite_finales(comb, cfg),
+        "Symboliques": ref_symboliques(comb, cfg),
+    }
+
+def combinaisons_aleatoires(cfg, n):
+    debut, fin = cfg["plage_numeros"]
+    numeros = range(debut, fin + 1)
+    combs = [tuple(sorted(random.sample(numeros, cfg["nombre_numeros"]))) for _ in range(n)]
+    # Cas limites: séries en début et fin de plage
+    combs.append(tuple(numeros[:cfg["nombre_numeros"]]))
+    combs.append(tuple(numeros[-cfg["nombre_numeros"]:]))
+    return combs
+
+# --- ConfigLoterie.passe et verifier_criteres == anciens critères ---
+@pytest.mark.parametrize("loterie", sorted(LOTERIES))
+def test_passe_identique_aux_anciens_criteres(loterie):
+    cfg = LOTERIES[loterie]
+    mediane = contexte_loterie(cfg)["mediane"]
+    resultats = set()
+    for comb in combinaisons_aleatoires(cfg, 3000):
+        attendu = all(ref_criteres(comb, cfg, mediane).values())
+        assert cfg.passe(comb, mediane) == attendu, comb
+        resultats.add(attendu)
+    assert resultats == {True, False}  # les deux issues sont bien couvertes
+
+@pytest.mark.parametrize("loterie", sorted(LOTERIES))
+def test_verifier_criteres_identique_aux_anciens_criteres(loterie):
+    cfg = LOTERIES[loterie]
+    mediane = contexte_loterie(cfg)["mediane"]
+    combs = combinaisons_aleatoires(cfg, 500)
+    for comb, audit in zip(combs, verifier_criteres([list(c) for c in combs], cfg, mediane)):
+        assert audit == {"Combinaison": comb, **ref_criteres(comb, cfg, mediane)}
+
+# --- Validation des combinaisons saisies ---
+@pytest.mark.parametrize("nums", [
+    [1, 2, 3, 4, 5, 6],            # taille incorrecte
+    [1, 1, 2, 3, 4, 5, 6],         # doublon
+    [0, 2, 3, 4, 5, 6, 7],         # sous la plage
+    [1, 2, 3, 4, 5, 6, 51],        # au-dessus de la plage
+    [1, 2, 3, 4, 5, 6, "x"],       # pas un entier
+])
+def test_combinaison_invalide(nums):
+    with pytest.raises(ValueError):
+        LOTERIES["2"].combinaison(nums)
+
+def test_combinaison_valide_triee():
+    assert LOTERIES["2"].combinaison([7, 3, 50, 1, 20, 9, 33]) == (1, 3, 7, 9, 20, 33, 50)
+
+def test_plage_au_dela_de_63():
+    with pytest.raises(ValueError):
+        ConfigLoterie({**LOTERIES["2"], "plage_numeros": (1, 64)})
+
+# --- API: combinaison invalide -> 400 ---
+@pytest.mark.parametrize("combinaison", [[1, 1, 2, 3, 4, 5, 6], [1, 2, 3, 4, 5, 6, 51]])
+def test_api_verifier_invalide_400(client, combinaison):
+    r = client.post("/api/verifier", json={"loterie": "2", "combinaison": combinaison})
+    assert r.status_code == 400
+
+@pytest.mark.parametrize("invalide", [[1, 1, 2, 3, 4, 5, 6], [1, 2, 3, 4, 5, 6, 51]])
+def test_api_verifier_bloc_invalide_400(client, invalide):
+    cfg = LOTERIES["2"]
+    bloc = [list(c) for c in combinaisons_aleatoires(cfg, cfg["par_bloc_base"])][:cfg["par_bloc_base"]]
+    r = client.post("/api/verifier-bloc", json={"loterie": "2", "bloc": bloc + [invalide]})
+    assert r.status_code == 400
+    assert not r.get_json()["ok"]
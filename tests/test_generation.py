@@ -0,0 +1,66 @@
+import contextlib
+import io
+
+import pytest
+
+from scripts.loto_gen.generateur_ultra_plus import LOTERIES, generer_par_blocs
+
+def generer(cfg, blocs, **kwargs):
+    stats = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        res, _ = generer_par_blocs(cfg, blocs * (cfg["par_bloc_base"] + 1), stats=stats, **kwargs)
+    return res, stats
+
+# --- Score de paires: préférence, jamais bloquante ---
+@pytest.mark.parametrize("lid", sorted(LOTERIES))
+@pytest.mark.parametrize("mode", ["eviter", "favoriser"])
+@pytest.mark.parametrize("vectorise", [False, True])
+def test_score_paires_complete_les_blocs(lid, mode, vectorise):
+    # Lotto Max 'favoriser' ne finissait aucun bloc (dernière position quasi imposée)
+    cfg = {**LOTERIES[lid], "score_paires": {"mode": mode, "quantile": 0.3}}
+    res, stats = generer(cfg, 3, delai=60, vectorise=vectorise)
+    assert not stats["partiel"]
+    assert len(res) == 3 * (cfg["par_bloc_base"] + 1)
+
+@pytest.mark.parametrize("reglage", [{"mode": "autre"}, {"quantile": 1.5}, {"quantile": "0.5"}])
+def test_score_paires_reglage_invalide(reglage):
+    with pytest.raises(ValueError):
+        generer({**LOTERIES["2"], "score_paires": reglage}, 1)
+
+def test_api_score_paires_invalide_400(client):
+    r = client.post("/api/generer", json={"loterie": "2", "blocs": 1, "score_paires": {"quantile": 2}})
+    assert r.status_code == 400
+
+# --- Délai: plafonné, jamais désactivé ---
+@pytest.mark.parametrize("delai", [0, -1, float("nan"), float("inf"), "abc", [1]])
+def test_api_delai_invalide_400(client, delai):
+    r = client.post("/api/generer", json={"loterie": "2", "blocs": 1, "delai": delai})
+    assert r.status_code == 400
+
+def test_api_delai_plafonne(client, monkeypatch):
+    import app
+
+    # Un délai demandé énorme reste coupé par GENERATION_DELAI_MAX
+    monkeypatch.setattr(app, "GENERATION_DELAI_MAX", 1e-6)
+    r = client.post("/api/generer", json={"loterie": "2", "blocs": 50, "delai": 1e9})
+    assert r.status_code == 200
+    assert r.get_json()["partiel"]
+
+def test_delai_respecte():
+    res, stats = generer(LOTERIES["2"], 50, delai=1e-6)
+    assert stats["partiel"] and stats["delai_depasse"]
+
+@pytest.mark.parametrize("delai", [0, float("nan")])
+def test_delai_invalide(delai):
+    with pytest.raises(ValueError):
+        generer(LOTERIES["2"], 1, delai=delai)
+
+# --- Pondération ---
+@pytest.mark.parametrize("force", [1000, -1, float("nan"), "fort"])
+def test_api_force_invalide_400(client, force):
+    r = client.post("/api/generer", json={"loterie": "2", "blocs": 1, "ponderation": {"schema": "retard", "force": force}})
+    assert r.status_code == 400
+
+def test_api_force_valide(client):
+    r = client.post("/api/generer", json={"loterie": "2", "blocs": 1, "ponderation": {"schema": "retard", "force": 5}})
+    assert r.status_code == 200
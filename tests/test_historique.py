@@ -0,0 +1,15 @@
+import pytest
+
+@pytest.mark.parametrize("depuis", ["2020-13-45", "hier", "2020/01/01"])
+def test_api_depuis_invalide_400(client, depuis):
+    # 6/49: loterie datée, seul le format de 'depuis' peut être en cause
+    r = client.get("/api/stats/frequences", query_string={"loterie": "1", "depuis": depuis})
+    assert r.status_code == 400
+    assert "AAAA-MM-JJ" in r.get_json()["error"]
+
+def test_api_fenetre(client):
+    r = client.get("/api/stats/frequences", query_string={"loterie": "1", "depuis": "2020-01-01"})
+    assert r.status_code == 200
+    assert r.get_json()["data"]["debut"] >= "2020-01-01"
+    r = client.get("/api/stats/frequences", query_string={"loterie": "2", "derniers": -5})
+    assert r.status_code == 400
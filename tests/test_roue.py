@@ -0,0 +1,33 @@
+import pytest
+
+from scripts.loto_gen.cache import contexte_loterie
+from scripts.loto_gen.generateur_ultra_plus import LOTERIES
+from scripts.loto_gen.roue import generer_roue
+
+LOTTO_MAX = LOTERIES["2"]
+# 11 numéros bien répartis: quelques centaines de tickets valides, moins que demandés ci-dessous
+POOL_ETROIT = [2, 5, 11, 14, 17, 22, 26, 33, 38, 41, 44]
+
+def test_pool_sans_ticket_valide():
+    # 1..15: trop de numéros dans les mêmes dizaines, aucun ticket ne passe les critères
+    with pytest.raises(ValueError):
+        generer_roue(LOTTO_MAX, 5, numeros=range(1, 16), delai=0.2)
+
+def test_pool_epuise_partiel():
+    tickets, rapport = generer_roue(LOTTO_MAX, 1000, numeros=POOL_ETROIT, delai=0.2)
+    assert rapport["partiel"]
+    assert 0 < len(tickets) < 1000
+    assert len(set(tickets)) == len(tickets)
+
+def test_roue_tickets_valides():
+    tickets, rapport = generer_roue(LOTTO_MAX, 5, garantie=3, delai=0.2)
+    assert len(tickets) == 5 and not rapport["partiel"]
+    ctx = contexte_loterie(LOTTO_MAX)
+    assert all(LOTTO_MAX.passe(t, ctx["mediane"]) for t in tickets)
+    assert not set(tickets) & (ctx["historique"] | ctx["proposes"])
+
+def test_api_roue_pool_sans_ticket_400(client):
+    r = client.post("/api/generer", json={"loterie": "2", "mode": "Roue", "tickets": 3,
+                                          "numeros": list(range(1, 16)), "delai": 0.2})
+    assert r.status_code == 400
+    assert not r.get_json()["ok"]